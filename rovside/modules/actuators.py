@@ -0,0 +1,44 @@
+# modules/actuators.py
+# Aggregated actuator state. Actuator modules call update() when they apply a new value
+# (cheap: a dict update, no I/O); a background loop publishes one combined message at
+# STATE_HZ while something changed, and every KEEPALIVE seconds otherwise:
+#   {"type":"actuators","ts":<rov monotonic>,"motor":{"throttle":..,"turn":..,"ts":..},"servo":{...}}
+# Per-command confirmation is the generic "ack": add "ack":<id> to a command.
+
+import asyncio, json, os, time
+
+TYPE = "actuators"
+
+STATE_HZ = float(os.environ.get("ROV_ACTUATOR_STATE_HZ", "10"))
+KEEPALIVE = 1.0
+
+_state = {}     # actuator name -> last applied values (with "ts")
+_dirty = False
+
+def update(name, **values):
+    global _dirty
+    values["ts"] = time.monotonic()
+    _state[name] = values
+    _dirty = True
+
+def _message():
+    return json.dumps({"type": TYPE, "ts": time.monotonic(), **_state}, separators=(',', ':'))
+
+async def get(_data=None, websocket=None):
+    if websocket is not None:
+        await websocket.send(_message())
+
+async def start_background_loop(send_func):
+    global _dirty
+    last = 0.0
+    while True:
+        await asyncio.sleep(1.0 / STATE_HZ)
+        now = time.monotonic()
+        if _state and (_dirty or now - last >= KEEPALIVE):
+            _dirty = False
+            last = now
+            await send_func(_message(), TYPE)
+
+ACTIONS = {
+    "get": get,
+}
@@ -0,0 +1,64 @@
+# modules/clock.py
+# Answers NTP-style clock probes from the topside relay and keeps the offset it reports,
+# so ROV code can turn topside timestamps into local time.monotonic() values.
+
+import json, time
+from modules import log
+
+TYPE = "clock"
+
+_log = log.get("clock")
+_bad_log = log.RateLimit(_log, 5.0)   # the relay re-sends sync every second
+
+# Offset reported by the relay: rov_time = topside_time + OFFSET
+OFFSET = None
+UNCERTAINTY = None
+DRIFT_PPM = 0.0
+_synced_at = 0.0
+SYNC_VALID_FOR = 30.0   # seconds an offset stays usable without a fresh "sync"
+
+async def probe(data, websocket=None):
+    """
+    Expects:
+      { "type":"clock", "action":"probe", "id":<n>, "t0":<topside monotonic> }
+    Replies with t1 (receive time, stamped by the server) and t2 (send time). The reply
+    goes through the client's outbox, so t2 is when it was queued; with an empty outbox
+    that is within microseconds of the write, and a backed-up one shows up as extra RTT.
+    """
+    if websocket is None:
+        return
+    t1 = data.get("_rx", time.monotonic())
+    await websocket.send(json.dumps({
+        "type": "clock", "event": "probe", "id": data.get("id"),
+        "t0": data.get("t0"), "t1": t1, "t2": time.monotonic()
+    }, separators=(',',':')))
+
+def sync(data):
+    """
+    Expects:
+      { "type":"clock", "action":"sync", "offset":<s>, "uncertainty":<s>, "drift_ppm":<ppm> }
+    """
+    global OFFSET, UNCERTAINTY, DRIFT_PPM, _synced_at
+    try:
+        OFFSET = float(data["offset"])
+        UNCERTAINTY = float(data.get("uncertainty", 0.0))
+        DRIFT_PPM = float(data.get("drift_ppm", 0.0))
+        _synced_at = time.monotonic()
+    except (KeyError, TypeError, ValueError):
+        _bad_log.warning("⚠️ Bad sync message: offset=%r uncertainty=%r drift_ppm=%r",
+                         data.get("offset"), data.get("uncertainty"), data.get("drift_ppm"))
+
+def is_synced():
+    return OFFSET is not None and (time.monotonic() - _synced_at) <= SYNC_VALID_FOR
+
+def to_local(remote_ts):
+    """Topside monotonic timestamp -> ROV monotonic time, or None when not synced."""
+    if not is_synced():
+        return None
+    drift = DRIFT_PPM * 1e-6 * (time.monotonic() - _synced_at)
+    return float(remote_ts) + OFFSET + drift
+
+ACTIONS = {
+    "probe": probe,
+    "sync":  sync,
+}
@@ -0,0 +1,167 @@
+# modules/event_bus.py
+# In-process publish/subscribe between rovside modules. Samples are handed over as the
+# same Python object to every subscriber (no JSON, no copy), so publish frozen
+# dataclasses or treat what you receive as read-only.
+#
+# Declare topics in a module next to TYPE/ACTIONS; load_modules() wires them up:
+#   PRODUCES = {"telemetry.sample": TelemetrySample}        # topic -> sample type
+#   CONSUMES = {"telemetry.sample": on_sample}              # topic -> callback
+# and publish with  event_bus.BUS.publish("telemetry.sample", sample).
+#
+# - Sync callbacks run inline inside publish(): keep them to a few µs (store, compare).
+# - Async callbacks get a bounded queue (QUEUE_LIMIT) and their own task; when a consumer
+#   falls behind the oldest samples are dropped and counted, the producer never waits.
+# - Topic types are checked on publish; a topic may be consumed before it is declared.
+
+import asyncio, json, os, time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from modules import log, metrics
+
+TYPE = "bus"
+
+QUEUE_LIMIT = int(os.environ.get("ROV_BUS_QUEUE", "64"))
+
+_log = log.get("bus")
+
+class Subscriber:
+    __slots__ = ("name", "callback", "is_async", "queue", "limit", "dropped", "delivered",
+                 "_wake", "task")
+    def __init__(self, name, callback, limit):
+        self.name = name
+        self.callback = callback
+        self.is_async = asyncio.iscoroutinefunction(callback)
+        self.queue = deque()
+        self.dropped = 0
+        self.delivered = 0
+        self._wake = None
+        self.task = None
+        self.limit = limit if self.is_async else 0
+
+    def start(self):
+        if self.is_async and self.task is None:
+            self._wake = asyncio.Event()
+            self.task = asyncio.create_task(self._run())
+
+    def deliver(self, sample):
+        if not self.is_async:
+            self.callback(sample)
+            self.delivered += 1
+            return
+        if len(self.queue) >= self.limit:
+            self.queue.popleft()
+            self.dropped += 1
+        self.queue.append(sample)
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self):
+        while True:
+            while self.queue:
+                try:
+                    await self.callback(self.queue.popleft())
+                    self.delivered += 1
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    _log.warning("⚠️ subscriber %s failed", self.name, exc_info=True)
+            self._wake.clear()
+            await self._wake.wait()
+
+class Topic:
+    __slots__ = ("name", "type", "subscribers", "published", "last", "last_ts")
+    def __init__(self, name, sample_type=None):
+        self.name = name
+        self.type = sample_type
+        self.subscribers: List[Subscriber] = []
+        self.published = 0
+        self.last = None        # latest sample, for consumers that only want "now"
+        self.last_ts = None
+
+class EventBus:
+    def __init__(self):
+        self.topics: Dict[str, Topic] = {}
+
+    def topic(self, name: str, sample_type: Optional[type] = None) -> Topic:
+        """Get or create; giving a type declares it (once, and it must then agree)."""
+        t = self.topics.get(name)
+        if t is None:
+            t = self.topics[name] = Topic(name, sample_type)
+        elif sample_type is not None:
+            if t.type is None:
+                t.type = sample_type
+            elif t.type is not sample_type:
+                raise TypeError(f"topic {name!r} carries {t.type.__name__}, not {sample_type.__name__}")
+        return t
+
+    def subscribe(self, name: str, callback: Callable, owner: str = "?", limit: int = QUEUE_LIMIT) -> Subscriber:
+        sub = Subscriber(f"{owner}.{getattr(callback, '__name__', '?')}", callback, limit)
+        self.topic(name).subscribers.append(sub)
+        try:
+            sub.start()
+        except RuntimeError:
+            pass   # no running loop yet; start_pending() picks it up
+        return sub
+
+    def unsubscribe(self, name: str, sub: Subscriber):
+        t = self.topics.get(name)
+        if t is not None and sub in t.subscribers:
+            t.subscribers.remove(sub)
+            if sub.task is not None:
+                sub.task.cancel()
+
+    def start_pending(self):
+        for t in self.topics.values():
+            for sub in t.subscribers:
+                sub.start()
+
+    def publish(self, name: str, sample):
+        t = self.topics.get(name) or self.topic(name)
+        if t.type is not None and not isinstance(sample, t.type):
+            raise TypeError(f"topic {name!r} carries {t.type.__name__}, got {type(sample).__name__}")
+        t.published += 1
+        t.last = sample
+        t.last_ts = time.monotonic()
+        for sub in t.subscribers:
+            try:
+                sub.deliver(sample)
+            except Exception:
+                _log.warning("⚠️ subscriber %s failed", sub.name, exc_info=True)
+
+    def latest(self, name: str):
+        t = self.topics.get(name)
+        return t.last if t is not None else None
+
+    def register_module(self, module, owner: str):
+        """Wire a module's PRODUCES / CONSUMES declarations."""
+        for name, sample_type in getattr(module, "PRODUCES", {}).items():
+            self.topic(name, sample_type)
+        for name, callback in getattr(module, "CONSUMES", {}).items():
+            self.subscribe(name, callback, owner)
+
+    def snapshot(self):
+        return {name: {"type": t.type.__name__ if t.type else None, "published": t.published,
+                       "subscribers": {s.name: {"delivered": s.delivered, "queued": len(s.queue),
+                                                "dropped": s.dropped} for s in t.subscribers}}
+                for name, t in self.topics.items()}
+
+BUS = EventBus()
+
+metrics.REGISTRY.callback("rov_bus_published_total", "Samples published per bus topic",
+                          lambda: [({"topic": n}, t.published) for n, t in BUS.topics.items()],
+                          kind="counter")
+metrics.REGISTRY.callback("rov_bus_dropped_total", "Samples dropped for a slow async bus subscriber",
+                          lambda: [({"subscriber": s.name}, s.dropped)
+                                   for t in BUS.topics.values() for s in t.subscribers if s.is_async],
+                          kind="counter")
+
+# ---------------- Module actions ----------------
+
+async def stats(_data=None, websocket=None):
+    if websocket is not None:
+        await websocket.send(json.dumps({"type": TYPE, "event": "stats", "topics": BUS.snapshot()}))
+
+ACTIONS = {
+    "stats": stats,
+}
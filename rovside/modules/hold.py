@@ -0,0 +1,246 @@
+# modules/hold.py
+# Onboard depth / heading hold. Runs at RATE_HZ from the newest local telemetry sample
+# (event bus "telemetry.sample"), so tether latency is no longer inside the loop.
+#
+#   {"type":"hold","action":"set_depth","depth":2.5}      # metres, enables depth hold
+#   {"type":"hold","action":"set_heading","heading":90}   # degrees, enables heading hold
+#   {"type":"hold","action":"enable","axis":"depth"}      # hold the current value ("all" = both)
+#   {"type":"hold","action":"disable","axis":"all"}
+#   {"type":"hold","action":"tune","axis":"heading","kp":1.2,"ki":0.1,"kd":0.6}
+#   {"type":"hold","action":"status"}
+#
+# Output is a ControlAssist on "control.assist" (-100..100 %, like motor.set) that
+# motor.py adds to the pilot's command. Heading: yaw goes into "turn"; while the pilot
+# steers (|turn| > PILOT_DEADBAND) the target follows the current heading instead.
+# Depth: "heave" is published for a vertical thruster path; the two-motor drive has none.
+# motor.stop disables both axes. Offline tuning: rovside/testing/hold_sim.py.
+
+import asyncio, json, math, time
+from dataclasses import dataclass
+
+from modules import log
+from modules.event_bus import BUS
+from modules.motor import PilotCommand
+from modules.telemetry import TelemetrySample
+
+TYPE = "hold"
+
+RATE_HZ = 50
+SENSOR_TIMEOUT = 0.5     # s without a telemetry sample -> output zero, integrators reset
+PILOT_DEADBAND = 5       # % turn the pilot may give before heading hold lets go
+HEADING_SCALE = 360.0    # telemetry orientation is in turns (wraps at 1) -> degrees
+HEADING_INDEX = 2        # orientation = (roll, pitch, yaw)
+D_FILTER = 0.1           # s, derivative low-pass
+
+# Starting points tuned against testing/hold_sim.py; re-tune on the vehicle with "tune"
+DEPTH_GAINS   = dict(kp=250.0, ki=8.0, kd=150.0)   # % per m, % per m*s, % per m/s
+HEADING_GAINS = dict(kp=6.0, ki=0.4, kd=0.5)       # % per degree, degree*s, degree/s
+
+_log = log.get("hold")
+_stale_log = log.RateLimit(_log, 5.0)
+
+@dataclass(frozen=True)
+class ControlAssist:
+    ts: float
+    heave: float   # % -100..100, + = down
+    yaw: float     # % -100..100, + = turn right
+
+PRODUCES = {"control.assist": ControlAssist}
+
+class PID:
+    """
+    PID on the measurement (no derivative kick on a setpoint change), derivative
+    low-passed with time constant d_filter (sensor noise), clamped output.
+    Anti-windup: the integrator only moves when that doesn't push a saturated output
+    further, and it is bounded so ki * integral alone can't exceed the limit.
+    """
+    def __init__(self, kp, ki, kd, limit=100.0, d_filter=D_FILTER):
+        self.kp, self.ki, self.kd = kp, ki, kd
+        self.limit = limit
+        self.d_filter = d_filter
+        self.reset()
+
+    def reset(self):
+        self.integral = 0.0
+        self.prev_meas = None
+        self.d_meas = 0.0
+
+    def step(self, error, meas, dt):
+        if self.prev_meas is not None and dt > 0:
+            a = dt / (self.d_filter + dt)
+            self.d_meas += a * ((meas - self.prev_meas) / dt - self.d_meas)
+        self.prev_meas = meas
+        unsat = self.kp * error + self.ki * self.integral - self.kd * self.d_meas
+        out = max(-self.limit, min(self.limit, unsat))
+        if self.ki and (out == unsat or (unsat > 0) != (error > 0)):
+            bound = self.limit / abs(self.ki)
+            self.integral = max(-bound, min(bound, self.integral + error * dt))
+        return out
+
+def wrap180(deg):
+    return (deg + 180.0) % 360.0 - 180.0
+
+class HoldController:
+    """Both axes; step() is pure, so the simulator drives the same code as the ROV."""
+    def __init__(self):
+        self.depth_pid = PID(**DEPTH_GAINS)
+        self.heading_pid = PID(**HEADING_GAINS)
+        self.depth_target = None     # None = axis disabled
+        self.heading_target = None
+
+    def step(self, depth, heading, pilot_turn, dt):
+        heave = yaw = 0.0
+        if self.depth_target is not None:
+            heave = self.depth_pid.step(self.depth_target - depth, depth, dt)
+        if self.heading_target is not None:
+            if abs(pilot_turn) > PILOT_DEADBAND:
+                self.heading_target = heading   # pilot is steering; re-capture on release
+                self.heading_pid.reset()
+            else:
+                # unwrap the measurement so the D term doesn't see a 360° jump
+                meas = self.heading_target - wrap180(self.heading_target - heading)
+                yaw = self.heading_pid.step(self.heading_target - meas, meas, dt)
+        return heave, yaw
+
+    def reset(self):
+        self.depth_pid.reset()
+        self.heading_pid.reset()
+
+_ctl = HoldController()
+_pilot_turn = 0.0
+_last = ControlAssist(0.0, 0.0, 0.0)
+
+def heading_of(sample: TelemetrySample):
+    return (sample.orientation[HEADING_INDEX] * HEADING_SCALE) % 360.0
+
+def _on_pilot(cmd: PilotCommand):
+    global _pilot_turn
+    _pilot_turn = cmd.turn
+    if cmd.stop and (_ctl.depth_target is not None or _ctl.heading_target is not None):
+        _disable("all")
+        _log.info("🛑 hold disabled by motor.stop")
+
+CONSUMES = {"pilot.command": _on_pilot}
+
+def _publish(heave, yaw):
+    global _last
+    if heave != _last.heave or yaw != _last.yaw:
+        _last = ControlAssist(time.monotonic(), heave, yaw)
+        BUS.publish("control.assist", _last)
+
+def _axes(data):
+    axis = data.get("axis", "all")
+    return ("depth", "heading") if axis == "all" else (axis,)
+
+def _disable(axis):
+    for a in _axes({"axis": axis}):
+        if a == "depth":
+            _ctl.depth_target = None
+            _ctl.depth_pid.reset()
+        elif a == "heading":
+            _ctl.heading_target = None
+            _ctl.heading_pid.reset()
+    _publish(0.0 if _ctl.depth_target is None else _last.heave,
+             0.0 if _ctl.heading_target is None else _last.yaw)
+
+def _float(data, key):
+    try:
+        v = float(data[key])
+        if math.isfinite(v):
+            return v
+    except (KeyError, TypeError, ValueError):
+        pass
+    _log.warning("⚠️ %s needs a finite numeric '%s'", data.get("action"), key)
+    return None
+
+def set_depth(data):
+    depth = _float(data, "depth")
+    if depth is not None:
+        if _ctl.depth_target is None:
+            _ctl.depth_pid.reset()
+        _ctl.depth_target = max(0.0, depth)
+        _log.info("🎯 depth hold %.2f m", _ctl.depth_target)
+
+def set_heading(data):
+    heading = _float(data, "heading")
+    if heading is not None:
+        _ctl.heading_pid.prev_meas = None   # measurement is unwrapped around the target
+        if _ctl.heading_target is None:
+            _ctl.heading_pid.reset()
+        _ctl.heading_target = heading % 360.0
+        _log.info("🎯 heading hold %.1f°", _ctl.heading_target)
+
+def enable(data):
+    sample = BUS.latest("telemetry.sample")
+    if sample is None:
+        _log.warning("⚠️ hold: no telemetry yet, can't capture current value")
+        return
+    for a in _axes(data):
+        if a == "depth" and _ctl.depth_target is None:
+            set_depth({"depth": sample.depth})
+        elif a == "heading" and _ctl.heading_target is None:
+            set_heading({"heading": heading_of(sample)})
+
+def disable(data):
+    _disable(data.get("axis", "all"))
+    _log.info("⏹️ hold off: %s", data.get("axis", "all"))
+
+def tune(data):
+    for a in _axes(data):
+        pid = _ctl.depth_pid if a == "depth" else _ctl.heading_pid if a == "heading" else None
+        if pid is None:
+            continue
+        for k in ("kp", "ki", "kd"):
+            if k in data:
+                v = _float(data, k)
+                if v is not None:
+                    setattr(pid, k, v)
+        pid.integral = 0.0
+        _log.info("🔧 %s gains kp=%g ki=%g kd=%g", a, pid.kp, pid.ki, pid.kd)
+
+def _status():
+    return {"type": TYPE, "event": "status",
+            "depth_target": _ctl.depth_target, "heading_target": _ctl.heading_target,
+            "heave": round(_last.heave, 1), "yaw": round(_last.yaw, 1),
+            "gains": {"depth": [_ctl.depth_pid.kp, _ctl.depth_pid.ki, _ctl.depth_pid.kd],
+                      "heading": [_ctl.heading_pid.kp, _ctl.heading_pid.ki, _ctl.heading_pid.kd]}}
+
+async def status(_data=None, websocket=None):
+    if websocket is not None:
+        await websocket.send(json.dumps(_status()))
+
+async def start_background_loop(send_func):
+    loop = asyncio.get_running_loop()
+    period = 1.0 / RATE_HZ
+    next_t = loop.time()
+    last_t = None
+    while True:
+        next_t += period
+        now = loop.time()
+        if next_t < now:
+            next_t = now + period   # fell behind: skip ticks instead of bursting
+        await asyncio.sleep(next_t - now)
+
+        if _ctl.depth_target is None and _ctl.heading_target is None:
+            last_t = None
+            continue
+        t = loop.time()
+        dt = period if last_t is None else t - last_t
+        last_t = t
+        sample = BUS.latest("telemetry.sample")
+        if sample is None or time.monotonic() - sample.ts > SENSOR_TIMEOUT:
+            _stale_log.warning("⚠️ hold: telemetry older than %.1fs, output zeroed", SENSOR_TIMEOUT)
+            _ctl.reset()
+            _publish(0.0, 0.0)
+            continue
+        heave, yaw = _ctl.step(sample.depth, heading_of(sample), _pilot_turn, dt)
+        _publish(round(heave, 1), round(yaw, 1))
+
+ACTIONS = {
+    "set_depth":   set_depth,
+    "set_heading": set_heading,
+    "enable":      enable,
+    "disable":     disable,
+    "tune":        tune,
+    "status":      status,
+}
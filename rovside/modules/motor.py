@@ -1,16 +1,24 @@
 # rovside/modules/motor.py
-# Receives throttle + turn over WS, forwards via SPI, and echoes telemetry back.
-
-import time, json, atexit
-from modules.spi_bus import get_bus
+# Receives throttle + turn over WS and forwards via SPI. Applied values are reported through
+# modules/actuators.py (periodic, aggregated); nothing here waits on a websocket.
+# Pilot commands go out on the event bus ("pilot.command"); an onboard assist
+# ("control.assist", e.g. modules/hold.py) is added to the pilot's turn before sending.
+# Both only on the two-motor frame (DRIVES); with ROV_THRUSTERS=1 thrusters.py does that.
+
+import os, time, atexit, asyncio
+from dataclasses import dataclass
+from modules import actuators, log
+from modules.event_bus import BUS
+from modules.spi_bus import frame, get_bus
 
 TYPE = "motor"
 
-# --- Toggle terminal printing of throttle/turn here ---
-PRINT_VALUES = True  # set True to print throttle/turn updates
+# Throttle/turn updates are logged at DEBUG (ROV_LOG=motor=DEBUG), at most every VALUES_LOG_INTERVAL s
+VALUES_LOG_INTERVAL = 0.5
+_log = log.get("motor")
+_values_log = log.RateLimit(_log, VALUES_LOG_INTERVAL)
 
-# Simple packet framing: [SYNC=0xAA][LEN][CMD][payload...][CRC8]
-SYNC = 0xAA
+# Framing ([SYNC][LEN][CMD][payload...][CRC8]) lives in spi_bus.frame()
 CMD_THROTTLE_TURN = 0x01   # payload: [throttle_byte, turn_byte]
 CMD_STOP          = 0x02
 
@@ -24,21 +32,21 @@ _last_throttle = 0
 _last_turn     = 0
 _last_send_t   = 0.0
 
-# Optional broadcast hook (set by server when loading the module)
-_BROADCAST = None
+# On the vectored frame (ROV_THRUSTERS=1) thrusters.py drives the vehicle: it publishes
+# pilot.command and takes the assist, and this module does neither.
+DRIVES = os.environ.get("ROV_THRUSTERS", "0") != "1"
+
+@dataclass(frozen=True)
+class PilotCommand:
+    ts: float
+    throttle: int   # % -100..100 forward (thrusters.py: surge)
+    turn: int       # % -100..100 right (thrusters.py: yaw)
+    stop: bool = False
 
-def _crc8(data, poly=0x07, init=0x00):
-    c = init
-    for b in data:
-        c ^= b
-        for _ in range(8):
-            c = ((c << 1) ^ poly) & 0xFF if (c & 0x80) else (c << 1) & 0xFF
-    return c
+PRODUCES = {"pilot.command": PilotCommand}
 
-def _pkt(cmd, payload):
-    body = [SYNC, 0, cmd] + [int(x) & 0xFF for x in payload]
-    body[1] = len(body) - 2 + 1  # LEN=(CMD..payload)+CRC, excludes SYNC
-    return body + [_crc8(body)]
+_pilot = (0, 0)      # last throttle/turn from the pilot
+_assist_yaw = 0.0    # % added to turn by the onboard controller
 
 def _clamp_pct(v):
     try:
@@ -52,72 +60,156 @@ def _map_pct_byte(v):          # -100..100 -> 0..200 (center=100)
 def _changed(a, b, th=CHANGE_THRESHOLD):
     return abs(int(a) - int(b)) >= th
 
-async def set(data, websocket=None):
+class _Throttle:
+    """
+    Leading + trailing edge rate limiter. Pure bookkeeping: the caller passes `now`,
+    so it can be driven with a fake clock.
+
+    - offer(): the first value after a quiet period goes out at once (leading edge);
+      inside MIN_INTERVAL the value is parked as pending (newest wins).
+    - flush(): once `deadline()` has passed the pending value goes out (trailing edge).
+
+    A setpoint therefore never waits longer than `min_interval` after it was offered.
+    """
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self.last_t = float("-inf")
+        self.pending = None
+
+    def offer(self, value, now):
+        if now - self.last_t >= self.min_interval:
+            self.pending = None
+            self.last_t = now
+            return value
+        self.pending = value
+        return None
+
+    def deadline(self):
+        return None if self.pending is None else self.last_t + self.min_interval
+
+    def flush(self, now):
+        if self.pending is None or now < self.last_t + self.min_interval:
+            return None
+        value, self.pending = self.pending, None
+        self.last_t = now
+        return value
+
+    def cancel(self):
+        self.pending = None
+
+_clock = time.monotonic
+_throttle = _Throttle(MIN_INTERVAL)
+_flush_handle = None   # asyncio TimerHandle for the trailing edge
+
+def _emit(th, tn, now):
+    """Write one throttle/turn frame and record it as the applied state."""
+    global _last_throttle, _last_turn, _last_send_t
+    bus.send(frame(CMD_THROTTLE_TURN, [_map_pct_byte(th), _map_pct_byte(tn)]))
+    _last_throttle, _last_turn = th, tn
+    _last_send_t = now
+    actuators.update("motor", throttle=th, turn=tn)
+
+    _values_log.debug("🛞 throttle=%4d%%  turn=%4d%%", th, tn)
+
+def _cancel_flush():
+    global _flush_handle
+    if _flush_handle is not None:
+        _flush_handle.cancel()
+        _flush_handle = None
+
+def _flush():
+    """Trailing edge: push out the newest parked setpoint once MIN_INTERVAL expired."""
+    global _flush_handle
+    _flush_handle = None
+    now = _clock()
+    pending = _throttle.flush(now)
+    if pending is None:
+        _schedule_flush()   # woke up early; re-arm
+        return
+    _emit(*pending, now)
+
+def _schedule_flush():
+    global _flush_handle
+    deadline = _throttle.deadline()
+    if deadline is None or _flush_handle is not None:
+        return
+    loop = asyncio.get_running_loop()
+    _flush_handle = loop.call_later(max(0.0, deadline - _clock()), _flush)
+
+def set(data):
     """
     Expects:
       { "type":"motor", "action":"set", "throttle":-100..100, "turn":-100..100 }
     Aliases also accepted: "steer" or "steering" instead of "turn".
-    """
-    global _last_throttle, _last_turn, _last_send_t
 
-    th = _clamp_pct(data.get("throttle", _last_throttle))
-    tn = _clamp_pct(data.get("turn", data.get("steer", data.get("steering", _last_turn))))
-
-    now = time.monotonic()
+    Rate limited to MIN_INTERVAL with leading and trailing edges: an update that
+    lands inside the window is parked (newest wins) and flushed as soon as the
+    window expires, so the last value is never stuck waiting for another message.
+    """
+    global _pilot
+    th = _clamp_pct(data.get("throttle", _pilot[0]))
+    tn = _clamp_pct(data.get("turn", data.get("steer", data.get("steering", _pilot[1]))))
+    _pilot = (th, tn)
+    if DRIVES:
+        BUS.publish("pilot.command", PilotCommand(_clock(), th, tn))
+    _apply()
+
+def _on_assist(sample):
+    global _assist_yaw
+    if sample.yaw != _assist_yaw:
+        _assist_yaw = sample.yaw
+        _apply()
+
+CONSUMES = {"control.assist": _on_assist} if DRIVES else {}
+
+def _apply():
+    """Send pilot + assist, subject to the change threshold and rate limit."""
+    th = _pilot[0]
+    tn = _clamp_pct(_pilot[1] + _assist_yaw)
+
+    now = _clock()
     should_send = (
         _changed(th, _last_throttle) or
         _changed(tn, _last_turn) or
         (now - _last_send_t) >= FORCE_SEND_AFTER
     )
 
-    if should_send and (now - _last_send_t) >= MIN_INTERVAL:
-        bus.send(_pkt(CMD_THROTTLE_TURN, [_map_pct_byte(th), _map_pct_byte(tn)]))
-        _last_throttle, _last_turn = th, tn
-        _last_send_t = now
-
-        if PRINT_VALUES:
-            print(f"🛞 [MOTOR] throttle={th:>4}%  turn={tn:>4}%")
-
-        # Echo back to client (confirmation)
-        msg = json.dumps({
-            "type": "motor",
-            "event": "rx",
-            "throttle": th,
-            "turn": tn,
-            "ts": now
-        })
-        if websocket is not None:
-            try:    await websocket.send(msg)
-            except Exception: pass
-        if _BROADCAST is not None:
-            try:    await _BROADCAST(msg)
-            except Exception: pass
-
-async def stop(_data=None, websocket=None):
-    global _last_throttle, _last_turn, _last_send_t
-    bus.send(_pkt(CMD_STOP, [0, 0]))
+    if not should_send:
+        # Newest setpoint equals what the MCU already has; drop any parked one.
+        _throttle.cancel()
+        _cancel_flush()
+        return
+
+    if _throttle.offer((th, tn), now) is None:
+        _schedule_flush()
+        return
+
+    _cancel_flush()
+    _emit(th, tn, now)
+
+def stop(_data=None):
+    global _last_throttle, _last_turn, _last_send_t, _pilot, _assist_yaw
+    _pilot, _assist_yaw = (0, 0), 0.0
+    if DRIVES:
+        BUS.publish("pilot.command", PilotCommand(_clock(), 0, 0, stop=True))
+    _throttle.cancel()
+    _cancel_flush()
+    bus.send(frame(CMD_STOP, [0, 0]))
     _last_throttle = _last_turn = 0
-    _last_send_t = time.monotonic()
-    print("🛑 [MOTOR] stop")
-    if websocket is not None:
-        try:
-            await websocket.send(json.dumps({
-                "type":"motor","event":"rx","throttle":0,"turn":0,"ts":_last_send_t
-            }))
-        except Exception:
-            pass
+    _last_send_t = _clock()
+    _throttle.last_t = _last_send_t
+    actuators.update("motor", throttle=0, turn=0)
+    _log.info("🛑 stop")
 
 def close(_data=None):
     # Leave SPI open; shared with other modules
-    print("🔌 [MOTOR] ready; SPI bus shared with other modules")
-
-# Called by the server on load; we keep broadcast for optional telemetry fan-out.
-async def start_background_loop(broadcast_func):
-    global _BROADCAST
-    _BROADCAST = broadcast_func
+    _log.info("🔌 ready; SPI bus shared with other modules")
 
 atexit.register(close)
 
+# Setpoint actions: the server keeps only the newest pending one (latest wins)
+CONTINUOUS = {"set", "set_speed", "drive"}
+
 ACTIONS = {
     "set":       set,
     "set_speed": set,   # alias
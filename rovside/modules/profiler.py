@@ -0,0 +1,162 @@
+# modules/profiler.py
+# On-demand sampling profiler for the running control server. Nothing runs until "start":
+# then a daemon thread reads sys._current_frames() at `hz` and counts whole stacks. The
+# result is collapsed-stack text ("a;b;c 42" per line), ready for flamegraph.pl or
+# speedscope, sent back over the websocket and/or saved under PROFILE_DIR.
+#
+#   {"type":"profiler","action":"start","duration":10,"hz":200,"save":true}
+#   {"type":"profiler","action":"stop"}      # finish early, result as for start
+#   {"type":"profiler","action":"status"}
+#
+# Sampling cost is the GIL the sampler holds while walking stacks: ~20 µs per sample
+# with four threads on an x86 dev machine (a few times that on a Pi), i.e. well under
+# 1-2 % of a core at 200 Hz. Idle cost is zero: no thread, no hooks.
+
+import asyncio, json, os, sys, threading, time
+from collections import Counter
+from modules import log
+
+TYPE = "profiler"
+
+DEFAULT_DURATION = 10.0
+MAX_DURATION = 120.0
+DEFAULT_HZ = 200
+MAX_HZ = 1000
+MAX_INLINE_BYTES = 512 * 1024   # bigger results are saved to disk instead (websocket frame limit is 1 MiB)
+PROFILE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "profiles"))
+
+_log = log.get("profiler")
+
+_session = None   # the running _Session, if any
+
+def _frame_name(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class _Session:
+    def __init__(self, hz, duration):
+        self.interval = 1.0 / hz
+        self.hz = hz
+        self.duration = duration
+        self.stacks = Counter()
+        self.samples = 0
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+        self._halt = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self.done = asyncio.Event()
+
+    def _run(self):
+        me = threading.get_ident()
+        names = {}
+        next_t = time.monotonic()
+        while not self._halt.is_set():
+            frames = sys._current_frames()
+            if len(names) != len(frames):
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in frames.items():
+                if tid == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(tid, str(tid)))
+                self.stacks[";".join(reversed(stack))] += 1
+            del frames, frame
+            self.samples += 1
+            next_t += self.interval
+            delay = next_t - time.monotonic()
+            if delay < 0:
+                next_t = time.monotonic()   # fell behind; don't burst to catch up
+                delay = 0
+            self._halt.wait(delay)
+
+    def start(self):
+        self._thread.start()
+
+    async def finish(self):
+        self._halt.set()
+        await asyncio.to_thread(self._thread.join)
+        self.elapsed = time.monotonic() - self.started
+
+    def collapsed(self):
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+def _save(text):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, time.strftime("profile-%Y%m%d-%H%M%S.folded"))
+    with open(path, "w") as f:
+        f.write(text)
+    return path
+
+async def _run_session(session, websocket, save):
+    global _session
+    try:
+        try:
+            await asyncio.wait_for(session.done.wait(), session.duration)
+        except asyncio.TimeoutError:
+            pass
+        await session.finish()
+    finally:
+        _session = None
+
+    text = session.collapsed()
+    result = {"type": TYPE, "event": "result", "samples": session.samples,
+              "hz": session.hz, "duration": round(session.elapsed, 3), "stacks": len(session.stacks)}
+    if save or len(text) > MAX_INLINE_BYTES:
+        try:
+            result["path"] = await asyncio.to_thread(_save, text)
+            _log.info("🔬 %d samples saved to %s", session.samples, result["path"])
+        except OSError as e:
+            result["error"] = f"save failed: {e}"
+    if "path" not in result or not save:
+        if len(text) <= MAX_INLINE_BYTES:
+            result["collapsed"] = text
+    if websocket is not None:
+        try:
+            await websocket.send(json.dumps(result))
+        except Exception:
+            pass
+
+async def start(data, websocket=None):
+    """
+    Expects:
+      { "type":"profiler", "action":"start", "duration":<s>, "hz":<n>, "save":<bool> }
+    The result goes to the client that sent start (and to disk if save is true or it is large).
+    """
+    global _session
+    if _session is not None:
+        if websocket is not None:
+            await websocket.send(json.dumps({"type": TYPE, "event": "busy",
+                                             "elapsed": time.monotonic() - _session.started}))
+        return
+    try:
+        duration = min(MAX_DURATION, max(0.1, float(data.get("duration", DEFAULT_DURATION))))
+        hz = min(MAX_HZ, max(1, int(data.get("hz", DEFAULT_HZ))))
+    except (TypeError, ValueError):
+        duration, hz = DEFAULT_DURATION, DEFAULT_HZ
+    _session = _Session(hz, duration)
+    _session.start()
+    _log.info("🔬 sampling at %d Hz for %.1fs", hz, duration)
+    asyncio.create_task(_run_session(_session, websocket, bool(data.get("save"))))
+
+def stop(_data=None):
+    if _session is not None:
+        _session.done.set()
+
+async def status(_data=None, websocket=None):
+    if websocket is None:
+        return
+    s = _session
+    await websocket.send(json.dumps({
+        "type": TYPE, "event": "status", "running": s is not None,
+        "samples": s.samples if s else 0,
+        "elapsed": (time.monotonic() - s.started) if s else None,
+        "duration": s.duration if s else None,
+    }))
+
+ACTIONS = {
+    "start":  start,
+    "stop":   stop,
+    "status": status,
+}
@@ -1,19 +1,82 @@
 # modules/servo.py
-# Print-only (no hardware) servo module keeping the same interface.
+# Camera pan/tilt. Setpoints are interpolated onboard at OUTPUT_HZ and written over the
+# shared SPI bus, so the topside can send sparse targets and still get smooth motion.
+#
+#   {"type":"servo","action":"set_angle","pan":120,"tilt":80}                  # slew at DEFAULT_RATE
+#   {"type":"servo","action":"set_angle","pan":120,"rate":60}                  # slew at 60 °/s
+#   {"type":"servo","action":"set_angle","pan":120,"tilt":80,"duration":0.25}  # arrive in 0.25 s
+#   {"type":"servo","action":"hold"}                                          # stop where it is
+#
+# A new setpoint starts from wherever the servo is now. With "duration" equal to the
+# sender's interval, successive setpoints join into one continuous glide.
+# Frame: [SYNC][LEN][CMD_SERVO][pan_hi][pan_lo][tilt_hi][tilt_lo][CRC8], angles in 0.1°.
+# The STM32 firmware has no CMD_SERVO handler yet, so the frame only goes out with
+# ROV_SERVO_SPI=1 (default on for ROV_SPI_BACKEND=virtual); otherwise the interpolated
+# position is only reported through modules/actuators.py.
+
+import asyncio, os, time
+from modules import actuators, log
+from modules.spi_bus import frame, get_bus
 
 # --- Module type ---
 TYPE = "servo"
 
-# --- State ---
-last_pan = 90
-last_tilt = 90
+_log = log.get("servo")
+_angles_log = log.RateLimit(_log, 0.5)
+
+CMD_SERVO = 0x04
+OUTPUT_HZ = 50            # servo PWM period is 20 ms; faster gains nothing
+DEFAULT_RATE = 240.0      # °/s when a setpoint gives neither rate nor duration
+MAX_RATE = 600.0          # °/s, about what a standard hobby servo can do
+MAX_DURATION = 10.0
+KEEPALIVE = 1.0           # resend an unchanged position (MCU reset / resync)
 
-# Only print updates if change >= threshold (degrees)
+# Ignore targets closer than this to the current one (degrees; stick jitter)
 ANGLE_THRESHOLD = 2
 
-def _maybe_int(v, fallback):
+SPI_OUTPUT = os.environ.get("ROV_SERVO_SPI",
+                            "1" if os.environ.get("ROV_SPI_BACKEND") == "virtual" else "0") == "1"
+bus = get_bus(max_hz=1_000_000, mode=0, bits=8) if SPI_OUTPUT else None
+
+class Axis:
+    """One servo: position moves toward target at `rate`, or linearly over a set time."""
+    def __init__(self, name, pos=90.0):
+        self.name = name
+        self.pos = pos
+        self.target = pos
+        self.rate = DEFAULT_RATE
+        self.start = self.t0 = self.t1 = None   # timed segment
+
+    def move(self, target, now, rate=None, duration=None):
+        self.target = target
+        if duration:
+            self.start, self.t0, self.t1 = self.pos, now, now + duration
+        else:
+            self.t1 = None
+            self.rate = rate or DEFAULT_RATE
+
+    def hold(self):
+        self.target, self.t1 = self.pos, None
+
+    def step(self, now, dt):
+        if self.t1 is not None:
+            if now >= self.t1:
+                self.pos, self.t1 = self.target, None
+            else:
+                self.pos = self.start + (self.target - self.start) * (now - self.t0) / (self.t1 - self.t0)
+        else:
+            err = self.target - self.pos
+            step = self.rate * dt
+            self.pos = self.target if abs(err) <= step else self.pos + (step if err > 0 else -step)
+        return self.pos
+
+AXES = {"pan": Axis("pan"), "tilt": Axis("tilt")}
+_sent = None
+_last_send_t = 0.0
+
+def _maybe_float(v, fallback):
     try:
-        return int(v)
+        return float(v)
     except Exception:
         return fallback
 
@@ -21,25 +84,58 @@ def set_angle(data):
     """
     Expects:
       { "type": "servo", "action": "set_angle", "pan": <0..180>, "tilt": <0..180> }
-    Other keys are ignored.
+    Optional "rate" (°/s) or "duration" (s). Other keys are ignored.
     """
-    global last_pan, last_tilt
+    now = time.monotonic()
+    rate = _maybe_float(data.get("rate"), None)
+    rate = max(1.0, min(MAX_RATE, rate)) if rate else None
+    duration = _maybe_float(data.get("duration"), None)
+    duration = max(0.0, min(MAX_DURATION, duration)) if duration else None
+    for name, axis in AXES.items():
+        if name not in data:
+            continue
+        target = max(0.0, min(180.0, _maybe_float(data[name], axis.target)))
+        if abs(target - axis.target) >= ANGLE_THRESHOLD:
+            axis.move(target, now, rate, duration)
+            _angles_log.debug("🕹️ %s -> %.0f°%s", name, target,
+                              f" in {duration:.2f}s" if duration else f" at {axis.rate:.0f}°/s")
 
-    pan  = _maybe_int(data.get("pan",  last_pan),  last_pan)
-    tilt = _maybe_int(data.get("tilt", last_tilt), last_tilt)
+def hold(_data=None):
+    for axis in AXES.values():
+        axis.hold()
 
-    # (Optional) clamp to sane range
-    pan  = max(0, min(180, pan))
-    tilt = max(0, min(180, tilt))
+def _output(pan, tilt, now):
+    global _sent, _last_send_t
+    p, t = int(round(pan * 10)), int(round(tilt * 10))
+    if bus is not None:
+        bus.send(frame(CMD_SERVO, [p >> 8, p & 0xFF, t >> 8, t & 0xFF]))
+    _sent, _last_send_t = (p, t), now
+    actuators.update("servo", pan=round(pan, 1), tilt=round(tilt, 1))
 
-    pan_changed  = abs(pan  - last_pan)  >= ANGLE_THRESHOLD
-    tilt_changed = abs(tilt - last_tilt) >= ANGLE_THRESHOLD
+async def start_background_loop(send_func):
+    if bus is None:
+        _log.info("🦾 Servo SPI output off (ROV_SERVO_SPI is not 1); positions reported only")
+    loop = asyncio.get_running_loop()
+    period = 1.0 / OUTPUT_HZ
+    next_t = loop.time()
+    last = time.monotonic()
+    while True:
+        next_t += period
+        now = loop.time()
+        if next_t < now:
+            next_t = now + period   # fell behind: skip ticks instead of bursting
+        await asyncio.sleep(next_t - now)
 
-    if pan_changed or tilt_changed:
-        last_pan, last_tilt = pan, tilt
-        print(f"🕹️ [SERVO] Pan={last_pan}°, Tilt={last_tilt}°")
+        now = time.monotonic()
+        pan, tilt = AXES["pan"].step(now, now - last), AXES["tilt"].step(now, now - last)
+        last = now
+        if _sent != (int(round(pan * 10)), int(round(tilt * 10))) or now - _last_send_t >= KEEPALIVE:
+            _output(pan, tilt, now)
 
 # --- Actions ---
+CONTINUOUS = {"set_angle"}  # latest-wins on the server dispatch path
+
 ACTIONS = {
     "set_angle": set_angle,
+    "hold":      hold,
 }
@@ -1,26 +1,126 @@
-# Shared SPI bus for ALL rovside modules. Import get_bus() anywhere.
+# Shared SPI bus for ALL rovside modules. get_bus() is the MCU; other chips on the bus
+# (sensors on another chip select) get their own device via get_device().
 
-import os, time, atexit, threading
+import os, math, time, atexit, threading
+from modules import log, metrics
+
+_log = log.get("spi")
+_dummy_log = log.RateLimit(_log, 5.0)
+# TX/RX trace (ROV_SPI_DEBUG=1 or ROV_LOG=spi=DEBUG), at most SPI_TRACE_HZ lines/s each
+SPI_TRACE_HZ = 20
+_tx_log = log.RateLimit(_log, 1.0 / SPI_TRACE_HZ)
+_rx_log = log.RateLimit(_log, 1.0 / SPI_TRACE_HZ)
+
+# Read MCU replies from every transfer (see ReplyTracker); send() pads short frames to
+# REPLY_LEN so a whole reply fits. Only the virtual MCU speaks the reply format so far; the
+# STM32 firmware doesn't answer yet, so on hardware every reply would count as "missing" and
+# every frame would be padded for nothing. Hence off by default and on for
+# ROV_SPI_BACKEND=virtual; ROV_SPI_REPLIES=1 turns it on once the firmware replies.
+REPLIES = os.environ.get("ROV_SPI_REPLIES",
+                         "1" if os.environ.get("ROV_SPI_BACKEND") == "virtual" else "0") == "1"
+
+CS_SETUP = 0.000005   # manual CS asserted -> first clock (5 µs, so STM32 EXTI sees CS)
+CS_HOLD = 0.000002    # last clock -> manual CS released
+
+# time.sleep() of a few µs really lasts tens of µs on Linux; these show what the MCU sees
+_CS_SETUP_TIME = metrics.REGISTRY.histogram("rov_spi_cs_setup_seconds", "Actual manual-CS setup time (target CS_SETUP)",
+                                            bounds=metrics.FINE_BUCKETS)
+_CS_HOLD_TIME = metrics.REGISTRY.histogram("rov_spi_cs_hold_seconds", "Actual manual-CS hold time (target CS_HOLD)",
+                                           bounds=metrics.FINE_BUCKETS)
+
+# Who goes first when several devices want the same physical bus (lower = sooner)
+PRIORITY_ACTUATOR = 0
+PRIORITY_SENSOR = 10
+STARVE_AFTER = 0.02      # s; a waiter older than this goes next whatever its priority
+UTIL_TAU = 5.0           # s, time constant of the per-device utilization average
 
 class _DummySPI:
-    def xfer2(self, data):
-        print(f"⚠️ [ROV SPI:DUMMY] xfer2({data})")
+    def xfer2(self, data, *_):
+        _dummy_log.info("⚠️ DUMMY xfer2(%s)", data)
         return [0] * len(data)
     def close(self):
-        print("🔌 [ROV SPI:DUMMY] closed")
+        _log.info("🔌 DUMMY closed")
+
+class _Arbiter:
+    """
+    Serializes one physical bus. Uncontended acquire is a plain take; otherwise release()
+    hands the bus to the waiter with the lowest priority value (FIFO within a priority),
+    unless the longest waiter has waited STARVE_AFTER, which then goes first.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._owner = None
+        self._waiting = []   # [(priority, seq, t_enqueued)]
+        self._seq = 0
+
+    def acquire(self, priority):
+        with self._cond:
+            if self._owner is None and not self._waiting:
+                self._owner = 0
+                return
+            self._seq += 1
+            me = (priority, self._seq, time.monotonic())
+            self._waiting.append(me)
+            while self._owner != me[1]:
+                self._cond.wait()
+
+    def release(self):
+        with self._cond:
+            if not self._waiting:
+                self._owner = None
+                return
+            oldest = min(self._waiting, key=lambda w: w[1])
+            nxt = oldest if time.monotonic() - oldest[2] > STARVE_AFTER else min(self._waiting)
+            self._waiting.remove(nxt)
+            self._owner = nxt[1]
+            self._cond.notify_all()
+
+class _Handle:
+    """One opened /dev/spidevB.D, shared by every device on that CE line (manual-CS devices)."""
+    def __init__(self, spi, cfg):
+        self.spi = spi
+        self.cfg = cfg       # (max_hz, mode, bits) currently programmed
+        self.refs = 0
+
+_ARBITERS = {}   # bus number -> _Arbiter
+_HANDLES = {}    # (bus, dev, backend) -> _Handle
 
 class SPIBus:
-    def __init__(self, bus=None, dev=None, *, max_hz=500000, mode=0, bits=8, debug=True):
-        self.bus = int(os.environ.get("ROV_SPI_BUS", 0 if bus is None else bus))
-        self.dev = int(os.environ.get("ROV_SPI_DEV", 0 if dev is None else dev))
-        self.max_hz = max_hz
+    """
+    One device on a shared SPI bus: its own clock, mode, bits and chip select. Transfers of
+    all devices on the same bus number go through one _Arbiter. Get these via get_device()
+    (or get_bus() for the MCU) rather than constructing them.
+    """
+    def __init__(self, bus=None, dev=None, *, max_hz=500000, mode=0, bits=8, debug=False,
+                 name=None, priority=PRIORITY_ACTUATOR, manual_cs=None, replies=None):
+        self.name = name or DEFAULT_DEVICE
+        default = self.name == DEFAULT_DEVICE
+        # The ROV_SPI_* overrides apply to the MCU device only
+        env = (lambda k, v: os.environ.get(k, v)) if default else (lambda k, v: v)
+        self.bus = int(env("ROV_SPI_BUS", 0 if bus is None else bus))
+        self.dev = int(env("ROV_SPI_DEV", 0 if dev is None else dev))
+        # ROV_SPI_MAX_HZ overrides the MCU clock, e.g. to try faster rates while
+        # watching rov_spi_replies_total{result="corrupt"|"missing"}
+        self.max_hz = int(env("ROV_SPI_MAX_HZ", max_hz))
         self.mode = mode
         self.bits = bits
+        self.priority = priority
         self.debug = bool(int(os.environ.get("ROV_SPI_DEBUG", "0" if not debug else "1")))
-        self._lock = threading.Lock()
+        if self.debug:
+            _log.setLevel(log.DEBUG)
+        self._arbiter = _ARBITERS.setdefault(self.bus, _Arbiter())
+        self.replies = ReplyTracker() if (REPLIES if replies is None else replies) and default else None
+
+        labels = {"device": self.name}
+        self._xfer_time = metrics.REGISTRY.histogram("rov_spi_xfer_seconds", "SPIBus.xfer duration incl. bus wait and CS", **labels)
+        self._wait_time = metrics.REGISTRY.histogram("rov_spi_wait_seconds", "Time waiting for the bus behind other devices", **labels)
+        self._xfer_bytes = metrics.REGISTRY.counter("rov_spi_bytes_total", "Bytes clocked out on the SPI bus", **labels)
+        self._busy = metrics.REGISTRY.counter("rov_spi_busy_seconds_total", "Time this device held the bus", **labels)
+        self._util = 0.0
+        self._util_t = time.monotonic()
 
         # Optional manual CS (BCM pin). If set, we’ll toggle this instead of relying on CE0/CE1 wiring.
-        self._manual_cs_bcm = os.environ.get("ROV_SPI_MANUAL_CS")
+        self._manual_cs_bcm = env("ROV_SPI_MANUAL_CS", manual_cs)
         self._gpio = None
         if self._manual_cs_bcm is not None:
             try:
@@ -30,11 +130,35 @@ class SPIBus:
                 GPIO.setmode(GPIO.BCM)
                 GPIO.setwarnings(False)
                 GPIO.setup(self._manual_cs_bcm, GPIO.OUT, initial=GPIO.HIGH)  # idle high
-                print(f"🔧 [ROV SPI] Manual CS on BCM{self._manual_cs_bcm}")
+                _log.info("🔧 [%s] Manual CS on BCM%d", self.name, self._manual_cs_bcm)
             except Exception as e:
-                print(f"⚠️ [ROV SPI] Manual CS requested but GPIO init failed: {e}")
+                _log.warning("⚠️ [%s] Manual CS requested but GPIO init failed: %s", self.name, e)
                 self._manual_cs_bcm = None
 
+        self._handle = self._open()
+        self._handle.refs += 1
+        self._spi = self._handle.spi
+        if isinstance(self._spi, _DummySPI):
+            self.replies = None   # never answers
+
+    def _open(self):
+        # ROV_SPI_BACKEND=dummy forces the no-hardware path (soak tests, benches on a Pi);
+        # =virtual puts a software MCU (modules/virtual_mcu.py) behind the MCU device
+        backend = os.environ.get("ROV_SPI_BACKEND", "spidev")
+        if backend == "virtual" and self.name != DEFAULT_DEVICE:
+            backend = "dummy"
+        key = (self.bus, self.dev, backend)
+        if key in _HANDLES:
+            return _HANDLES[key]
+        cfg = (self.max_hz, self.mode, self.bits)
+        if backend == "dummy":
+            _log.info("🧪 [%s] Using dummy SPI (ROV_SPI_BACKEND=dummy)", self.name)
+            return _HANDLES.setdefault(key, _Handle(_DummySPI(), cfg))
+        if backend == "virtual":
+            from modules.virtual_mcu import VirtualMCU
+            _log.info("🧪 [%s] Using virtual MCU (ROV_SPI_BACKEND=virtual)", self.name)
+            return _HANDLES.setdefault(key, _Handle(VirtualMCU(), cfg))
+
         try:
             import spidev
             spi = spidev.SpiDev()
@@ -46,11 +170,20 @@ class SPIBus:
             spi.lsbfirst = False
             # Optional: spi.threewire = False
             time.sleep(0.01)
-            self._spi = spi
-            print(f"✅ [ROV SPI] open bus={self.bus} dev={self.dev} @ {self.max_hz/1000:.0f} kHz")
+            _log.info("✅ [%s] open bus=%d dev=%d @ %.0f kHz mode %d", self.name, self.bus, self.dev,
+                      self.max_hz / 1000, self.mode)
+            return _HANDLES.setdefault(key, _Handle(spi, cfg))
         except Exception as e:
-            print(f"⚠️ [ROV SPI] Falling back to dummy: {e}")
-            self._spi = _DummySPI()
+            _log.warning("⚠️ [%s] Falling back to dummy: %s", self.name, e)
+            return _Handle(_DummySPI(), cfg)
+
+    def _configure(self):
+        """Re-program a shared handle when the previous transfer was another device's."""
+        cfg = (self.max_hz, self.mode, self.bits)
+        if self._handle.cfg != cfg and not isinstance(self._spi, _DummySPI):
+            if hasattr(self._spi, "max_speed_hz"):
+                self._spi.max_speed_hz, self._spi.mode, self._spi.bits_per_word = cfg
+            self._handle.cfg = cfg
 
     def _cs_low(self):
         if self._gpio and self._manual_cs_bcm is not None:
@@ -63,34 +196,61 @@ class SPIBus:
     def xfer(self, bytes_list):
         """Full-duplex transfer; returns list of bytes read."""
         payload = [int(b) & 0xFF for b in bytes_list]
-        with self._lock:
-            if self.debug:
-                print(f"📤 [ROV SPI] TX {payload}")
+        t0 = time.perf_counter()
+        self._arbiter.acquire(self.priority)
+        t_held = time.perf_counter()
+        try:
+            self._configure()
+            _tx_log.debug("📤 [%s] TX %s", self.name, payload)
             # If manual CS is used, assert it just before the transfer
             if self._manual_cs_bcm is not None:
                 self._cs_low()
                 # tiny setup delay so STM32 EXTI sees CS before first clock
-                time.sleep(0.000005)  # 5 µs
+                t_cs = time.perf_counter()
+                time.sleep(CS_SETUP)
+                _CS_SETUP_TIME.observe(time.perf_counter() - t_cs)
             try:
                 rx = self._spi.xfer2(payload)
             finally:
                 if self._manual_cs_bcm is not None:
                     # tiny hold time then deassert
-                    time.sleep(0.000002)  # 2 µs
+                    t_cs = time.perf_counter()
+                    time.sleep(CS_HOLD)
                     self._cs_high()
-            if self.debug:
-                print(f"📥 [ROV SPI] RX {rx}")
-            return rx
+                    _CS_HOLD_TIME.observe(time.perf_counter() - t_cs)
+            _rx_log.debug("📥 [%s] RX %s", self.name, rx)
+            if self.replies is not None:
+                self.replies.on_transfer(payload, rx, time.monotonic())
+        finally:
+            t1 = time.perf_counter()
+            self._arbiter.release()
+        self._wait_time.observe(t_held - t0)
+        self._xfer_time.observe(t1 - t0)
+        self._xfer_bytes.inc(len(payload))
+        self._busy.inc(t1 - t_held)
+        self._util = self.utilization() + (t1 - t_held) / UTIL_TAU
+        return rx
 
     def send(self, bytes_list):
-        """Write-only convenience (still clocks out via xfer)."""
+        """Write a frame; the RX side only feeds the reply tracker."""
+        if self.replies is not None and len(bytes_list) < REPLY_LEN:
+            bytes_list = list(bytes_list) + [0] * (REPLY_LEN - len(bytes_list))
         self.xfer(bytes_list)
 
+    def utilization(self):
+        """Share of wall time this device held the bus, averaged over ~UTIL_TAU seconds."""
+        now = time.monotonic()
+        self._util *= math.exp(-(now - self._util_t) / UTIL_TAU)
+        self._util_t = now
+        return self._util
+
     def close(self):
-        try:
-            self._spi.close()
-        except Exception:
-            pass
+        self._handle.refs -= 1
+        if self._handle.refs <= 0:
+            try:
+                self._spi.close()
+            except Exception:
+                pass
         try:
             if self._gpio and self._manual_cs_bcm is not None:
                 self._cs_high()
@@ -98,11 +258,152 @@ class SPIBus:
         except Exception:
             pass
 
-# -------- Singleton access --------
-_BUS = None
+# -------- MCU framing: [SYNC][LEN][CMD][payload...][CRC8] --------
+# LEN counts CMD..CRC (excludes SYNC and itself); CRC8 (poly 0x07, init 0) covers SYNC..payload.
+SYNC = 0xAA
+
+def _crc8_table(poly=0x07):
+    table = []
+    for i in range(256):
+        c = i
+        for _ in range(8):
+            c = ((c << 1) ^ poly) & 0xFF if (c & 0x80) else (c << 1) & 0xFF
+        table.append(c)
+    return bytes(table)
+
+_CRC8 = _crc8_table()
+
+def crc8(data, init=0x00):
+    c = init
+    for b in data:
+        c = _CRC8[c ^ b]
+    return c
+
+def frame(cmd, payload):
+    body = [SYNC, len(payload) + 2, cmd] + [int(x) & 0xFF for x in payload]
+    return body + [crc8(body)]
+
+def _scan(buf):
+    """(start, end) of each SYNC..CRC span whose LEN fits in buf; 0x00 padding is skipped."""
+    i, n = 0, len(buf)
+    while i < n - 1:
+        if buf[i] == SYNC and 2 <= buf[i + 1] <= MAX_LEN and i + 2 + buf[i + 1] <= n:
+            end = i + 2 + buf[i + 1]
+            yield i, end
+            i = end
+        else:
+            i += 1
+
+# -------- MCU replies --------
+# The reply to frame N is shifted out during transfer N+1 (modules/virtual_mcu.py does the same):
+#   [SYNC][LEN][CMD|0x80][status][ack_crc][V mV u16][I mA u16][T 0.1°C i16][CRC8]
+# ack_crc is the CRC byte of the frame answered, which is how replies are matched to TX.
+REPLY_LEN = 12
+MAX_LEN = 18
+STATUS_OK, STATUS_CRC, STATUS_LEN, STATUS_CMD = 0, 1, 2, 3
+FLAG_WATCHDOG = 0x80
+
+_REPLIES = {r: metrics.REGISTRY.counter("rov_spi_replies_total", "MCU replies by result", result=r)
+            for r in ("ok", "nack", "corrupt", "missing", "unmatched")}
+_WATCHDOG_SEEN = metrics.REGISTRY.counter("rov_mcu_watchdog_replies_total", "Replies flagged with the MCU watchdog tripped")
+_REPLY_LATENCY = metrics.REGISTRY.histogram("rov_spi_reply_latency_seconds",
+                                            "Frame sent -> its reply clocked in (i.e. until the next transfer)")
+_reply_log = log.RateLimit(_log, 2.0)
+
+class ReplyTracker:
+    """
+    Per transfer: decode the replies in RX, match them by (cmd, ack_crc) against the frames
+    of the previous transfer, then remember this transfer's frames for the next one.
+    - ok / nack:  matched, MCU status OK / not OK (nack = the MCU saw a bad frame)
+    - corrupt:    a reply-looking span in RX failed its CRC (bus corruption, MCU -> Pi)
+    - missing:    a frame of the previous transfer got no reply (and no corrupt one stood in)
+    - unmatched:  valid reply that answers nothing outstanding
+    """
+    def __init__(self):
+        self.outstanding = []   # [(cmd, crc, t_sent)] from the previous transfer
+        self.counts = {r: 0 for r in _REPLIES}
+        self.last = None        # newest MCU telemetry: {"mv":..,"ma":..,"temp_c":..,"watchdog":..}
+
+    def on_transfer(self, tx, rx, now):
+        corrupt = 0
+        pending = self.outstanding
+        for start, end in _scan(rx):
+            body, crc = rx[start:end - 1], rx[end - 1]
+            if crc8(body) != crc or len(body) != REPLY_LEN - 1 or not body[2] & 0x80:
+                corrupt += 1
+                continue
+            cmd, status, ack = body[2] & 0x7F, body[3], body[4]
+            # a nack may echo a CMD byte that was corrupted on the way in: match on ack_crc alone
+            nack = status & ~FLAG_WATCHDOG
+            hit = next((k for k, (c, fc, _) in enumerate(pending) if fc == ack and (c == cmd or nack)), None)
+            if hit is None:
+                self._count("unmatched")
+                continue
+            _REPLY_LATENCY.observe(now - pending[hit][2])
+            pending = pending[:hit] + pending[hit + 1:]
+            watchdog = bool(status & FLAG_WATCHDOG)
+            if watchdog:
+                _WATCHDOG_SEEN.inc()
+            if nack:
+                self._count("nack")
+                _reply_log.warning("⚠️ MCU nack cmd=0x%02X status=%d", cmd, nack)
+            else:
+                self._count("ok")
+            temp = (body[9] << 8) | body[10]
+            self.last = {"mv": (body[5] << 8) | body[6], "ma": (body[7] << 8) | body[8],
+                         "temp_c": (temp - 0x10000 if temp & 0x8000 else temp) / 10.0, "watchdog": watchdog}
+        for _ in range(corrupt):
+            self._count("corrupt")
+        for _ in range(max(0, len(pending) - corrupt)):
+            self._count("missing")
+        if corrupt:
+            _reply_log.warning("⚠️ %d corrupt MCU repl%s", corrupt, "y" if corrupt == 1 else "ies")
+        self.outstanding = [(tx[s + 2], tx[e - 1], now) for s, e in _scan(tx)]
+
+    def _count(self, result):
+        self.counts[result] += 1
+        _REPLIES[result].inc()
+
+    def error_rate(self):
+        total = sum(self.counts.values())
+        return (self.counts["corrupt"] + self.counts["missing"]) / total if total else 0.0
+
+def _mcu(key):
+    def read():
+        dev = _DEVICES.get(DEFAULT_DEVICE)
+        return (dev.replies.last or {}).get(key) if dev is not None and dev.replies else None
+    return read
+
+metrics.REGISTRY.callback("rov_mcu_supply_millivolts", "MCU-reported supply voltage", _mcu("mv"))
+metrics.REGISTRY.callback("rov_mcu_current_milliamps", "MCU-reported current", _mcu("ma"))
+metrics.REGISTRY.callback("rov_mcu_temperature_celsius", "MCU-reported temperature", _mcu("temp_c"))
+metrics.REGISTRY.callback("rov_spi_utilization", "Share of time each device held the bus (~5 s average)",
+                          lambda: [({"device": n}, round(d.utilization(), 4)) for n, d in list(_DEVICES.items())])
+
+# -------- Device registry --------
+#   bus = get_bus(max_hz=1_000_000)                   # the MCU (CE0), actuator priority
+#   imu = get_device("imu", dev=1, max_hz=4_000_000, mode=3, priority=PRIORITY_SENSOR)
+DEFAULT_DEVICE = "mcu"
+_DEVICES = {}    # name -> SPIBus
+_REQUESTED = {}  # name -> kwargs it was created with
+
+def get_device(name, **kwargs) -> SPIBus:
+    """Get or create a named device; asking again with different settings is an error."""
+    dev = _DEVICES.get(name)
+    if dev is None:
+        dev = _DEVICES[name] = SPIBus(name=name, **kwargs)
+        _REQUESTED[name] = dict(kwargs)
+        atexit.register(dev.close)
+        return dev
+    conflict = {k: v for k, v in kwargs.items() if _REQUESTED[name].get(k, v) != v}
+    if conflict:
+        raise ValueError(f"SPI device {name!r} already open with {_REQUESTED[name]}, asked for {conflict}")
+    return dev
+
 def get_bus(**kwargs) -> SPIBus:
-    global _BUS
-    if _BUS is None:
-        _BUS = SPIBus(**kwargs)
-        atexit.register(_BUS.close)
-    return _BUS
+    """The MCU device, as before. Differing settings from a later caller are logged, not applied."""
+    try:
+        return get_device(DEFAULT_DEVICE, **kwargs)
+    except ValueError as e:
+        _log.warning("⚠️ %s; keeping the first settings", e)
+        return _DEVICES[DEFAULT_DEVICE]
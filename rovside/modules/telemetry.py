@@ -1,33 +1,61 @@
 # modules/telemetry.py
+# Simulated sensors, sampled at SAMPLE_HZ onto the event bus as a TelemetrySample
+# ("telemetry.sample", for onboard control) and sent to clients as JSON every
+# BROADCAST_INTERVAL seconds.
 
 import asyncio
 import json
+import time
+from dataclasses import dataclass
+from typing import Tuple
+
+from modules.event_bus import BUS
 
 TYPE = "telemetry"
 ACTIONS = {
     "request_status": lambda data: None  # Optional placeholder
 }
 
+@dataclass(frozen=True)
+class TelemetrySample:
+    ts: float                   # monotonic, when sampled
+    battery: float
+    temp: float
+    depth: float
+    orientation: Tuple[float, float, float]
+
+PRODUCES = {"telemetry.sample": TelemetrySample}
+
+SAMPLE_HZ = 50
+BROADCAST_INTERVAL = 1.0
+
 battery = 100.0
 temp = 35.0
 depth = 0.0
 orientation = [0.0, 0.0, 0.0]
 
 async def start_background_loop(send_func):
+    dt = 1.0 / SAMPLE_HZ
+    next_broadcast = 0.0
     while True:
         global battery, temp, depth, orientation
-        battery = max(0, battery - 0.05)
-        temp += 0.01
-        depth += 0.02
-        orientation = [(o + 0.01) % 1 for o in orientation]
-
-        message = {
-            "type": TYPE,
-            "battery": round(battery, 1),
-            "temp": round(temp, 1),
-            "depth": round(depth, 2),
-            "orientation": [round(o, 2) for o in orientation]
-        }
-
-        await send_func(json.dumps(message))
-        await asyncio.sleep(1)
+        battery = max(0, battery - 0.05 * dt)
+        temp += 0.01 * dt
+        depth += 0.02 * dt
+        orientation = [(o + 0.01 * dt) % 1 for o in orientation]
+
+        now = time.monotonic()
+        BUS.publish("telemetry.sample", TelemetrySample(now, battery, temp, depth, tuple(orientation)))
+
+        if now >= next_broadcast:
+            next_broadcast = now + BROADCAST_INTERVAL
+            message = {
+                "type": TYPE,
+                "battery": round(battery, 1),
+                "temp": round(temp, 1),
+                "depth": round(depth, 2),
+                "orientation": [round(o, 2) for o in orientation]
+            }
+            await send_func(json.dumps(message), TYPE)
+
+        await asyncio.sleep(dt)
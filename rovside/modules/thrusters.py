@@ -0,0 +1,159 @@
+# modules/thrusters.py
+# Thrust allocation for a vectored multi-thruster frame. A 6-DOF command
+#   {"type":"thrusters","action":"set","surge":..,"sway":..,"heave":..,"roll":..,"pitch":..,"yaw":..}
+# (-100..100 % each, missing axes keep their last value) is mixed into per-thruster
+# outputs with a pseudo-inverse of the allocation matrix computed once at import, and
+# all thrusters go out in ONE frame per tick:
+#   [SYNC][LEN][CMD_THRUSTERS][t0..tN-1][CRC8]   t = 0..200, 100 = stop (like motor.py)
+# If a command asks more than a thruster can give, all outputs are scaled down together,
+# so the direction of the requested force/torque is kept and only its size shrinks.
+# The onboard assist ("control.assist", modules/hold.py) adds heave and yaw. When enabled this
+# module, not motor.py, publishes pilot.command; when off, set/stop do nothing at all.
+#
+# Off unless ROV_THRUSTERS=1: the two-motor frame's MCU does not know CMD_THRUSTERS.
+# Mixing + packing cost: rovside/testing/bench_thrusters.py.
+
+import asyncio, os, time
+import numpy as np
+
+from modules import actuators, log, metrics
+from modules.event_bus import BUS
+from modules.motor import PilotCommand
+from modules.spi_bus import frame, get_bus
+
+TYPE = "thrusters"
+
+ENABLED = os.environ.get("ROV_THRUSTERS", "0") == "1"
+CMD_THRUSTERS = 0x03
+TICK_HZ = 50
+FORCE_SEND_AFTER = 0.3   # resend unchanged outputs (MCU watchdog)
+
+DOF = ("surge", "sway", "heave", "roll", "pitch", "yaw")
+
+# name, position (x fwd, y starboard, z down) in m, thrust direction for a positive output.
+# Four horizontal at 45° in the corners, two vertical on the sides; with only two vertical
+# thrusters pitch is not controllable and its column of MIX stays zero.
+THRUSTERS = [
+    ("front_right", ( 0.156,  0.111, 0.0), (0.707, -0.707, 0.0)),
+    ("front_left",  ( 0.156, -0.111, 0.0), (0.707,  0.707, 0.0)),
+    ("rear_right",  (-0.156,  0.111, 0.0), (0.707,  0.707, 0.0)),
+    ("rear_left",   (-0.156, -0.111, 0.0), (0.707, -0.707, 0.0)),
+    ("vert_right",  ( 0.0,    0.218, 0.0), (0.0,    0.0,   1.0)),
+    ("vert_left",   ( 0.0,   -0.218, 0.0), (0.0,    0.0,   1.0)),
+]
+
+_log = log.get("thrusters")
+_values_log = log.RateLimit(_log, 0.5)
+_off_log = log.RateLimit(_log, 10.0)
+_MIX_TIME = metrics.REGISTRY.histogram("rov_thruster_mix_seconds", "Thrust allocation + frame packing per tick",
+                                       bounds=metrics.FINE_BUCKETS)
+_SATURATED = metrics.REGISTRY.counter("rov_thruster_saturated_total", "Ticks where outputs were scaled down")
+
+def allocation(thrusters):
+    """6 x N: column i is the force and torque (r x F) of thruster i at unit thrust."""
+    pos = np.array([t[1] for t in thrusters], dtype=float)
+    dirs = np.array([t[2] for t in thrusters], dtype=float)
+    dirs /= np.linalg.norm(dirs, axis=1, keepdims=True)
+    return np.vstack([dirs.T, np.cross(pos, dirs).T])
+
+def mixer(thrusters):
+    """
+    N x 6 pseudo-inverse, columns scaled so that a full (1.0) command on one axis alone
+    drives the busiest thruster to exactly 1.0. Axes the layout can't produce stay 0.
+    """
+    pinv = np.linalg.pinv(allocation(thrusters))
+    peak = np.abs(pinv).max(axis=0)
+    scale = np.divide(1.0, peak, out=np.zeros_like(peak), where=peak > 1e-9)
+    return pinv * scale
+
+MIX = mixer(THRUSTERS)
+UNCONTROLLED = [d for d, col in zip(DOF, MIX.T) if not col.any()]
+
+def mix(cmd):
+    """cmd: 6 floats in -1..1 -> N outputs in -1..1, scaled down together on saturation."""
+    out = MIX @ cmd
+    peak = np.abs(out).max()
+    if peak > 1.0:
+        out /= peak
+        _SATURATED.inc()
+    return out
+
+def pack(out):
+    return frame(CMD_THRUSTERS, (np.rint(out * 100.0) + 100.0).astype(np.uint8).tolist())
+
+bus = get_bus(max_hz=1_000_000, mode=0, bits=8) if ENABLED else None
+
+_cmd = np.zeros(len(DOF))      # pilot, -1..1
+_assist = np.zeros(len(DOF))   # onboard controller, -1..1
+_sent = None
+_last_send_t = 0.0
+
+def _pct(v):
+    try:
+        return max(-1.0, min(1.0, float(v) / 100.0))
+    except (TypeError, ValueError):
+        return None
+
+def _off(action):
+    # Off on the two-motor frame: no output, and nothing on pilot.command (that's motor.py's)
+    _off_log.warning("⚠️ thrusters.%s ignored: ROV_THRUSTERS is not 1", action)
+
+def set(data):
+    """Expects any of surge/sway/heave/roll/pitch/yaw in -100..100; applied on the next tick."""
+    if not ENABLED:
+        return _off("set")
+    for i, name in enumerate(DOF):
+        if name in data:
+            v = _pct(data[name])
+            if v is not None:
+                _cmd[i] = v
+    # surge / yaw in % are the vectored frame's throttle / turn (hold's pilot deadband)
+    BUS.publish("pilot.command", PilotCommand(time.monotonic(), round(_cmd[0] * 100), round(_cmd[5] * 100)))
+
+def _on_assist(sample):
+    _assist[2] = sample.heave / 100.0
+    _assist[5] = sample.yaw / 100.0
+
+CONSUMES = {"control.assist": _on_assist} if ENABLED else {}
+
+def _send(out, pkt, now):
+    global _sent, _last_send_t
+    bus.send(pkt)
+    _sent, _last_send_t = out, now
+    pct = [round(float(x) * 100) for x in out]
+    actuators.update("thrusters", **dict(zip((t[0] for t in THRUSTERS), pct)))
+    _values_log.debug("🌀 %s", pct)
+
+def stop(_data=None):
+    if not ENABLED:
+        return _off("stop")
+    _cmd[:] = 0.0
+    _assist[:] = 0.0
+    BUS.publish("pilot.command", PilotCommand(time.monotonic(), 0, 0, stop=True))
+    out = np.zeros(len(THRUSTERS))
+    _send(out, pack(out), time.monotonic())
+    _log.info("🛑 stop")
+
+async def start_background_loop(send_func):
+    if not ENABLED:
+        return
+    _log.info("🌀 %d thrusters at %d Hz%s", len(THRUSTERS), TICK_HZ,
+              f"; not controllable: {', '.join(UNCONTROLLED)}" if UNCONTROLLED else "")
+    period = 1.0 / TICK_HZ
+    while True:
+        await asyncio.sleep(period)
+        t0 = time.perf_counter()
+        out = mix(np.clip(_cmd + _assist, -1.0, 1.0))
+        now = time.monotonic()
+        if _sent is None or not np.array_equal(out, _sent) or now - _last_send_t >= FORCE_SEND_AFTER:
+            pkt = pack(out)
+            _MIX_TIME.observe(time.perf_counter() - t0)
+            _send(out, pkt, now)
+
+# Setpoint actions: the server keeps only the newest pending one (latest wins)
+CONTINUOUS = {"set"}
+
+ACTIONS = {
+    "set":  set,
+    "stop": stop,
+}
@@ -0,0 +1,218 @@
+# modules/virtual_mcu.py
+# Software stand-in for the STM32, used by spi_bus when ROV_SPI_BACKEND=virtual. Speaks the
+# same framing as the real MCU, so the whole rovside stack can be tested without hardware.
+#
+# MCU -> Pi: like any SPI slave it can only answer while the master clocks, so the reply to
+# frame N is shifted out during transfer N+1 (idle 0x00 when there is none):
+#   [SYNC][LEN][CMD|0x80][status][ack_crc][v_hi][v_lo][i_hi][i_lo][t_hi][t_lo][CRC8]
+#   status:  STATUS_* code, | FLAG_WATCHDOG while outputs are forced neutral
+#   ack_crc: CRC byte of the frame answered (matches the reply to what was sent)
+#   payload: bus voltage mV, current mA (u16), MCU temperature 0.1 °C (i16), big-endian
+# Bytes a transfer is too short for are lost; the master pads with 0x00 to read a full reply.
+#
+# Watchdog: no valid actuator frame for WATCHDOG_TIMEOUT -> motors/thrusters neutral.
+# Faults (ROV_MCU_FAULTS="bit_flip=0.001,drop=0.01,slow=0.02" or the "faults" action):
+#   bit_flip  probability per byte, both directions, of one flipped bit
+#   drop      probability a frame is not seen at all (no reply)
+#   slow      probability the reply isn't ready for the next transfer (comes out as idle)
+#
+#   {"type":"mcu","action":"faults","bit_flip":0.001,"drop":0.01}
+#   {"type":"mcu","action":"status"}
+
+import json, os, random, threading, time
+from modules import log
+from modules.spi_bus import (FLAG_WATCHDOG, MAX_LEN, REPLY_LEN, STATUS_CMD, STATUS_CRC,
+                             STATUS_LEN, STATUS_OK, SYNC, crc8)
+
+TYPE = "mcu"
+
+WATCHDOG_TIMEOUT = 0.5
+SUPPLY_MV = 12600          # battery at rest
+SUPPLY_R = 0.08            # ohm; voltage sag under load
+IDLE_MA = 180
+MOTOR_MA = 9000            # per motor/thruster at 100 %
+AMBIENT_DC = 250           # 0.1 °C
+
+# cmd -> payload length (None = any 1..MAX_LEN-2)
+COMMANDS = {0x01: 2, 0x02: 2, 0x03: None, 0x04: 4}
+ACTUATOR_CMDS = {0x01, 0x02, 0x03}
+
+_log = log.get("mcu")
+_fault_log = log.RateLimit(_log, 2.0)
+
+INSTANCE = None   # the VirtualMCU spi_bus created, for the actions below
+
+def _maybe_float(v, fallback):
+    try:
+        return float(v)
+    except Exception:
+        return fallback
+
+def _parse_faults(spec):
+    out = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        k, _, v = part.partition("=")
+        prob = _maybe_float(v, None)
+        if prob is None:
+            _log.warning("⚠️ ROV_MCU_FAULTS: ignoring %r", part)
+            continue
+        out[k.strip()] = prob
+    return out
+
+class VirtualMCU:
+    """spidev-compatible: xfer2(list) -> list of the same length, close()."""
+    def __init__(self, faults=None, seed=None, clock=time.monotonic):
+        global INSTANCE
+        self.faults = {"bit_flip": 0.0, "drop": 0.0, "slow": 0.0}
+        self.faults.update(faults if faults is not None else _parse_faults(os.environ.get("ROV_MCU_FAULTS", "")))
+        self.rng = random.Random(seed if seed is not None else os.environ.get("ROV_MCU_SEED"))
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._reply = []
+        self.outputs = {"motor": [0, 0], "thrusters": [], "servo": [900, 900]}
+        self.last_actuator_t = None
+        self.watchdog = False
+        self.temp_dc = float(AMBIENT_DC)
+        self.stats = {"frames": 0, "crc_errors": 0, "bad_len": 0, "unknown_cmd": 0,
+                      "dropped": 0, "slow": 0, "watchdog_trips": 0, "bit_flips": 0}
+        INSTANCE = self
+
+    # --- SPI side ---
+    def xfer2(self, data):
+        with self._lock:
+            now = self.clock()
+            self._check_watchdog(now)
+            out = self._reply[:len(data)]
+            out += [0] * (len(data) - len(out))
+            self._reply = []
+            rx = self._flip(list(data))
+            for fr in self._frames(rx):
+                self._handle(fr, now)
+            return self._flip(out)
+
+    def close(self):
+        _log.info("🔌 virtual MCU closed %s", self.stats)
+
+    def _flip(self, buf):
+        p = self.faults["bit_flip"]
+        if p:
+            for i in range(len(buf)):
+                if self.rng.random() < p:
+                    buf[i] ^= 1 << self.rng.randrange(8)
+                    self.stats["bit_flips"] += 1
+        return buf
+
+    def _frames(self, rx):
+        """Yield (cmd, payload, crc_ok, crc) for each frame; 0x00 idle/padding is skipped."""
+        i = 0
+        while i < len(rx):
+            if rx[i] != SYNC:
+                i += 1
+                continue
+            if i + 1 >= len(rx):
+                return
+            length = rx[i + 1]
+            end = i + 2 + length          # exclusive
+            if length < 2 or length > MAX_LEN or end > len(rx):
+                self.stats["bad_len"] += 1
+                self._queue(0, STATUS_LEN, 0)
+                i += 1
+                continue
+            body, crc = rx[i:end - 1], rx[end - 1]
+            yield body[2], body[3:], crc8(body) == crc, crc
+            i = end
+
+    def _handle(self, fr, now):
+        cmd, payload, crc_ok, crc = fr
+        if self.rng.random() < self.faults["drop"]:
+            self.stats["dropped"] += 1
+            _fault_log.info("💧 dropped frame cmd=0x%02X", cmd)
+            return
+        if not crc_ok:
+            self.stats["crc_errors"] += 1
+            self._queue(cmd, STATUS_CRC, crc)
+            return
+        want = COMMANDS.get(cmd, -1)
+        if want == -1:
+            self.stats["unknown_cmd"] += 1
+            self._queue(cmd, STATUS_CMD, crc)
+            return
+        if (want is None and not payload) or (want is not None and len(payload) != want):
+            self.stats["bad_len"] += 1
+            self._queue(cmd, STATUS_LEN, crc)
+            return
+        self.stats["frames"] += 1
+        if cmd == 0x01:
+            self.outputs["motor"] = [payload[0] - 100, payload[1] - 100]
+        elif cmd == 0x02:
+            self.outputs["motor"] = [0, 0]
+            self.outputs["thrusters"] = [0] * len(self.outputs["thrusters"])
+        elif cmd == 0x03:
+            self.outputs["thrusters"] = [b - 100 for b in payload]
+        elif cmd == 0x04:
+            self.outputs["servo"] = [(payload[0] << 8) | payload[1], (payload[2] << 8) | payload[3]]
+        if cmd in ACTUATOR_CMDS:
+            self.last_actuator_t = now
+            if self.watchdog:
+                self.watchdog = False
+                _log.info("✅ watchdog cleared")
+        self._queue(cmd, STATUS_OK, crc)
+
+    def _check_watchdog(self, now):
+        if (not self.watchdog and self.last_actuator_t is not None
+                and now - self.last_actuator_t > WATCHDOG_TIMEOUT):
+            self.watchdog = True
+            self.stats["watchdog_trips"] += 1
+            self.outputs["motor"] = [0, 0]
+            self.outputs["thrusters"] = [0] * len(self.outputs["thrusters"])
+            _log.warning("⏱️ watchdog: no actuator frame for %.1fs, outputs neutral", WATCHDOG_TIMEOUT)
+
+    # --- Telemetry model ---
+    def _telemetry(self):
+        load = sum(abs(v) for v in self.outputs["motor"] + self.outputs["thrusters"]) / 100.0
+        current = IDLE_MA + load * MOTOR_MA + self.rng.gauss(0, 15)
+        volts = SUPPLY_MV - SUPPLY_R * current + self.rng.gauss(0, 10)
+        self.temp_dc += 0.001 * (AMBIENT_DC + current / 100.0 - self.temp_dc)   # slow drift with load
+        return (max(0, min(0xFFFF, int(volts))), max(0, min(0xFFFF, int(current))),
+                int(self.temp_dc) & 0xFFFF)
+
+    def _queue(self, cmd, status, ack_crc):
+        if self.rng.random() < self.faults["slow"]:
+            self.stats["slow"] += 1
+            return   # not ready when the master clocks next: shifted out as idle
+        v, i, t = self._telemetry()
+        body = [SYNC, REPLY_LEN - 2, (cmd | 0x80) & 0xFF,
+                status | (FLAG_WATCHDOG if self.watchdog else 0), ack_crc & 0xFF,
+                v >> 8, v & 0xFF, i >> 8, i & 0xFF, t >> 8, t & 0xFF]
+        self._reply += body + [crc8(body)]
+
+    def snapshot(self):
+        with self._lock:
+            self._check_watchdog(self.clock())   # trips even if the Pi stopped transferring
+            return {"faults": dict(self.faults), "stats": dict(self.stats), "watchdog": self.watchdog,
+                    "outputs": {k: list(v) for k, v in self.outputs.items()}}
+
+# ---------------- Module actions ----------------
+
+def faults(data):
+    if INSTANCE is None:
+        _log.warning("⚠️ no virtual MCU (ROV_SPI_BACKEND=virtual)")
+        return
+    for k in INSTANCE.faults:
+        if k in data:
+            v = _maybe_float(data[k], None)
+            if v is None:
+                _log.warning("⚠️ faults: '%s' needs a probability 0..1, got %r", k, data[k])
+                continue
+            INSTANCE.faults[k] = max(0.0, min(1.0, v))
+    _log.info("🧪 faults %s", INSTANCE.faults)
+
+async def status(_data=None, websocket=None):
+    if websocket is not None:
+        await websocket.send(json.dumps({"type": TYPE, "event": "status",
+                                         **(INSTANCE.snapshot() if INSTANCE else {"active": False})}))
+
+ACTIONS = {
+    "faults": faults,
+    "status": status,
+}
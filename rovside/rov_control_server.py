@@ -44,22 +44,370 @@ import websockets
 import json
 import importlib
 import os
+import re
+import time
 import traceback
+import types
+from collections import deque
+from modules import event_bus, log, metrics
+
+_log = log.get("server")
+# Per-message problems (bad JSON, unknown type, ...) are rate limited, one limiter each
+_unknown_log = log.RateLimit(_log, 1.0)
+_error_log = log.RateLimit(_log, 1.0)
+_input_log = log.RateLimit(_log, 1.0)
 
 # Store loaded modules and dispatchers
 DISPATCH_TABLE = {}
 CLIENTS = set()  # Active WebSocket clients
 
+# Per-stream stats are keyed by (type, action) only for registered actions; anything a
+# client makes up is counted under UNKNOWN_KEY, so the stats can't grow without bound.
+UNKNOWN_KEY = ("unknown", "*")
+
+def stat_key(data):
+    try:
+        module = DISPATCH_TABLE.get(data.get("type"))
+        if module is not None and data.get("action") in getattr(module, "ACTIONS", {}):
+            return (data.get("type"), data.get("action"))
+    except TypeError:   # unhashable type/action
+        pass
+    return UNKNOWN_KEY
+
+# --- Incoming command mailboxes ---
+# Continuous setpoints (actions listed in a module's CONTINUOUS set) keep only the
+# newest message per (type, action); everything else is a one-shot and queues in order.
+class _Entry:
+    __slots__ = ("key", "data", "websocket", "t_rx", "alive")
+    def __init__(self, key, data, websocket, t_rx):
+        self.key, self.data, self.websocket, self.t_rx = key, data, websocket, t_rx
+        self.alive = True
+
+class Mailboxes:
+    def __init__(self):
+        self._queue = deque()   # arrival order of live + superseded entries
+        self._slots = {}        # (type, action) -> pending continuous _Entry
+        self._wake = asyncio.Event()
+        self.stats = {}         # (type, action) -> counters, see _stat()
+
+    def _stat(self, key):
+        st = self.stats.get(key)
+        if st is None:
+            st = self.stats[key] = {"received": 0, "executed": 0, "stale_dropped": 0,
+                                    "age_last": 0.0, "age_max": 0.0, "age_sum": 0.0}
+        return st
+
+    def put(self, data, websocket, continuous=False):
+        key = stat_key(data)
+        entry = _Entry(key, data, websocket, time.monotonic())
+        st = self._stat(key)
+        st["received"] += 1
+        if continuous:
+            old = self._slots.get(key)
+            if old is not None:
+                # Superseded before it ran; it moves to the back so it still runs after
+                # any one-shot that arrived in between.
+                old.alive = False
+                st["stale_dropped"] += 1
+            self._slots[key] = entry
+        self._queue.append(entry)
+        self._wake.set()
+
+    async def get(self):
+        while True:
+            while self._queue:
+                entry = self._queue.popleft()
+                if not entry.alive:
+                    continue
+                if self._slots.get(entry.key) is entry:
+                    del self._slots[entry.key]
+                return entry
+            self._wake.clear()
+            await self._wake.wait()
+
+    def executed(self, entry):
+        """Record the queue age (receive -> start of execution) of a dispatched entry."""
+        age = time.monotonic() - entry.t_rx
+        st = self._stat(entry.key)
+        st["executed"] += 1
+        st["age_last"] = age
+        st["age_sum"] += age
+        if age > st["age_max"]:
+            st["age_max"] = age
+        return age
+
+    def snapshot(self):
+        out = {}
+        for (mtype, action), st in self.stats.items():
+            row = dict(st)
+            row["age_avg"] = st["age_sum"] / st["executed"] if st["executed"] else 0.0
+            del row["age_sum"]
+            out[f"{mtype}.{action}"] = row
+        return {"pending": self.pending(), "streams": out}
+
+    def pending(self):
+        return sum(1 for e in self._queue if e.alive)
+
+MAILBOX = None  # created in main() once the event loop is running
+
+# --- Command freshness ---
+# Commands stamped with "src"/"seq"/"ts" (see topside outbound_scheduler) are refused
+# when their seq is not newer than the last one executed on the same stream, or when a
+# continuous setpoint is older than MAX_COMMAND_AGE seconds at execution time.
+MAX_COMMAND_AGE = float(os.environ.get("ROV_MAX_CMD_AGE", "0.5"))
+
+class Freshness:
+    def __init__(self, max_age=MAX_COMMAND_AGE):
+        self.max_age = max_age
+        self._last_seq = {}    # (src, type, action) -> last executed seq
+        self._base = {}        # src -> smallest (t_rx - ts) seen, i.e. best-case link delay
+        self.stats = {}        # (type, action) -> counters
+
+    def _stat(self, key):
+        st = self.stats.get(key)
+        if st is None:
+            st = self.stats[key] = {"accepted": 0, "out_of_order": 0, "too_old": 0,
+                                    "age_last": 0.0, "age_max": 0.0}
+        return st
+
+    def observe(self, data, t_rx):
+        """Called on receipt, so every stamped message (even superseded ones) tunes the baseline."""
+        try:
+            delay = t_rx - float(data["ts"])
+        except (KeyError, TypeError, ValueError):
+            return
+        src = data.get("src")
+        base = self._base.get(src)
+        if base is None or delay < base:
+            self._base[src] = delay
+
+    def age(self, data, t_rx, now):
+        """
+        Age of a stamped command. With a clock sync from the relay (modules/clock.py)
+        this is the true one-way age; otherwise it is the delay beyond the best one
+        seen from that sender plus the time spent queued here.
+        """
+        clock = DISPATCH_TABLE.get("clock")
+        origin = clock.to_local(data["ts"]) if clock is not None else None
+        if origin is not None:
+            return now - origin
+        delay = t_rx - float(data["ts"])
+        base = self._base.get(data.get("src"), delay)
+        return (delay - base) + (now - t_rx)
+
+    def check(self, data, t_rx, continuous=False):
+        """Returns None if the command may run, else the reason it was refused."""
+        if "seq" not in data or "ts" not in data:
+            return None   # unstamped (e.g. GUI): nothing to compare against
+        key = stat_key(data)
+        if key is UNKNOWN_KEY:
+            return None   # dispatch() only logs it; no sequence to keep
+        st = self._stat(key)
+        stream = (data.get("src"),) + key
+        try:
+            seq = int(data["seq"])
+            age = self.age(data, t_rx, time.monotonic())
+        except (TypeError, ValueError):
+            return None
+
+        last = self._last_seq.get(stream)
+        if last is not None and seq <= last:
+            st["out_of_order"] += 1
+            return "out_of_order"
+        st["age_last"] = age
+        if age > st["age_max"]:
+            st["age_max"] = age
+        if continuous and age > self.max_age:
+            st["too_old"] += 1
+            return "too_old"
+        self._last_seq[stream] = seq
+        st["accepted"] += 1
+        return None
+
+    def snapshot(self):
+        return {"max_age": self.max_age,
+                "streams": {f"{t}.{a}": dict(st) for (t, a), st in self.stats.items()}}
+
+FRESHNESS = Freshness()
+
+def continuous_actions():
+    """Every registered "type.action" that is latest-wins (and so may come over UDP)."""
+    return sorted(f"{t}.{a}" for t, m in DISPATCH_TABLE.items() for a in getattr(m, "CONTINUOUS", ()))
+
+def is_continuous(data):
+    key = stat_key(data)
+    return key is not UNKNOWN_KEY and key[1] in getattr(DISPATCH_TABLE[key[0]], "CONTINUOUS", ())
+
+# --- Topic subscriptions ---
+# Broadcasts are routed by topic (the message "type"). A new client gets every topic until
+# it says otherwise; "*" stands for all topics, max_hz caps a topic per subscriber:
+#   {"type":"server","action":"subscribe","topics":["telemetry"],"max_hz":{"telemetry":2},"replace":true}
+#   {"type":"server","action":"unsubscribe","topics":["motor"]}
+_TOPIC_RE = re.compile(r'"type"\s*:\s*"([^"]*)"')
+
+def topic_of(message):
+    """Topic of an already-serialized message: its first "type" key (modules put it first)."""
+    m = _TOPIC_RE.search(message)
+    return m.group(1) if m else None
+
+class Subscriber:
+    __slots__ = ("rules", "excluded", "last")
+    def __init__(self):
+        self.rules = {"*": 0.0}   # topic -> min seconds between messages (0 = all of them)
+        self.excluded = set()     # topics taken out of "*"
+        self.last = {}            # topic -> last send time, for rate-limited topics
+
+    def subscribe(self, topics, max_hz=None, replace=False):
+        if replace:
+            self.rules.clear()
+            self.excluded.clear()
+        for t in topics:
+            hz = max_hz.get(t) if isinstance(max_hz, dict) else max_hz
+            self.rules[t] = 1.0 / float(hz) if hz else 0.0
+            self.excluded.discard(t)
+
+    def unsubscribe(self, topics):
+        for t in topics:
+            self.rules.pop(t, None)
+            if t != "*" and "*" in self.rules:
+                self.excluded.add(t)
+
+    def wants(self, topic, now):
+        if topic in self.excluded:
+            return False
+        interval = self.rules.get(topic, self.rules.get("*"))
+        if interval is None:
+            return False
+        if interval:
+            if now - self.last.get(topic, float("-inf")) < interval:
+                return False
+            self.last[topic] = now
+        return True
+
+    def snapshot(self):
+        return {"topics": {t: (round(1.0 / i, 3) if i else None) for t, i in self.rules.items()},
+                "excluded": sorted(self.excluded)}
+
+SUBSCRIPTIONS = {}     # websocket -> Subscriber
+BROADCAST_STATS = {}   # topic -> {"sent": n, "filtered": n}
+
+# --- Per-client outboxes ---
+# Broadcasts and acks are posted here and written by one task per client, so neither the
+# dispatch loop nor a publishing module ever waits on a socket. A client that can't keep
+# up loses its oldest queued messages, not everybody's latency.
+OUTBOX_LIMIT = int(os.environ.get("ROV_OUTBOX_LIMIT", "256"))
+
+class Outbox:
+    def __init__(self, websocket, limit=OUTBOX_LIMIT):
+        self.websocket = websocket
+        self.queue = deque()
+        self.limit = limit
+        self.dropped = 0
+        self._wake = asyncio.Event()
+        self.task = asyncio.create_task(self._run())
+
+    def post(self, message):
+        if len(self.queue) >= self.limit:
+            self.queue.popleft()
+            self.dropped += 1
+        self.queue.append(message)
+        self._wake.set()
+
+    async def _run(self):
+        while True:
+            while self.queue:
+                try:
+                    await self.websocket.send(self.queue.popleft())
+                except Exception:
+                    return   # closed; the handler cleans up
+            self._wake.clear()
+            await self._wake.wait()
+
+    def close(self):
+        self.task.cancel()
+
+OUTBOXES = {}   # websocket -> Outbox
+
+def reply(websocket, message):
+    """Answer one client through its outbox; never waits (dropped if it has disconnected)."""
+    outbox = OUTBOXES.get(websocket)
+    if outbox is not None:
+        outbox.post(message if isinstance(message, str) else json.dumps(message))
+
+class ClientReply:
+    """
+    What module actions get as `websocket`: send() only posts to that client's outbox, so an
+    action awaiting it never waits on a socket and a slow client can't stall the dispatch loop.
+    Other attributes (remote_address, ...) come from the real websocket.
+    """
+    __slots__ = ("websocket",)
+    def __init__(self, websocket):
+        self.websocket = websocket
+
+    async def send(self, message):
+        reply(self.websocket, message)
+
+    def __getattr__(self, name):
+        return getattr(self.websocket, name)
+
 # --- Function to send to all connected clients ---
-async def broadcast_to_clients(message):
-    to_remove = []
+async def broadcast_to_clients(message, topic=None):
+    """
+    message: a JSON string (topic given or read from it) or a dict, serialized once here.
+    Only queues; returns without waiting for any client.
+    """
+    if not isinstance(message, str):
+        topic = topic or message.get("type")
+        message = json.dumps(message)
+    elif topic is None:
+        topic = topic_of(message)
+    st = BROADCAST_STATS.get(topic)
+    if st is None:
+        st = BROADCAST_STATS[topic] = {"sent": 0, "filtered": 0}
+    now = time.monotonic()
     for client in CLIENTS:
-        try:
-            await client.send(message)
-        except:
-            to_remove.append(client)
-    for client in to_remove:
-        CLIENTS.discard(client)
+        sub = SUBSCRIPTIONS.get(client)
+        if sub is not None and not sub.wants(topic, now):
+            st["filtered"] += 1
+            continue
+        outbox = OUTBOXES.get(client)
+        if outbox is not None:
+            outbox.post(message)
+            st["sent"] += 1
+
+# --- Built-in "server" type: stats about the dispatch path ---
+async def server_stats(_data=None, websocket=None):
+    if websocket is not None:
+        reply(websocket, {
+            "type": "server", "event": "stats",
+            "dispatch": MAILBOX.snapshot(),
+            "freshness": FRESHNESS.snapshot(),
+            "udp": UDP_CONTROL.stats if UDP_CONTROL else None,
+            "continuous": continuous_actions(),
+            "broadcast": BROADCAST_STATS,
+            "subscription": SUBSCRIPTIONS[websocket].snapshot() if websocket in SUBSCRIPTIONS else None,
+            "outbox": {"queued": len(OUTBOXES[websocket].queue), "dropped": OUTBOXES[websocket].dropped}
+                      if websocket in OUTBOXES else None,
+        })
+
+def _topics(data):
+    topics = data.get("topics", [])
+    return [topics] if isinstance(topics, str) else list(topics)
+
+async def server_subscribe(data, websocket=None):
+    sub = SUBSCRIPTIONS.get(websocket)
+    if sub is not None:
+        sub.subscribe(_topics(data), data.get("max_hz"), bool(data.get("replace")))
+
+async def server_unsubscribe(data, websocket=None):
+    sub = SUBSCRIPTIONS.get(websocket)
+    if sub is not None:
+        sub.unsubscribe(_topics(data))
+
+SERVER_MODULE = types.SimpleNamespace(
+    TYPE="server",
+    ACTIONS={"stats": server_stats, "subscribe": server_subscribe, "unsubscribe": server_unsubscribe},
+)
 
 # --- Load all Python modules in ./modules ---
 def load_modules():
@@ -73,63 +421,221 @@ def load_modules():
             continue
         module_name = file.stem
         try:
-            # Load module by absolute path so it works regardless of CWD
-            spec = importlib.util.spec_from_file_location(f"modules.{module_name}", str(file))
-            module = importlib.util.module_from_spec(spec)
-            assert spec and spec.loader
-            spec.loader.exec_module(module)
+            # Reuse a module that was already imported as modules.<name> (e.g. metrics,
+            # spi_bus); a second copy would have its own globals (bus, registry).
+            module = sys.modules.get(f"modules.{module_name}")
+            if module is None:
+                # Load module by absolute path so it works regardless of CWD
+                spec = importlib.util.spec_from_file_location(f"modules.{module_name}", str(file))
+                module = importlib.util.module_from_spec(spec)
+                assert spec and spec.loader
+                sys.modules[spec.name] = module
+                spec.loader.exec_module(module)
 
             if hasattr(module, "TYPE") and hasattr(module, "ACTIONS"):
                 DISPATCH_TABLE[module.TYPE] = module
                 print(f"✅ Registered: {module_name} for type '{module.TYPE}'")
 
+                # In-process topics (modules/event_bus.py)
+                if hasattr(module, "PRODUCES") or hasattr(module, "CONSUMES"):
+                    event_bus.BUS.register_module(module, module_name)
+
                 # If module supports background telemetry or async updates
                 if hasattr(module, "start_background_loop"):
                     asyncio.create_task(module.start_background_loop(broadcast_to_clients))
             else:
                 print(f"⚠️ Module {module_name} loaded but missing TYPE or ACTIONS")
         except Exception as e:
+            sys.modules.pop(f"modules.{module_name}", None)
             print(f"❌ Failed to load module {module_name}: {e}")
             print(traceback.format_exc())
 
 
+# --- Route one message to its module action ---
+# Async actions get (data, websocket); websocket.send() there is ClientReply.send (outbox).
+async def dispatch(data, websocket):
+    """Runs the action; False if there is no such type/action (nothing was executed)."""
+    message_type = data.get("type")
+    action = data.get("action")
+
+    if message_type in DISPATCH_TABLE:
+        module = DISPATCH_TABLE[message_type]
+        if hasattr(module, "ACTIONS") and action in module.ACTIONS:
+            func = module.ACTIONS[action]
+            if asyncio.iscoroutinefunction(func):
+                # Built-in "server" actions key their tables by the real websocket
+                if websocket is not None and module is not SERVER_MODULE:
+                    websocket = ClientReply(websocket)
+                await func(data, websocket)
+            else:
+                func(data)
+            return True
+        _unknown_log.warning("⚠️ Unknown action '%s' for type '%s'", action, message_type)
+    else:
+        _unknown_log.warning("⚠️ Unknown message type: %s", message_type)
+    return False
+
+# --- Optional per-command acknowledgement ---
+# A message carrying "ack": <id> gets {"type":"ack","id":<id>,"ok":bool[,"reason":...]} back
+# once it has been executed or refused. reason: out_of_order / too_old (freshness),
+# unknown_action (no such type/action here) or the exception text.
+async def send_ack(entry, ok, reason=None):
+    ack_id = entry.data.get("ack")
+    if ack_id is None or entry.websocket is None:
+        return
+    msg = {"type": "ack", "id": ack_id, "ok": ok}
+    if reason:
+        msg["reason"] = reason
+    outbox = OUTBOXES.get(entry.websocket)
+    if outbox is not None:
+        outbox.post(json.dumps(msg))
+
+# --- Drain the mailboxes, one command at a time ---
+_DISPATCH_TIME = {}   # (type, action) -> metrics.Histogram
+
+def _dispatch_hist(key):
+    h = _DISPATCH_TIME.get(key)
+    if h is None:
+        h = _DISPATCH_TIME[key] = metrics.REGISTRY.histogram(
+            "rov_dispatch_seconds", "Time spent executing one command", action=f"{key[0]}.{key[1]}")
+    return h
+
+async def dispatch_loop():
+    while True:
+        entry = await MAILBOX.get()
+        reason = FRESHNESS.check(entry.data, entry.t_rx, is_continuous(entry.data))
+        if reason:
+            await send_ack(entry, False, reason)
+            continue
+        MAILBOX.executed(entry)
+        try:
+            t0 = time.perf_counter()
+            if not await dispatch(entry.data, entry.websocket):
+                await send_ack(entry, False, "unknown_action")
+                continue
+            _dispatch_hist(entry.key).observe(time.perf_counter() - t0)
+            await send_ack(entry, True)
+        except Exception as e:
+            _error_log.warning("⚠️ Error processing %s.%s: %s", *entry.key, e, exc_info=True)
+            await send_ack(entry, False, str(e))
+
+# --- File one incoming message into the mailboxes ---
+def enqueue(item, websocket, continuous_only=False):
+    if not isinstance(item, dict):
+        _input_log.warning("⚠️ Ignoring non-object message: %r", item)
+        return False
+    continuous = is_continuous(item)
+    if continuous_only and not continuous:
+        return False
+    t_rx = time.monotonic()
+    item["_rx"] = t_rx   # server-side receive time, for modules that need it
+    FRESHNESS.observe(item, t_rx)
+    MAILBOX.put(item, websocket, continuous=continuous)
+    return True
+
+# --- UDP control channel (continuous setpoints only) ---
+# Datagram: {"ch":<sender id>, "seq":<n>, "ts":<sender monotonic>, "msgs":[...]}
+# A datagram whose seq is not newer than the last one from that channel is dropped;
+# the messages inside go through the same latest-wins mailboxes as websocket ones.
+# Off unless ROV_UDP_PORT is set (the relay's ROV_UDP_PORT, 8766): the listener takes motor
+# and servo setpoints from anyone who can reach it, so it is opt-in like USE_UDP_CONTROL.
+UDP_PORT = int(os.environ.get("ROV_UDP_PORT", "0"))
+
+class UdpControlProtocol(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.last_seq = {}   # channel -> last accepted seq
+        self.stats = {"datagrams": 0, "stale": 0, "lost": 0, "bad": 0, "rejected_msgs": 0}
+
+    def datagram_received(self, payload, addr):
+        self.stats["datagrams"] += 1
+        try:
+            dg = json.loads(payload)
+            ch = dg.get("ch", addr[0])
+            seq = int(dg["seq"])
+            msgs = dg["msgs"]
+        except Exception:
+            self.stats["bad"] += 1
+            return
+        last = self.last_seq.get(ch)
+        if last is not None and seq <= last:
+            self.stats["stale"] += 1
+            if seq < last:
+                self.stats["lost"] -= 1   # counted as a gap earlier; it was late, not lost
+            return
+        if last is not None and seq > last + 1:
+            self.stats["lost"] += seq - last - 1
+        self.last_seq[ch] = seq
+        for item in (msgs if isinstance(msgs, list) else [msgs]):
+            if not enqueue(item, None, continuous_only=True):
+                self.stats["rejected_msgs"] += 1   # one-shots belong on the websocket
+
+UDP_CONTROL = None
+
 # --- WebSocket handler ---
 async def handler(websocket):
     print("🟢 WebSocket client connected.")
+    SUBSCRIPTIONS[websocket] = Subscriber()
+    OUTBOXES[websocket] = Outbox(websocket)
     CLIENTS.add(websocket)
     try:
         async for message in websocket:
             try:
                 data = json.loads(message)
-                message_type = data.get("type")
-                action = data.get("action")
-
-                if message_type in DISPATCH_TABLE:
-                    module = DISPATCH_TABLE[message_type]
-                    if hasattr(module, "ACTIONS") and action in module.ACTIONS:
-                        func = module.ACTIONS[action]
-                        if asyncio.iscoroutinefunction(func):
-                            await func(data, websocket)
-                        else:
-                            func(data)
-                    else:
-                        print(f"⚠️ Unknown action '{action}' for type '{message_type}'")
-                else:
-                    print(f"⚠️ Unknown message type: {message_type}")
+                # A frame is either one message object or a batch array, queued in order
+                for item in (data if isinstance(data, list) else [data]):
+                    enqueue(item, websocket)
 
             except json.JSONDecodeError:
-                print("⚠️ Invalid JSON received.")
+                _input_log.warning("⚠️ Invalid JSON received.")
             except Exception as e:
-                print(f"⚠️ Error processing message: {e}")
-                print(traceback.format_exc())
+                _error_log.warning("⚠️ Error processing message: %s", e, exc_info=True)
     except websockets.exceptions.ConnectionClosed:
         print("🔴 WebSocket client disconnected.")
     finally:
         CLIENTS.discard(websocket)
+        SUBSCRIPTIONS.pop(websocket, None)
+        outbox = OUTBOXES.pop(websocket, None)
+        if outbox is not None:
+            outbox.close()
+
+def _client_label(ws):
+    addr = getattr(ws, "remote_address", None) or ("?", id(ws))
+    return {"client": f"{addr[0]}:{addr[1]}"}
+
+def _client_queues():
+    out = []
+    for ws in list(CLIENTS):
+        transport = getattr(ws, "transport", None)
+        if transport is not None:
+            out.append((_client_label(ws), transport.get_write_buffer_size()))
+    return out
+
+metrics.REGISTRY.callback("rov_client_send_queue_bytes", "Bytes waiting in each client's websocket send buffer",
+                          _client_queues)
+metrics.REGISTRY.callback("rov_client_outbox_messages", "Messages queued in each client's outbox",
+                          lambda: [(_client_label(ws), len(o.queue)) for ws, o in list(OUTBOXES.items())])
+metrics.REGISTRY.callback("rov_client_outbox_dropped_total", "Oldest outbox messages dropped for a slow client",
+                          lambda: [(_client_label(ws), o.dropped) for ws, o in list(OUTBOXES.items())],
+                          kind="counter")
+metrics.REGISTRY.callback("rov_log_dropped_total", "Log records dropped because the log queue was full",
+                          log.dropped, kind="counter")
+metrics.REGISTRY.callback("rov_clients", "Connected websocket clients", lambda: len(CLIENTS))
+metrics.REGISTRY.callback("rov_mailbox_pending", "Commands waiting for the dispatch loop",
+                          lambda: MAILBOX.pending() if MAILBOX else None)
 
 # --- Main ---
 async def main():
+    global MAILBOX, UDP_CONTROL
+    MAILBOX = Mailboxes()
+    DISPATCH_TABLE[SERVER_MODULE.TYPE] = SERVER_MODULE
     load_modules()
+    event_bus.BUS.start_pending()
+    asyncio.create_task(dispatch_loop())
+
+    if UDP_PORT:
+        _, UDP_CONTROL = await asyncio.get_running_loop().create_datagram_endpoint(
+            UdpControlProtocol, local_addr=("0.0.0.0", UDP_PORT))
+        _log.info("📨 UDP control channel listening on port %d", UDP_PORT)
     print("🚀 Starting WebSocket ROV control server on port 8765")
     async with websockets.serve(handler, "0.0.0.0", 8765):
         await asyncio.Future()  # Keep running forever
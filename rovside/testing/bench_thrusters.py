@@ -0,0 +1,73 @@
+# bench_thrusters.py
+# Per-tick cost of modules/thrusters.py: clip + mix (pseudo-inverse, saturation scaling)
+# + packing the single SPI frame (incl. CRC). No SPI I/O. Run on the Pi itself:
+#
+#   python rovside/testing/bench_thrusters.py --n 20000
+#
+# Exit code 1 if p99 is over BUDGET_US. A pure-Python mixer is timed alongside, since
+# for a 6 x 6 matrix numpy's per-call overhead, not the arithmetic, is what dominates.
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("ROV_SPI_BACKEND", "dummy")
+os.environ.setdefault("ROV_LOG_LEVEL", "WARNING")
+import numpy as np
+from modules import thrusters
+from modules.spi_bus import frame
+
+BUDGET_US = 1000.0 / 10   # a tenth of the 1 ms budget; the rest is for the SPI transfer
+
+def tick_numpy(cmd):
+    return thrusters.pack(thrusters.mix(np.clip(cmd, -1.0, 1.0)))
+
+_ROWS = thrusters.MIX.tolist()
+
+def tick_python(cmd):
+    cmd = [max(-1.0, min(1.0, c)) for c in cmd]
+    out = [sum(m * c for m, c in zip(row, cmd)) for row in _ROWS]
+    peak = max(abs(x) for x in out)
+    if peak > 1.0:
+        out = [x / peak for x in out]
+    return frame(thrusters.CMD_THRUSTERS, [int(round(x * 100.0)) + 100 for x in out])
+
+def bench(fn, cmds):
+    times = []
+    for cmd in cmds:
+        t0 = time.perf_counter()
+        fn(cmd)
+        times.append((time.perf_counter() - t0) * 1e6)
+    times.sort()
+    return {"mean_us": round(statistics.fmean(times), 2), "p50_us": round(times[len(times) // 2], 2),
+            "p99_us": round(times[int(len(times) * 0.99)], 2), "max_us": round(times[-1], 2)}
+
+def main():
+    ap = argparse.ArgumentParser(description="thrusters.py mixing benchmark")
+    ap.add_argument("--n", type=int, default=20000)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    random.seed(args.seed)
+    cmds = [[random.uniform(-1.2, 1.2) for _ in thrusters.DOF] for _ in range(args.n)]
+    np_cmds = [np.array(c) for c in cmds]
+    for a, b in zip(np_cmds[:100], cmds[:100]):
+        assert tick_numpy(a) == tick_python(b), "numpy and python mixers disagree"
+
+    bench(tick_numpy, np_cmds[:1000])   # warm up
+    res_np = bench(tick_numpy, np_cmds)
+    res_py = bench(tick_python, cmds)
+    print(f"🧪 {len(thrusters.THRUSTERS)} thrusters, {args.n} ticks, numpy {np.__version__}")
+    print(f"   numpy  {res_np}")
+    print(f"   python {res_py}")
+    if res_np["p99_us"] > BUDGET_US:
+        print(f"❌ p99 {res_np['p99_us']} µs over budget {BUDGET_US:.0f} µs")
+        sys.exit(1)
+    print(f"✅ p99 within {BUDGET_US:.0f} µs")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# hold_sim.py
+# Offline plant for tuning modules/hold.py: the same HoldController/PID runs at
+# hold.RATE_HZ against a simple vehicle model stepped at PLANT_HZ.
+#
+#   python rovside/testing/hold_sim.py                          # default gains, step test
+#   python rovside/testing/hold_sim.py --depth-gains 60 8 40 --heading-gains 1.2 0.1 0.6
+#   python rovside/testing/hold_sim.py --delay 0.3              # loop closed over a laggy link
+#   python rovside/testing/hold_sim.py --csv hold.csv           # t, depth, heading, heave, yaw
+#
+# Scenario: start at the surface facing 0°, targets DEPTH_TARGET / HEADING_TARGET at
+# t=1 s, a current pushes the vehicle from DISTURB_AT for DISTURB_FOR seconds.
+# Reported per axis: overshoot, settling time, steady-state error, output saturation.
+
+import argparse
+import csv
+import os
+import random
+import sys
+from collections import deque
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("ROV_SPI_BACKEND", "dummy")   # importing hold pulls in motor -> SPI
+os.environ.setdefault("ROV_LOG_LEVEL", "WARNING")
+from modules import hold
+
+PLANT_HZ = 1000
+
+DEPTH_TARGET = 2.0       # m
+HEADING_TARGET = 90.0    # deg
+DISTURB_AT = 20.0        # s
+DISTURB_FOR = 5.0
+DISTURB_FORCE = 4.0      # N down
+DISTURB_TORQUE = 0.6     # N*m
+
+class SimPlant:
+    """Vertical and yaw dynamics of a small ROV; heave/yaw inputs are -100..100 %."""
+    MASS = 14.0           # kg incl. added mass
+    HEAVE_THRUST = 20.0   # N at 100 %
+    HEAVE_DRAG = 35.0     # N / (m/s)^2
+    BUOYANCY = -1.0       # N, slightly positive buoyant (floats up)
+    INERTIA = 0.4         # kg*m^2 incl. added inertia
+    YAW_TORQUE = 3.0      # N*m at 100 %
+    YAW_DRAG = 2.5        # N*m / (rad/s)
+
+    def __init__(self, depth_noise=0.01, heading_noise=0.5):
+        self.depth = 0.0
+        self.v = 0.0
+        self.heading = 0.0    # deg
+        self.r = 0.0          # deg/s
+        self.depth_noise = depth_noise
+        self.heading_noise = heading_noise
+
+    def step(self, heave, yaw, dt, force=0.0, torque=0.0):
+        f = self.HEAVE_THRUST * heave / 100.0 + self.BUOYANCY + force - self.HEAVE_DRAG * self.v * abs(self.v)
+        self.v += f / self.MASS * dt
+        self.depth = max(0.0, self.depth + self.v * dt)
+        if self.depth == 0.0 and self.v < 0:
+            self.v = 0.0      # at the surface
+        t = self.YAW_TORQUE * yaw / 100.0 + torque - self.YAW_DRAG * self.r / 57.2958
+        self.r += t / self.INERTIA * 57.2958 * dt
+        self.heading = (self.heading + self.r * dt) % 360.0
+
+    def sense(self):
+        return (self.depth + random.gauss(0.0, self.depth_noise),
+                (self.heading + random.gauss(0.0, self.heading_noise)) % 360.0)
+
+def settle_time(rows, key, target, band, start):
+    """Last time the signal was outside target +- band (after start)."""
+    last_out = None
+    for r in rows:
+        if r["t"] >= start and abs(hold.wrap180(r[key] - target) if key == "heading" else r[key] - target) > band:
+            last_out = r["t"]
+    return None if last_out is None else round(last_out - start, 2)
+
+def report(rows, key, out_key, target, band, start, end):
+    err = lambda r: hold.wrap180(r[key] - target) if key == "heading" else r[key] - target
+    seg = [r for r in rows if start <= r["t"] < end]
+    peak = max(err(r) for r in seg)
+    tail = [abs(err(r)) for r in seg if r["t"] >= end - 2.0]
+    sat = sum(1 for r in seg if abs(r[out_key]) >= 99.9) / max(1, len(seg))
+    return {"overshoot": round(max(0.0, peak), 3), "settle_s": settle_time(seg, key, target, band, start),
+            "ss_error": round(sum(tail) / len(tail), 3) if tail else None, "saturated": f"{sat:.0%}"}
+
+def run(args):
+    random.seed(args.seed)
+    plant = SimPlant(args.depth_noise, args.heading_noise)
+    ctl = hold.HoldController()
+    if args.depth_gains:
+        ctl.depth_pid.kp, ctl.depth_pid.ki, ctl.depth_pid.kd = args.depth_gains
+    if args.heading_gains:
+        ctl.heading_pid.kp, ctl.heading_pid.ki, ctl.heading_pid.kd = args.heading_gains
+
+    dt = 1.0 / PLANT_HZ
+    every = max(1, round(PLANT_HZ / hold.RATE_HZ))
+    half = round(args.delay * PLANT_HZ / 2)   # --delay: half on telemetry, half on the command
+    up, down = deque(), deque()               # (due_step, values)
+    heave = yaw = 0.0
+    rows = []
+    for i in range(int(args.duration * PLANT_HZ)):
+        t = i * dt
+        if t >= 1.0 and ctl.depth_target is None:
+            ctl.depth_target, ctl.heading_target = DEPTH_TARGET, HEADING_TARGET
+        if i % every == 0:
+            up.append((i + half, plant.sense()))
+        while up and up[0][0] <= i:
+            _, (d, h) = up.popleft()
+            down.append((i + half, ctl.step(d, h, 0.0, every * dt)))
+        while down and down[0][0] <= i:
+            _, (heave, yaw) = down.popleft()
+        disturbed = DISTURB_AT <= t < DISTURB_AT + DISTURB_FOR
+        plant.step(heave, yaw, dt, DISTURB_FORCE if disturbed else 0.0, DISTURB_TORQUE if disturbed else 0.0)
+        if i % every == 0:
+            rows.append({"t": round(t, 3), "depth": round(plant.depth, 4), "heading": round(plant.heading, 2),
+                         "heave": round(heave, 1), "yaw": round(yaw, 1)})
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser(description="Depth/heading hold against a simulated plant")
+    ap.add_argument("--duration", type=float, default=40.0)
+    ap.add_argument("--depth-gains", type=float, nargs=3, metavar=("KP", "KI", "KD"))
+    ap.add_argument("--heading-gains", type=float, nargs=3, metavar=("KP", "KI", "KD"))
+    ap.add_argument("--delay", type=float, default=0.0, help="round-trip s between sensor and actuator")
+    ap.add_argument("--depth-noise", type=float, default=0.01, help="m, 1 sigma")
+    ap.add_argument("--heading-noise", type=float, default=0.5, help="deg, 1 sigma")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--csv", help="write the trace here")
+    args = ap.parse_args()
+
+    rows = run(args)
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=list(rows[0]))
+            w.writeheader()
+            w.writerows(rows)
+        print(f"💾 Trace written to {args.csv}")
+
+    print(f"🧪 {hold.RATE_HZ} Hz loop, delay {args.delay * 1000:.0f} ms")
+    for name, key, out, target, band in (("depth", "depth", "heave", DEPTH_TARGET, 0.05),
+                                          ("heading", "heading", "yaw", HEADING_TARGET, 2.0)):
+        step = report(rows, key, out, target, band, 1.0, DISTURB_AT)
+        dist = report(rows, key, out, target, band, DISTURB_AT, args.duration)
+        print(f"   {name:8s} step {step}")
+        print(f"   {'':8s} disturbance {dist}")
+
+if __name__ == "__main__":
+    main()
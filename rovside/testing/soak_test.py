@@ -0,0 +1,280 @@
+# soak_test.py
+# Long-running multi-client load test for rov_control_server.py with fake SPI.
+#
+#   python rovside/testing/soak_test.py --controllers 2 --viewers 4 --duration 7200 \
+#          --save-baseline soak_baseline.json          # first run on a known-good build
+#   python rovside/testing/soak_test.py ... --baseline soak_baseline.json   # later runs
+#
+# Starts the server itself (ROV_SPI_BACKEND=dummy) unless --url is given, then opens:
+#   - controllers: send stamped motor.set + servo.set_angle at --rate Hz (like input_controllers)
+#   - viewers:     receive only (telemetry, actuator state, metrics); reconnect every --churn s
+# Every --sample seconds one row goes to stdout and --out (JSONL): throughput, broadcast
+# latency (server "ts" -> arrival; same host, so monotonic clocks agree), server loop lag,
+# RSS and open fds. At the end RSS growth (MB/h, after warm-up) and fd growth are fitted,
+# and the summary is compared with the baseline; exit code 1 on a regression.
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import websockets
+
+SERVER = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "rov_control_server.py"))
+
+# Allowed change vs baseline before a run is flagged
+TOLERANCE = {
+    "send_rate": -0.10,          # throughput may drop at most 10 %
+    "broadcast_p99_ms": 0.50,    # p99 latency may rise at most 50 %
+    "loop_lag_p99_ms": 0.50,
+}
+RSS_GROWTH_LIMIT = 5.0   # MB/h above baseline
+FD_GROWTH_LIMIT = 5      # fds above what we started with
+MIN_GROWTH_SPAN = 600.0  # s of post-warm-up samples before RSS growth is fitted (allocator noise)
+
+class Stats:
+    def __init__(self):
+        self.sent = 0
+        self.received = 0
+        self.latencies = []      # ms, since last sample
+        self.loop_lag_p99 = None
+        self.errors = 0
+        self.reconnects = 0
+
+    def take_latencies(self):
+        lat, self.latencies = self.latencies, []
+        return lat
+
+def _pct(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+# ---------------- Process stats (Linux /proc) ----------------
+
+def proc_rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        return None
+
+def proc_fds(pid):
+    try:
+        return len(os.listdir(f"/proc/{pid}/fd"))
+    except OSError:
+        return None
+
+# ---------------- Clients ----------------
+
+async def controller(url, idx, rate, stats, stop):
+    src = f"soak-{idx}"
+    seq = 0
+    while not stop.is_set():
+        try:
+            async with websockets.connect(url, max_queue=None) as ws:
+                drain = asyncio.create_task(_consume(ws, stats, measure=False))
+                try:
+                    while not stop.is_set():
+                        seq += 1
+                        ts = time.monotonic()
+                        th = (seq % 200) - 100
+                        frame = json.dumps([
+                            {"type": "motor", "action": "set", "throttle": th, "turn": -th,
+                             "src": src, "seq": seq, "ts": ts},
+                            {"type": "servo", "action": "set_angle", "pan": 90 + th // 4, "tilt": 90,
+                             "src": src, "seq": seq, "ts": ts},
+                        ], separators=(',', ':'))
+                        await ws.send(frame)
+                        stats.sent += 2
+                        await asyncio.sleep(1.0 / rate)
+                finally:
+                    drain.cancel()
+        except Exception:
+            stats.errors += 1
+            await asyncio.sleep(1.0)
+
+async def _consume(ws, stats, measure=True):
+    async for message in ws:
+        t = time.monotonic()
+        stats.received += 1
+        if not measure:
+            continue
+        try:
+            data = json.loads(message)
+        except json.JSONDecodeError:
+            continue
+        kind = data.get("type")
+        if kind == "actuators" and "ts" in data:
+            stats.latencies.append((t - data["ts"]) * 1000)
+        elif kind == "metrics":
+            lag = data.get("rov_event_loop_lag_seconds") or {}
+            if lag.get("p99") is not None:
+                stats.loop_lag_p99 = lag["p99"] * 1000
+
+async def viewer(url, churn, stats, stop):
+    while not stop.is_set():
+        try:
+            async with websockets.connect(url, max_queue=None) as ws:
+                task = asyncio.create_task(_consume(ws, stats))
+                try:
+                    await asyncio.wait_for(stop.wait(), churn if churn else None)
+                except asyncio.TimeoutError:
+                    stats.reconnects += 1   # planned reconnect: catches per-connection leaks
+                task.cancel()
+        except Exception:
+            stats.errors += 1
+            await asyncio.sleep(1.0)
+
+# ---------------- Analysis ----------------
+
+def slope_per_hour(rows, key, warmup):
+    pts = [(r["t"], r[key]) for r in rows if r["t"] >= warmup and r.get(key) is not None]
+    if len(pts) < 3 or pts[-1][0] - pts[0][0] < MIN_GROWTH_SPAN:
+        return None
+    mx = statistics.fmean(p[0] for p in pts)
+    my = statistics.fmean(p[1] for p in pts)
+    den = sum((x - mx) ** 2 for x, _ in pts)
+    return 3600 * sum((x - mx) * (y - my) for x, y in pts) / den if den else None
+
+def summarize(rows, warmup):
+    steady = [r for r in rows if r["t"] >= warmup] or rows
+    def med(key):
+        vals = [r[key] for r in steady if r.get(key) is not None]
+        return round(statistics.median(vals), 3) if vals else None
+    fds = [r["fds"] for r in rows if r.get("fds") is not None]
+    return {
+        "send_rate": med("send_rate"),
+        "recv_rate": med("recv_rate"),
+        "broadcast_p50_ms": med("broadcast_p50_ms"),
+        "broadcast_p99_ms": med("broadcast_p99_ms"),
+        "loop_lag_p99_ms": med("loop_lag_p99_ms"),
+        "rss_mb_end": rows[-1].get("rss_mb") if rows else None,
+        "rss_growth_mb_per_h": slope_per_hour(rows, "rss_mb", warmup),
+        "fd_growth": (fds[-1] - fds[0]) if len(fds) >= 2 else None,
+        "errors": rows[-1]["errors"] if rows else None,
+    }
+
+def compare(summary, baseline):
+    problems = []
+    for key, tol in TOLERANCE.items():
+        now, base = summary.get(key), baseline.get(key)
+        if now is None or not base:
+            continue
+        change = (now - base) / base
+        if (tol < 0 and change < tol) or (tol > 0 and change > tol):
+            problems.append(f"{key}: {base} -> {now} ({change:+.0%}, limit {tol:+.0%})")
+    growth, base_growth = summary.get("rss_growth_mb_per_h"), baseline.get("rss_growth_mb_per_h") or 0.0
+    if growth is not None and growth > base_growth + RSS_GROWTH_LIMIT:
+        problems.append(f"rss_growth_mb_per_h: {base_growth:.2f} -> {growth:.2f}")
+    if (summary.get("fd_growth") or 0) > FD_GROWTH_LIMIT:
+        problems.append(f"fd_growth: {summary['fd_growth']} fds")
+    return problems
+
+# ---------------- Main ----------------
+
+async def main():
+    ap = argparse.ArgumentParser(description="rov_control_server soak test")
+    ap.add_argument("--url", help="use a running server instead of starting one")
+    ap.add_argument("--pid", type=int, help="server pid for RSS/fd stats with --url")
+    ap.add_argument("--controllers", type=int, default=2)
+    ap.add_argument("--viewers", type=int, default=4)
+    ap.add_argument("--rate", type=float, default=20.0, help="frames/s per controller")
+    ap.add_argument("--churn", type=float, default=60.0, help="viewer reconnect period, 0 = never")
+    ap.add_argument("--duration", type=float, default=600.0, help="seconds")
+    ap.add_argument("--sample", type=float, default=10.0, help="seconds between samples")
+    ap.add_argument("--warmup", type=float, default=60.0, help="seconds ignored for growth/medians")
+    ap.add_argument("--out", help="JSONL file for the samples")
+    ap.add_argument("--baseline", help="compare against this summary JSON")
+    ap.add_argument("--save-baseline", help="write this run's summary here")
+    args = ap.parse_args()
+
+    proc = None
+    pid = args.pid
+    url = args.url or "ws://127.0.0.1:8765"
+    if not args.url:
+        env = dict(os.environ, ROV_SPI_BACKEND="dummy", ROV_LOG_LEVEL="WARNING", ROV_METRICS_INTERVAL="2")
+        proc = subprocess.Popen([sys.executable, SERVER], env=env, cwd=os.path.dirname(SERVER),
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        pid = proc.pid
+        for _ in range(50):
+            await asyncio.sleep(0.2)
+            try:
+                async with websockets.connect(url):
+                    break
+            except OSError:
+                continue
+        else:
+            proc.kill()
+            sys.exit("❌ server did not come up")
+
+    stats = Stats()
+    stop = asyncio.Event()
+    tasks = [asyncio.create_task(controller(url, i, args.rate, stats, stop)) for i in range(args.controllers)]
+    tasks += [asyncio.create_task(viewer(url, args.churn, stats, stop)) for _ in range(args.viewers)]
+    print(f"🧪 Soak: {args.controllers} controllers @ {args.rate} Hz, {args.viewers} viewers, "
+          f"{args.duration:.0f}s against {url} (pid {pid})")
+
+    out = open(args.out, "w") if args.out else None
+    rows = []
+    t0 = time.monotonic()
+    last_t, last_sent, last_recv = t0, 0, 0
+    try:
+        while time.monotonic() - t0 < args.duration:
+            await asyncio.sleep(args.sample)
+            if proc is not None and proc.poll() is not None:
+                print(f"❌ server exited with {proc.returncode}")
+                break
+            now = time.monotonic()
+            lat = stats.take_latencies()
+            rss = proc_rss_mb(pid) if pid else None
+            row = {
+                "t": round(now - t0, 1),
+                "send_rate": round((stats.sent - last_sent) / (now - last_t), 1),
+                "recv_rate": round((stats.received - last_recv) / (now - last_t), 1),
+                "broadcast_p50_ms": round(_pct(lat, 0.5), 3) if lat else None,
+                "broadcast_p99_ms": round(_pct(lat, 0.99), 3) if lat else None,
+                "loop_lag_p99_ms": stats.loop_lag_p99,
+                "rss_mb": round(rss, 2) if rss is not None else None,
+                "fds": proc_fds(pid) if pid else None,
+                "errors": stats.errors,
+                "reconnects": stats.reconnects,
+            }
+            last_t, last_sent, last_recv = now, stats.sent, stats.received
+            rows.append(row)
+            print("   " + json.dumps(row))
+            if out:
+                out.write(json.dumps(row) + "\n")
+                out.flush()
+    finally:
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if out:
+            out.close()
+        if proc is not None:
+            proc.terminate()
+            proc.wait(5)
+
+    summary = summarize(rows, args.warmup)
+    print("📊 " + json.dumps(summary))
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"💾 Baseline saved to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(summary, json.load(f))
+        if problems:
+            print("❌ Regressions vs baseline:")
+            for p in problems:
+                print(f"   - {p}")
+            sys.exit(1)
+        print("✅ Within baseline tolerances")
+
+if __name__ == "__main__":
+    asyncio.run(main())
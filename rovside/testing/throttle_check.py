@@ -0,0 +1,145 @@
+# throttle_check.py
+# Deterministic check of motor.set's staleness bound. The real path runs:
+#   motor.set -> _apply -> _Throttle.offer -> _schedule_flush -> loop.call_later -> _flush -> bus.send
+# with motor._clock swapped for a fake clock, the event loop motor schedules on for a fake
+# one whose timers fire when the clock is advanced, and motor.bus for a recorder.
+# After any burst of set() calls the wire must carry the burst's last value no later than
+# MIN_INTERVAL after that call (including when the burst returns to the value already
+# sent and _apply cancels the parked one), and two frames never go out closer than that.
+#
+#   python rovside/testing/throttle_check.py               # fixed cases + 2000 random bursts
+#   python rovside/testing/throttle_check.py --bursts 20000 --seed 7
+#
+# Exit code 1 on the first violation.
+
+import argparse
+import heapq
+import os
+import random
+import sys
+import types
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("ROV_SPI_BACKEND", "dummy")   # importing motor opens the SPI bus
+os.environ.setdefault("ROV_LOG_LEVEL", "WARNING")
+from modules import motor
+
+EPS = 1e-9
+
+class FakeLoop:
+    """Clock + call_later; timers run only from advance(), in due order."""
+    class Handle:
+        def __init__(self):
+            self.cancelled = False
+
+        def cancel(self):
+            self.cancelled = True
+
+    def __init__(self):
+        self.t = 0.0
+        self._timers = []   # (due, seq, handle, callback)
+        self._seq = 0
+
+    def time(self):
+        return self.t
+
+    def call_later(self, delay, callback):
+        self._seq += 1
+        h = self.Handle()
+        heapq.heappush(self._timers, (self.t + max(0.0, delay), self._seq, h, callback))
+        return h
+
+    def advance(self, t):
+        while self._timers and self._timers[0][0] <= t:
+            due, _, h, cb = heapq.heappop(self._timers)
+            if not h.cancelled:
+                self.t = max(self.t, due)
+                cb()
+        self.t = max(self.t, t)
+
+class RecordingBus:
+    def __init__(self, loop):
+        self.loop = loop
+        self.sent = []   # (time, throttle, turn)
+
+    def send(self, pkt):
+        if pkt[2] == motor.CMD_THROTTLE_TURN:
+            self.sent.append((self.loop.t, pkt[3] - 100, pkt[4] - 100))
+        elif pkt[2] == motor.CMD_STOP:
+            self.sent.append((self.loop.t, 0, 0))
+
+def install(loop):
+    """Point motor at the fake loop/clock/bus and reset its state."""
+    bus = RecordingBus(loop)
+    motor._clock = loop.time
+    motor.asyncio = types.SimpleNamespace(get_running_loop=lambda: loop)
+    motor.bus = bus
+    motor._throttle = motor._Throttle(motor.MIN_INTERVAL)
+    motor._flush_handle = None
+    motor._pilot, motor._assist_yaw = (0, 0), 0.0
+    motor._last_throttle = motor._last_turn = 0
+    motor._last_send_t = float("-inf")
+    return bus
+
+def check(calls, label):
+    """calls: [(dt_since_previous, throttle, turn)] fed to motor.set."""
+    loop = FakeLoop()
+    bus = install(loop)
+    for dt, th, tn in calls:
+        loop.advance(loop.t + dt)
+        motor.set({"throttle": th, "turn": tn})
+    last_t, want = loop.t, (calls[-1][1], calls[-1][2])
+    loop.advance(last_t + motor.MIN_INTERVAL + EPS)
+    on_wire = bus.sent[-1][1:] if bus.sent else (0, 0)
+    if on_wire != want:
+        return f"{label}: {want} set at {last_t:.4f}s, wire still {on_wire} {motor.MIN_INTERVAL}s later"
+    late = [s for s in bus.sent if s[0] > last_t + motor.MIN_INTERVAL + EPS]
+    if late:
+        return f"{label}: frame sent after the bound: {late}"
+    gaps = [b[0] - a[0] for a, b in zip(bus.sent, bus.sent[1:])]
+    if gaps and min(gaps) < motor.MIN_INTERVAL - EPS:
+        return f"{label}: two frames {min(gaps):.4f}s apart (< {motor.MIN_INTERVAL}s)"
+    return None
+
+def fixed_cases(i):
+    return {
+        "single":            [(0.0, 10, 0)],
+        "burst in window":   [(0.0, 10, 0), (i / 10, 20, 0), (i / 10, 30, 5), (i / 10, 40, -5)],
+        "burst at 1 kHz":    [(0.001, n, -n) for n in range(100)],
+        "back to sent":      [(0.0, 10, 0), (i / 4, 20, 0), (i / 4, 10, 0)],   # _apply cancels
+        "away and back":     [(0.0, 10, 0), (i / 4, 10, 0), (i / 4, 30, 0), (i / 4, 10, 0)],
+        "just before edge":  [(0.0, 10, 0), (i - 1e-6, 20, 0)],
+        "exactly on edge":   [(0.0, 10, 0), (i, 20, 0)],
+        "two bursts":        [(0.0, 10, 0), (i / 4, 20, 0), (3 * i, 30, 0), (i / 4, 40, 0)],
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description="motor.set staleness bound")
+    ap.add_argument("--bursts", type=int, default=2000)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    interval = motor.MIN_INTERVAL
+    cases = fixed_cases(interval)
+    failures = [f for f in (check(c, name) for name, c in cases.items()) if f]
+
+    rng = random.Random(args.seed)
+    for n in range(args.bursts):
+        # few distinct values, so bursts often return to what was sent (the cancel path)
+        calls = [(rng.choice((0.0, rng.uniform(0, interval), rng.uniform(0, 3 * interval))),
+                  rng.choice((0, 10, 20)), rng.choice((0, 5))) for _ in range(rng.randint(1, 40))]
+        f = check(calls, f"random #{n}")
+        if f:
+            failures.append(f)
+            break
+
+    print(f"🧪 motor.set, interval {interval * 1000:.0f} ms, {len(cases)} fixed + "
+          f"{args.bursts} random bursts (seed {args.seed})")
+    if failures:
+        for f in failures:
+            print(f"❌ {f}")
+        sys.exit(1)
+    print(f"✅ last value always on the wire within {interval * 1000:.0f} ms, frames never closer than that")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# modules/clock_sync.py
+# NTP-style offset/drift estimate between this machine's time.monotonic() and the ROV's.
+
+import statistics, time
+from collections import deque
+from typing import Any, Dict, Optional
+
+class ClockSync:
+    """
+    Four-timestamp exchange over the existing websocket:
+      t0 = topside send, t1 = ROV receive, t2 = ROV send, t3 = topside receive
+      offset = ((t1 - t0) + (t2 - t3)) / 2     (rov_time = local_time + offset)
+      delay  = (t3 - t0) - (t2 - t1)
+
+    The estimate is the median offset of the lowest-delay half of the last `window`
+    samples (queueing only ever adds delay, so those are the most trustworthy).
+    Drift is a least-squares slope of offset over local time.
+    """
+    def __init__(self, window: int = 16, clock=time.monotonic):
+        self.clock = clock
+        self.samples = deque(maxlen=window)   # (t_local_mid, offset, delay)
+        self._next_id = 0
+        self._outstanding: Dict[int, float] = {}
+        self.offset: Optional[float] = None
+        self.uncertainty: Optional[float] = None
+        self.drift = 0.0          # seconds of offset change per local second
+        self._t_ref = 0.0
+
+    def make_probe(self) -> Dict[str, Any]:
+        self._next_id += 1
+        t0 = self.clock()
+        self._outstanding[self._next_id] = t0
+        if len(self._outstanding) > 64:   # replies that never came back
+            self._outstanding.pop(next(iter(self._outstanding)))
+        return {"type": "clock", "action": "probe", "id": self._next_id, "t0": t0}
+
+    def on_reply(self, msg: Dict[str, Any], t3: Optional[float] = None):
+        """Feed a {"type":"clock","event":"probe",...} reply. Returns (offset, delay) or None."""
+        t3 = self.clock() if t3 is None else t3
+        t0 = self._outstanding.pop(msg.get("id"), None)
+        try:
+            t0 = float(msg["t0"]) if t0 is None else t0
+            t1, t2 = float(msg["t1"]), float(msg["t2"])
+        except (KeyError, TypeError, ValueError):
+            return None
+        offset = ((t1 - t0) + (t2 - t3)) / 2
+        delay = max(0.0, (t3 - t0) - (t2 - t1))
+        self.samples.append(((t0 + t3) / 2, offset, delay))
+        self._estimate()
+        return offset, delay
+
+    def _estimate(self):
+        ordered = sorted(self.samples, key=lambda s: s[2])
+        best = ordered[:max(1, len(ordered) // 2)]
+        offsets = [s[1] for s in best]
+        med = statistics.median(offsets)
+        mad = statistics.median(abs(o - med) for o in offsets)
+        self.offset = med
+        self._t_ref = statistics.median(s[0] for s in best)
+        # Half the best round trip bounds the asymmetry error; MAD covers the spread
+        self.uncertainty = best[0][2] / 2 + mad
+
+        if len(self.samples) >= 8:
+            ts = [s[0] for s in self.samples]
+            os_ = [s[1] for s in self.samples]
+            mt, mo = statistics.fmean(ts), statistics.fmean(os_)
+            var = sum((t - mt) ** 2 for t in ts)
+            if var > 0:
+                self.drift = sum((t - mt) * (o - mo) for t, o in zip(ts, os_)) / var
+
+    @property
+    def synced(self) -> bool:
+        return self.offset is not None
+
+    def offset_at(self, t_local: Optional[float] = None) -> Optional[float]:
+        if self.offset is None:
+            return None
+        t = self.clock() if t_local is None else t_local
+        return self.offset + self.drift * (t - self._t_ref)
+
+    def to_local(self, remote_ts: float) -> Optional[float]:
+        """ROV monotonic timestamp -> local monotonic time (None until synced)."""
+        off = self.offset_at()
+        return None if off is None else float(remote_ts) - off
+
+    def to_remote(self, local_ts: float) -> Optional[float]:
+        off = self.offset_at()
+        return None if off is None else float(local_ts) + off
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "synced": self.synced,
+            "offset": self.offset_at(),
+            "uncertainty": self.uncertainty,
+            "drift_ppm": self.drift * 1e6,
+            "samples": len(self.samples),
+        }
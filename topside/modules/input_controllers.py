@@ -4,12 +4,15 @@ from typing import Dict, Any, Optional
 import pygame
 import websockets
 from modules.mappings.gamepad_mappings import (DETECT_HINTS, MAPPINGS, BINDINGS)
+from modules.outbound_scheduler import OutboundScheduler, Policy, encode_frame
+from modules import log
 import contextlib
 
 # -------- Tunables --------
 DEADZONE = 0.10
 SCALE = 90                 # stick -> degrees around 90
-SEND_INTERVAL = 0.10       # min seconds between servo updates
+SEND_INTERVAL = 0.25       # min seconds between servo updates
+SERVO_GLIDE = SEND_INTERVAL  # ROV interpolates to each setpoint over this long (servo "duration")
 DEBOUNCE = 0.35            # for one-shot bindings
 KEEPALIVE_PING = 30
 RECONNECT_DELAY = 1.0
@@ -23,16 +26,56 @@ DRIVE_SEND_INTERVAL = 0.1 # seconds between motion packets
 DEFAULT_MOTION_FAILSAFE = {"type": "motor", "action": "set", "throttle": 0, "turn": 0}
 MOTION_KEEPALIVE = 0.10   # seconds; MUST be < MCU watchdog timeout
 SERVO_KEEPALIVE  = 1.0    # optional UI/state heartbeat for pan/tilt
+
+# Send-timing per continuous stream; everything due on a tick leaves as one frame
+OUTBOUND_POLICIES = {
+    "servo":  Policy(min_interval=SEND_INTERVAL,       keepalive=SERVO_KEEPALIVE),
+    "motion": Policy(min_interval=DRIVE_SEND_INTERVAL, keepalive=MOTION_KEEPALIVE),
+}
 # --------------------------
 
+_log = log.get("controller")
+
+# Sent right after connecting: the controller only sends, so it takes no broadcasts at all
+SUBSCRIBE_NONE = {"type": "server", "action": "subscribe", "topics": [], "replace": True}
+
 async def _drain(ws):
-    # Read and discard everything (lets websockets handle ping/pong internally)
+    # Read and discard whatever still arrives (lets websockets handle ping/pong internally)
     try:
         async for _ in ws:
             pass
     except Exception:
         pass
 
+# --- Outbound links: a websocket to the relay, or the relay itself when in-process ---
+class _WsLink:
+    def __init__(self, ws):
+        self.ws = ws
+    async def send(self, msgs):
+        await self.ws.send(encode_frame(msgs))
+
+class _DirectLink:
+    def __init__(self, relay):
+        self.relay = relay
+    async def send(self, msgs):
+        await self.relay.submit(msgs)
+
+@contextlib.asynccontextmanager
+async def _open_link(ws_url: str, relay=None):
+    if relay is not None:
+        _log.info("✅ Direct in-process link to relay")
+        yield _DirectLink(relay)
+        return
+    _log.info("🔌 Connecting to %s …", ws_url)
+    async with websockets.connect(ws_url, ping_interval=(KEEPALIVE_PING-20), ping_timeout=KEEPALIVE_PING) as ws:
+        _log.info("✅ WebSocket connected")
+        await ws.send(json.dumps(SUBSCRIBE_NONE))
+        drain_task = asyncio.create_task(_drain(ws))
+        try:
+            yield _WsLink(ws)
+        finally:
+            drain_task.cancel()
+
 def dz(v: float) -> float: return 0.0 if abs(v) < DEADZONE else v
 def to_angle(v: float) -> int: return int(90 + v * SCALE)
 def now() -> float: return time.monotonic()
@@ -61,23 +104,22 @@ def _axis_name(map_: dict, idx: int) -> str:
 def _detect_type() -> Optional[str]:
     pygame.init(); pygame.joystick.init()
     if pygame.joystick.get_count() == 0:
-        print("❌ No joystick detected.")
+        _log.error("❌ No joystick detected.")
         return None
     name = pygame.joystick.Joystick(0).get_name().lower()
-    print(f"🎮 Detected controller name: {name}")
+    _log.info("🎮 Detected controller name: %s", name)
     for key, hints in DETECT_HINTS.items():
         if any(h in name for h in hints):
             return key
-    print("⚠️ Unknown controller type, defaulting to ps4 mapping")
+    _log.warning("⚠️ Unknown controller type, defaulting to ps4 mapping")
     return "ps4"
 
-async def _wait_for_controller(ws, prefer_guid=None, poll_s=0.05):
+async def _wait_for_controller(link, sched, prefer_guid=None, poll_s=0.05):
     """Send one-shot failsafe, then wait until a controller is present.
        Prefer previous GUID if available. Returns (js, name, guid)."""
     with contextlib.suppress(Exception):
-        await ws.send(json.dumps(DEFAULT_FAILSAFE, separators=(',',':')))
-        await ws.send(json.dumps(DEFAULT_MOTION_FAILSAFE, separators=(',',':')))
-    print("🔌 Joystick disconnected. Waiting …")
+        await link.send(sched.stamp([DEFAULT_FAILSAFE, DEFAULT_MOTION_FAILSAFE]))
+    _log.warning("🔌 Joystick disconnected. Waiting …")
 
     while True:
         await asyncio.sleep(poll_s)
@@ -106,38 +148,40 @@ async def _wait_for_controller(ws, prefer_guid=None, poll_s=0.05):
         except Exception:
             continue  # race; try again
 
-        print(f"✅ {name} reconnected" + (f" (guid {guid})" if guid else ""))
+        _log.info("✅ %s reconnected%s", name, f" (guid {guid})" if guid else "")
         await asyncio.sleep(0.05)  # tiny settle
         return js, name, guid
     
-async def run(ws_url: str):
+async def run(ws_url: str, relay=None):
+    """
+    Poll the gamepad and send control frames. With `relay` (a NetworkRelay in this
+    process) frames go straight to its outbound path; otherwise over ws_url. When
+    not given, the relay is picked up from network_handler.relay_instance if one is
+    running in this process.
+    """
+    if relay is None:
+        from modules import network_handler
+        relay = network_handler.relay_instance
+
     ctrl_type = _detect_type()
     if not ctrl_type: return
 
     mapping = MAPPINGS[ctrl_type]
     binds: Dict[str, Dict[str, Any]] = BINDINGS.get(ctrl_type, {})
-    print(f"🕹️ Using mapping: {ctrl_type}")
+    _log.info("🕹️ Using mapping: %s", ctrl_type)
 
     js = pygame.joystick.Joystick(0); js.init()
-    print(f"   axes={js.get_numaxes()} buttons={js.get_numbuttons()} hats={js.get_numhats()}")
+    _log.info("   axes=%d buttons=%d hats=%d", js.get_numaxes(), js.get_numbuttons(), js.get_numhats())
 
-    last_sent = 0.0
-    last_pan = last_tilt = None
     last_buttons = [0] * js.get_numbuttons()
     last_hat = (0,0) if js.get_numhats() > 0 else None
     last_bind_fire: Dict[str, float] = {}
-
-    # Motion state
-    last_motion_sent = 0.0
-    last_throttle: Optional[int] = None   # -100..100
-    last_turn: Optional[int] = None       # -100..100
+    sched = OutboundScheduler(OUTBOUND_POLICIES, clock=now)
 
     while True:
         try:
-            print(f"🔌 Connecting to {ws_url} …")
-            async with websockets.connect(ws_url, ping_interval=(KEEPALIVE_PING-20), ping_timeout=KEEPALIVE_PING) as ws:
-                print("✅ WebSocket connected")
-                drain_task = asyncio.create_task(_drain(ws))
+            async with _open_link(ws_url, relay) as link:
+                sched.reset()  # fresh link: resend current state right away
                 
                 while True:
                     pygame.event.pump()
@@ -145,7 +189,7 @@ async def run(ws_url: str):
                     # Hot-unplug handling (robust)
                     if pygame.joystick.get_count() == 0:
                         prefer_guid = js.get_guid() if 'js' in locals() and hasattr(js, "get_guid") else None
-                        js, name, guid = await _wait_for_controller(ws, prefer_guid=prefer_guid)
+                        js, name, guid = await _wait_for_controller(link, sched, prefer_guid=prefer_guid)
 
                         # Re-detect mapping only if name suggests a different pad; otherwise keep previous
                         detected = None
@@ -156,15 +200,14 @@ async def run(ws_url: str):
                             ctrl_type = detected
                             mapping = MAPPINGS[ctrl_type]
                             binds   = BINDINGS.get(ctrl_type, {})
-                            print(f"🎮 Mapping switched to: {ctrl_type}")
+                            _log.info("🎮 Mapping switched to: %s", ctrl_type)
                         else:
-                            print(f"🎮 Mapping kept: {ctrl_type}")
+                            _log.info("🎮 Mapping kept: %s", ctrl_type)
 
                         # Reset caches so change detection resumes cleanly
                         last_buttons = [0] * js.get_numbuttons()
                         last_hat = (0,0) if js.get_numhats() > 0 else None
-                        last_pan = last_tilt = None
-                        last_throttle = last_turn = None
+                        sched.reset()
 
                     # Resolve axes (servos on LEFT stick; RIGHT stick X reserved for turning)
                     rx, ry = mapping.get("AXIS_RX"), mapping.get("AXIS_RY")
@@ -182,13 +225,8 @@ async def run(ws_url: str):
                     pan = to_angle(dz(x))
                     tilt = to_angle(dz(-y))
                     t = now()
-                    
-                    servo_changed = (pan != last_pan or tilt != last_tilt)
-                    if (servo_changed and (t - last_sent) >= SEND_INTERVAL) or ((t - last_sent) >= SERVO_KEEPALIVE):
-                        await ws.send(json.dumps({
-                            "type": "servo","action": "set_angle","pan": pan,"tilt": tilt
-                        }, separators=(',',':')))
-                        last_pan, last_tilt, last_sent = pan, tilt, t
+                    sched.update("servo", {"type": "servo","action": "set_angle","pan": pan,"tilt": tilt,
+                                           "duration": SERVO_GLIDE})
 
                     # ---- Motion: throttle (-100..100) and turn (-100..100) ----
                     try:
@@ -216,17 +254,8 @@ async def run(ws_url: str):
                         turn = int(round(clamp(float(rx_val), -1.0, 1.0) * 100))
                         turn = int(clamp(turn, -100, 100))
 
-                    # Send on change (rate-limited), OR send a periodic keepalive when unchanged
-                    motion_changed = (
-                        last_throttle is None or last_turn is None or
-                        throttle != last_throttle or turn != last_turn)
-                    
-                    if (motion_changed and (t - last_motion_sent) >= DRIVE_SEND_INTERVAL) \
-                        or ((t - last_motion_sent) >= MOTION_KEEPALIVE):
-                        await ws.send(json.dumps({
-                            "type":"motor","action":"set","throttle":throttle,"turn":turn
-                        }, separators=(',',':')))
-                        last_throttle, last_turn, last_motion_sent = throttle, turn, t
+                    # Sent on change (rate-limited) or as keepalive, per OUTBOUND_POLICIES
+                    sched.update("motion", {"type":"motor","action":"set","throttle":throttle,"turn":turn})
 
                     # Buttons (edge-triggered)
                     for i in range(js.get_numbuttons()):
@@ -239,15 +268,15 @@ async def run(ws_url: str):
                             if pressed and bname in binds:
                                 last_fire = last_bind_fire.get(bname, 0.0)
                                 if (t - last_fire) >= DEBOUNCE:
-                                    await ws.send(json.dumps(binds[bname], separators=(',',':')))
-                                    print(f"🔘 Binding: {ctrl_type}.{bname} -> {binds[bname]}")
+                                    sched.push(binds[bname])
+                                    _log.debug("🔘 Binding: %s.%s -> %s", ctrl_type, bname, binds[bname])
                                     last_bind_fire[bname] = t
 
                             if SEND_RAW_EVENTS:
-                                await ws.send(json.dumps({
+                                sched.push({
                                     "type":"gamepad","event":"button","controller":ctrl_type,
                                     "name":bname,"index":i,"pressed":pressed
-                                }, separators=(',',':')))
+                                })
                             last_buttons[i] = val
 
                     # Axes (analog) — includes triggers
@@ -257,10 +286,10 @@ async def run(ws_url: str):
                                 val = float(js.get_axis(ax_idx))
                             except Exception:
                                 continue
-                            await ws.send(json.dumps({
+                            sched.push({
                                 "type":"gamepad","event":"axis","controller":ctrl_type,
                                 "name":_axis_name(mapping, ax_idx),"index":ax_idx,"value":round(val,3)
-                            }, separators=(',',':')))
+                            })
 
                     # D-pad (hat)
                     hat_idx = mapping.get("HAT_0", 0)
@@ -268,14 +297,24 @@ async def run(ws_url: str):
                         hat = js.get_hat(hat_idx)
                         if hat != last_hat:
                             if SEND_RAW_EVENTS:
-                                await ws.send(json.dumps({
+                                sched.push({
                                     "type":"gamepad","event":"hat","controller":ctrl_type,
                                     "index":hat_idx,"x":hat[0],"y":hat[1]
-                                }, separators=(',',':')))
+                                })
                             last_hat = hat
 
+                    # One frame per tick with everything that is due
+                    msgs = sched.collect(t)
+                    if msgs:
+                        await link.send(msgs)
+
                     await asyncio.sleep(0.01)
 
         except Exception as e:
-            print(f"⚠️ WS error: {e}. Reconnecting in {RECONNECT_DELAY}s …")
+            _log.warning("⚠️ WS error: %s. Reconnecting in %ss …", e, RECONNECT_DELAY)
             await asyncio.sleep(RECONNECT_DELAY)
+
+def child_main(channel, ws_url: str):
+    """Entry point when run as a supervised child process (modules/supervisor.py)."""
+    from modules.supervisor import run_async_child
+    run_async_child(channel, lambda ch: run(ws_url, relay=ch))
@@ -0,0 +1,108 @@
+# modules/link_monitor.py
+# Rolling RTT / jitter / loss estimate for the relay <-> ROV link, from a small probe stream.
+
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+from modules import log
+
+_log = log.get("link")
+_listener_log = log.RateLimit(_log, 5.0)   # publish() runs every second
+
+class LinkMonitor:
+    """
+    Call make_probe() at `interval`, feed each reply to on_reply() and call expire()
+    periodically. Probes that get no reply within `loss_timeout` count as lost.
+
+    - rtt:    smoothed round trip (EWMA, 1/8 like TCP's SRTT), plus min/p95 over the window
+    - jitter: RFC 3550 style mean deviation of consecutive RTTs
+    - loss:   fraction of the last `window` probes that were lost
+
+    The probe rate backs off on its own if probe traffic would exceed `budget_bps`.
+    """
+    def __init__(self, probe_hz: float = 10.0, budget_bps: int = 2500, window: int = 50,
+                 loss_timeout: float = 1.0, clock=time.monotonic):
+        self.clock = clock
+        self.min_interval = 1.0 / probe_hz
+        self.interval = self.min_interval
+        self.budget_bps = budget_bps
+        self.loss_timeout = loss_timeout
+        self._outstanding: Dict[Any, float] = {}     # probe id -> t0
+        self._outcomes = deque(maxlen=window)        # True = answered, False = lost
+        self._rtts = deque(maxlen=window)
+        self.srtt: Optional[float] = None
+        self.jitter = 0.0
+        self._last_rtt: Optional[float] = None
+        self.sent = self.received = self.lost = 0
+        self._bytes = 0
+        self._bytes_t = clock()
+        self.bytes_per_s = 0.0
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    def add_listener(self, cb: Callable[[Dict[str, Any]], None]):
+        """cb(snapshot) is called on every publish (e.g. to lower send rates on a bad link)."""
+        self._listeners.append(cb)
+
+    def sent_probe(self, probe_id, t0: float, nbytes: int = 0):
+        self._outstanding[probe_id] = t0
+        self.sent += 1
+        self._bytes += nbytes
+
+    def on_reply(self, probe_id, t3: Optional[float] = None, nbytes: int = 0) -> Optional[float]:
+        t0 = self._outstanding.pop(probe_id, None)
+        self._bytes += nbytes
+        if t0 is None:
+            return None   # already counted as lost, or not ours
+        rtt = (self.clock() if t3 is None else t3) - t0
+        self.received += 1
+        self._outcomes.append(True)
+        self._rtts.append(rtt)
+        self.srtt = rtt if self.srtt is None else self.srtt + (rtt - self.srtt) / 8
+        if self._last_rtt is not None:
+            self.jitter += (abs(rtt - self._last_rtt) - self.jitter) / 16
+        self._last_rtt = rtt
+        return rtt
+
+    def expire(self, now: Optional[float] = None):
+        """Count overdue probes as lost and re-check the bandwidth budget."""
+        now = self.clock() if now is None else now
+        for pid, t0 in list(self._outstanding.items()):
+            if now - t0 > self.loss_timeout:
+                del self._outstanding[pid]
+                self.lost += 1
+                self._outcomes.append(False)
+
+        elapsed = now - self._bytes_t
+        if elapsed >= 1.0:
+            self.bytes_per_s = self._bytes / elapsed
+            self._bytes, self._bytes_t = 0, now
+            if self.sent:
+                per_probe = self.bytes_per_s * self.interval
+                self.interval = max(self.min_interval, per_probe / self.budget_bps)
+
+    def reset(self):
+        """Forget in-flight probes (e.g. after a reconnect) without counting them lost."""
+        self._outstanding.clear()
+        self._last_rtt = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        rtts = sorted(self._rtts)
+        return {
+            "rtt": self.srtt,
+            "rtt_min": rtts[0] if rtts else None,
+            "rtt_p95": rtts[min(len(rtts) - 1, int(len(rtts) * 0.95))] if rtts else None,
+            "jitter": self.jitter,
+            "loss": (self._outcomes.count(False) / len(self._outcomes)) if self._outcomes else 0.0,
+            "probe_hz": 1.0 / self.interval,
+            "bytes_per_s": self.bytes_per_s,
+            "sent": self.sent, "received": self.received, "lost": self.lost,
+        }
+
+    def publish(self) -> Dict[str, Any]:
+        snap = self.snapshot()
+        for cb in list(self._listeners):
+            try:
+                cb(snap)
+            except Exception as e:
+                _listener_log.warning("⚠️ Link listener failed: %s", e)
+        return snap
@@ -0,0 +1,118 @@
+# modules/log.py
+# Non-blocking logging for topside modules (same design as rovside/modules/log.py).
+# Records go through a bounded queue to one writer thread, so console output never
+# stalls the relay's event loop or the controller loop; if the queue is full records are
+# dropped and counted instead of blocking.
+#
+#   from modules import log
+#   _log = log.get("relay")                      # logger "topside.relay"
+#   _rate = log.RateLimit(_log, 1.0)             # hot paths: <= 1 record / s
+#   _rate.warning("send failed: %s", e)          # skipped records are counted in the next one
+#
+# Levels: TOPSIDE_LOG_LEVEL=INFO (default), per module: TOPSIDE_LOG="relay=DEBUG".
+# Supervised child processes configure their own writer on first use.
+# A disabled debug call costs one cached isEnabledFor() check; use %-args, not f-strings.
+
+import atexit, logging, logging.handlers, os, queue, sys, time
+
+ROOT = "topside"
+LEVEL = os.environ.get("TOPSIDE_LOG_LEVEL", "INFO")
+MODULE_LEVELS = os.environ.get("TOPSIDE_LOG", "")    # "name=LEVEL,name=LEVEL"
+LOG_FILE = os.environ.get("TOPSIDE_LOG_FILE")        # optional, in addition to stdout
+QUEUE_SIZE = 10000
+FORMAT = "%(asctime)s.%(msecs)03d %(levelname).1s %(name)s: %(message)s"
+DATEFMT = "%H:%M:%S"
+
+DEBUG, INFO, WARNING, ERROR = logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, q):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Same process, so no pickling: skip the eager format() the base class does and
+        # leave msg % args to the writer thread. Tracebacks are rendered now, while valid.
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_handler = None
+_listener = None
+
+def _parse_level(level):
+    return level if isinstance(level, int) else logging.getLevelName(str(level).upper())
+
+def configure(level=None, module_levels=None):
+    """Idempotent; get() calls it on first use."""
+    global _handler, _listener
+    root = logging.getLogger(ROOT)
+    if _handler is None:
+        fmt = logging.Formatter(FORMAT, DATEFMT)
+        sinks = [logging.StreamHandler(sys.stdout)]
+        if LOG_FILE:
+            sinks.append(logging.FileHandler(LOG_FILE))
+        for s in sinks:
+            s.setFormatter(fmt)
+        _handler = _DroppingQueueHandler(queue.Queue(QUEUE_SIZE))
+        _listener = logging.handlers.QueueListener(_handler.queue, *sinks, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)   # flush what is queued
+        root.addHandler(_handler)
+        root.propagate = False
+    root.setLevel(_parse_level(level or LEVEL))
+    for item in (module_levels if module_levels is not None else MODULE_LEVELS).split(","):
+        if "=" in item:
+            name, lvl = item.split("=", 1)
+            set_level(name.strip(), lvl.strip())
+
+def get(name):
+    if _handler is None:
+        configure()
+    return logging.getLogger(f"{ROOT}.{name}")
+
+def set_level(name, level):
+    logging.getLogger(f"{ROOT}.{name}" if name else ROOT).setLevel(_parse_level(level))
+
+def dropped():
+    return _handler.dropped if _handler else 0
+
+class RateLimit:
+    """
+    At most one record per `interval` seconds through this instance (one per call site).
+    The next record that gets through carries "(+N suppressed)".
+    """
+    def __init__(self, logger, interval=1.0):
+        self.logger = logger
+        self.interval = interval
+        self._last = float("-inf")
+        self._skipped = 0
+
+    def log(self, level, msg, *args, exc_info=None):
+        if not self.logger.isEnabledFor(level):
+            return
+        now = time.monotonic()
+        if now - self._last < self.interval:
+            self._skipped += 1
+            return
+        self._last = now
+        if self._skipped:
+            msg, args = msg + " (+%d suppressed)", args + (self._skipped,)
+            self._skipped = 0
+        self.logger.log(level, msg, *args, exc_info=exc_info)
+
+    def debug(self, msg, *args):
+        self.log(DEBUG, msg, *args)
+
+    def info(self, msg, *args):
+        self.log(INFO, msg, *args)
+
+    def warning(self, msg, *args, exc_info=None):
+        self.log(WARNING, msg, *args, exc_info=exc_info)
@@ -0,0 +1,122 @@
+# modules/metrics.py
+# Tiny Prometheus-text metrics: O(1) counter/gauge updates on the hot path, all formatting
+# deferred to scrape time. Served over plain HTTP by serve() (GET /metrics).
+
+import asyncio
+from typing import Callable, Dict, List, Tuple
+from modules import log
+
+_log = log.get("metrics")
+
+class Counter:
+    __slots__ = ("value",)
+    def __init__(self):
+        self.value = 0
+    def inc(self, n=1):
+        self.value += n
+
+class Gauge:
+    __slots__ = ("value",)
+    def __init__(self):
+        self.value = 0.0
+    def set(self, v):
+        self.value = v
+
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _fmt_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in sorted(labels.items())) + "}"
+
+class Registry:
+    """
+    reg.counter("relay_messages_total", "help", direction="to_rov").inc()
+    reg.callback("relay_rov_rtt_seconds", "help", lambda: relay.link.srtt)
+    Callbacks may also return [(labels_dict, value), ...] for per-client series.
+    """
+    def __init__(self):
+        self._meta: Dict[str, Tuple[str, str]] = {}   # name -> (type, help)
+        self._series: Dict[str, List[Tuple[Dict[str, str], object]]] = {}
+        self._fns: Dict[str, Callable] = {}
+
+    def _add(self, kind, name, help_, labels, obj):
+        self._meta.setdefault(name, (kind, help_))
+        self._series.setdefault(name, []).append((labels, obj))
+        return obj
+
+    def counter(self, name: str, help_: str, **labels) -> Counter:
+        return self._add("counter", name, help_, labels, Counter())
+
+    def gauge(self, name: str, help_: str, **labels) -> Gauge:
+        return self._add("gauge", name, help_, labels, Gauge())
+
+    def callback(self, name: str, help_: str, fn: Callable, kind: str = "gauge"):
+        """Value read from fn() only when scraped (for state that already lives elsewhere)."""
+        self._meta[name] = (kind, help_)
+        self._fns[name] = fn
+
+    def render(self) -> str:
+        lines = []
+        for name, (kind, help_) in self._meta.items():
+            lines.append(f"# HELP {name} {help_}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, obj in self._series.get(name, ()):
+                lines.append(f"{name}{_fmt_labels(labels)} {obj.value}")
+            fn = self._fns.get(name)
+            if fn is not None:
+                try:
+                    v = fn()
+                except Exception:
+                    continue
+                if isinstance(v, list):
+                    for labels, val in v:
+                        if val is not None:
+                            lines.append(f"{name}{_fmt_labels(labels)} {val}")
+                elif v is not None:
+                    lines.append(f"{name} {v}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+async def monitor_loop_lag(gauge_last: Gauge, gauge_max: Gauge, interval: float = 0.1, window: float = 10.0):
+    """How late a sleep(interval) wakes up = how long something else held the loop."""
+    loop = asyncio.get_running_loop()
+    worst, window_end = 0.0, loop.time() + window
+    while True:
+        t0 = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - t0 - interval)
+        gauge_last.set(lag)
+        worst = max(worst, lag)
+        if loop.time() >= window_end:
+            gauge_max.set(worst)
+            worst, window_end = 0.0, loop.time() + window
+        elif worst > gauge_max.value:
+            gauge_max.set(worst)
+
+async def serve(registry: Registry, host: str = "127.0.0.1", port: int = 9108):
+    """Minimal HTTP/1.0 responder; anything but GET /metrics gets a 404."""
+    async def handle(reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readline(), 5)
+            while (await asyncio.wait_for(reader.readline(), 5)) not in (b"\r\n", b"\n", b""):
+                pass   # skip headers
+            parts = request.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                body, status = registry.render().encode(), "200 OK"
+                ctype = "text/plain; version=0.0.4; charset=utf-8"
+            else:
+                body, status, ctype = b"not found\n", "404 Not Found", "text/plain"
+            writer.write(f"HTTP/1.0 {status}\r\nContent-Type: {ctype}\r\n"
+                         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        except Exception:
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    _log.info("📈 Metrics on http://%s:%d/metrics", host, port)
+    return server
@@ -20,6 +20,25 @@ def send_command(command):
     if queue_ref and main_loop:
         asyncio.run_coroutine_threadsafe(queue_ref.put(command), main_loop)
 
+def _build(send):
+    root = tk.Tk()
+    root.title("ROV Module Launcher")
+    root.geometry("360x220")
+    root.resizable(False, False)
+
+    row = 0
+    for label, (start_cmd, stop_cmd) in BUTTONS.items():
+        tk.Label(root, text=label, font=("Arial", 10)).grid(row=row, column=0, sticky="w", padx=10, pady=5)
+        if start_cmd:
+            btn_text = "Quit" if label == "Quit All" else "Start"
+            tk.Button(root, text=btn_text, width=10, command=lambda c=start_cmd: send(c)).grid(row=row, column=1, padx=5)
+
+        if stop_cmd:
+            tk.Button(root, text="Stop", width=10, command=lambda c=stop_cmd: send(c)).grid(row=row, column=2, padx=5)
+
+        row += 1
+    return root
+
 # GUI setup function
 def launch_ui(command_queue, loop):
     global queue_ref, main_loop
@@ -27,23 +46,20 @@ def launch_ui(command_queue, loop):
     main_loop = loop
 
     def build():
-        root = tk.Tk()
-        root.title("ROV Module Launcher")
-        root.geometry("360x220")
-        root.resizable(False, False)
+        _build(send_command).mainloop()
 
-        row = 0
-        for label, (start_cmd, stop_cmd) in BUTTONS.items():
-            tk.Label(root, text=label, font=("Arial", 10)).grid(row=row, column=0, sticky="w", padx=10, pady=5)
-            if start_cmd:
-                btn_text = "Quit" if label == "Quit All" else "Start"
-                tk.Button(root, text=btn_text, width=10, command=lambda c=start_cmd: send_command(c)).grid(row=row, column=1, padx=5)
-
-            if stop_cmd:
-                tk.Button(root, text="Stop", width=10, command=lambda c=stop_cmd: send_command(c)).grid(row=row, column=2, padx=5)
+    threading.Thread(target=build, daemon=True).start()
 
-            row += 1
+# Supervised-process variant (modules/supervisor.py): button presses go over the pipe
+def child_main(channel):
+    channel.start_heartbeat_thread()
+    root = _build(channel.command)
 
-        root.mainloop()
+    def poll_stop():
+        if channel.stop_requested():
+            root.destroy()
+        else:
+            root.after(200, poll_stop)
 
-    threading.Thread(target=build, daemon=True).start()
+    poll_stop()
+    root.mainloop()
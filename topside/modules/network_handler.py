@@ -1,15 +1,46 @@
 # modules/network_handler.py
 import asyncio
+import random
+import time
 import websockets
 import json
+from urllib.parse import urlparse
+from modules.clock_sync import ClockSync
+from modules.link_monitor import LinkMonitor
+from modules import log, metrics
+from modules.outbound_scheduler import OutboundScheduler, encode_frame
+from modules.subscriptions import Subscriber, is_subscription, topic_of, union_request
+from modules.udp_channel import UdpControlChannel, is_continuous, CONTINUOUS_ACTIONS
 
 REMOTE_ROV_WS = "ws://raspberrypi.local:8765"
 # REMOTE_ROV_WS = "ws://10.253.0.10:8765"
 LOCAL_LISTEN_PORT = 9999
+LINK_PROBE_HZ = 10           # probes/s to the ROV (RTT, jitter, loss + clock samples)
+LINK_BYTES_BUDGET = 2500     # bytes/s the probe stream may use, both directions together
+LINK_PUBLISH_INTERVAL = 1.0  # seconds between link/clock reports
+USE_UDP_CONTROL = False      # send continuous setpoints over UDP instead of the websocket
+                             # (the ROV must be started with ROV_UDP_PORT set to match)
+ROV_UDP_PORT = 8766
+RECONNECT_MIN = 0.1          # first retry after a drop (seconds)
+RECONNECT_MAX = 3.0          # backoff ceiling
+# Streams whose newest message is remembered and replayed right after a reconnect
+RESYNC_ACTIONS = CONTINUOUS_ACTIONS | {("stream", "change_settings")}
+_STAMP_KEYS = ("src", "seq", "ts", "ack")   # dropped from a remembered message before replay
+METRICS_PORT = 9108          # Prometheus text on http://localhost:9108/metrics (None = off)
 
 # Global pointer to the current relay instance
 relay_instance = None
 
+_log = log.get("relay")
+# These can fire per message or per retry while the link flaps; one line per second each
+_retry_log = log.RateLimit(_log, 1.0)
+_rov_send_log = log.RateLimit(_log, 1.0)
+_local_send_log = log.RateLimit(_log, 1.0)
+
+def _write_buffer(ws):
+    transport = getattr(ws, "transport", None)
+    return transport.get_write_buffer_size() if transport is not None else None
+
 
 # ✅ Modern handler for websockets >=11.x
 async def handle_gui_or_module(websocket):
@@ -17,15 +48,79 @@ async def handle_gui_or_module(websocket):
     if relay_instance:
         await relay_instance.handle_local_client(websocket)
     else:
-        print("❌ Relay instance not set — can't forward client connection.")
+        _log.error("❌ Relay instance not set — can't forward client connection.")
 
 
 class NetworkRelay:
     def __init__(self):
         self.local_clients = set()
         self.rov_ws = None
+        self.clock = ClockSync(window=64)   # relay_instance.clock.to_local(ts) converts ROV timestamps
+        self.link = LinkMonitor(probe_hz=LINK_PROBE_HZ, budget_bps=LINK_BYTES_BUDGET)
+        self.udp = None            # UdpControlChannel when USE_UDP_CONTROL
+        self.last_state = {}       # (type, action) -> newest message, see RESYNC_ACTIONS
+        self.reconnects = 0
+        self.dropped_while_down = 0      # frames lost while the ROV link was down
+        self.coalesced_while_down = 0    # frames folded into last_state while down
+        self.subs = {}                   # local websocket -> Subscriber
+        self._upstream_subs = None       # last subscription frame sent to the ROV
+        self.resync_latency = None # link restored -> first replayed command executed (s)
+        self.resync_refused = 0    # replayed commands the ROV refused
+        self._resync_id = None
+        self._resync_t = None      # set until the first replayed command is acked ok
+        self._resync_pending = 0   # acks still expected for _resync_id
+        # Stamps replays with the relay's own src and fresh seq/ts (policies unused)
+        self.sched = OutboundScheduler({})
+        self._ever_connected = False
+        self._init_metrics(metrics.REGISTRY)
+
+    def _init_metrics(self, reg):
+        # Hot-path counters are plain attribute increments; everything else is read at scrape time
+        def pair(direction):
+            return (reg.counter("relay_frames_total", "Websocket frames through the relay", direction=direction),
+                    reg.counter("relay_bytes_total", "Payload bytes through the relay", direction=direction))
+        self.m_from_local = pair("from_local")
+        self.m_to_rov = pair("to_rov")
+        self.m_from_rov = pair("from_rov")
+        self.m_to_local = pair("to_local")
+        self.m_messages_from_local = reg.counter("relay_messages_total", "Control messages from local clients (batch items)")
+        reg.callback("relay_udp_datagrams_total", "Datagrams sent on the UDP control channel",
+                     lambda: self.udp.sent if self.udp else 0, kind="counter")
+        reg.callback("relay_frames_coalesced_total", "Frames folded into the resync snapshot while the ROV link was down",
+                     lambda: self.coalesced_while_down, kind="counter")
+        reg.callback("relay_frames_dropped_total", "Frames lost while the ROV link was down",
+                     lambda: self.dropped_while_down, kind="counter")
+        reg.callback("relay_log_dropped_total", "Log records dropped because the log queue was full",
+                     log.dropped, kind="counter")
+        reg.callback("relay_reconnects_total", "ROV reconnects", lambda: self.reconnects, kind="counter")
+        reg.callback("relay_rov_connected", "1 while the ROV websocket is up", lambda: int(self.rov_ws is not None))
+        reg.callback("relay_local_clients", "Connected local websocket clients", lambda: len(self.local_clients))
+        reg.callback("relay_client_send_queue_bytes", "Bytes waiting in each local client's send buffer",
+                     self._client_queue_depths)
+        reg.callback("relay_rov_send_queue_bytes", "Bytes waiting in the ROV websocket send buffer",
+                     lambda: _write_buffer(self.rov_ws))
+        reg.callback("relay_rov_rtt_seconds", "Smoothed probe RTT to the ROV", lambda: self.link.srtt)
+        reg.callback("relay_rov_jitter_seconds", "Probe RTT jitter", lambda: self.link.jitter)
+        reg.callback("relay_rov_probe_loss_ratio", "Lost probes over the monitor window",
+                     lambda: self.link.snapshot()["loss"])
+        reg.callback("relay_clock_offset_seconds", "ROV clock minus local clock", lambda: self.clock.offset_at())
+        reg.callback("relay_resync_latency_seconds", "Link restore to first replayed command executed",
+                     lambda: self.resync_latency)
+        reg.callback("relay_resync_refused_total", "Replayed commands the ROV refused",
+                     lambda: self.resync_refused, kind="counter")
+        self.m_loop_lag = reg.gauge("relay_event_loop_lag_seconds", "Last measured event-loop lag")
+        self.m_loop_lag_max = reg.gauge("relay_event_loop_lag_max_seconds", "Worst event-loop lag in the last 10 s")
+
+    def _client_queue_depths(self):
+        out = []
+        for ws in list(self.local_clients):
+            addr = getattr(ws, "remote_address", None)
+            client = f"{addr[0]}:{addr[1]}" if addr else str(id(ws))
+            out.append(({"client": client}, _write_buffer(ws)))
+        return out
 
     async def connect_to_rov(self):
+        delay = RECONNECT_MIN
         while True:
             try:
                 # Keep pings on the REMOTE link (not on localhost).
@@ -33,59 +128,263 @@ class NetworkRelay:
                     REMOTE_ROV_WS,
                     ping_interval=20,   # send ping every 20s
                     ping_timeout=60,    # allow 60s for pong
-                    open_timeout=10,
+                    open_timeout=3,
                     close_timeout=5,
                     max_queue=None,
                 )
-                print(f"🔌 Connected to ROV at {REMOTE_ROV_WS}")
+                _log.info("🔌 Connected to ROV at %s", REMOTE_ROV_WS)
+                if self._ever_connected:
+                    self.reconnects += 1
+                self._ever_connected = True
+                self.link.reset()
+                self._upstream_subs = None
+                await self._resync()
+                await self._update_upstream_subs()
                 return
             except Exception as e:
-                print(f"⚠️ ROV connection failed: {e} — retrying in 3s")
-                await asyncio.sleep(3)
+                # Exponential backoff with jitter, so a flapping link isn't hammered in lockstep
+                wait = random.uniform(delay / 2, delay)
+                _retry_log.warning("⚠️ ROV connection failed: %s — retrying in %.2fs", e, wait)
+                await asyncio.sleep(wait)
+                delay = min(RECONNECT_MAX, delay * 2)
+
+    async def _resync(self):
+        """
+        Replay the last known state of each continuous stream in one frame, with an ack.
+        The copies are stamped afresh by the relay's scheduler: with the sender's original
+        src/seq/ts the ROV refuses them as out_of_order (seq already ran) or too_old.
+        """
+        if not self.last_state:
+            return
+        self._resync_t = time.monotonic()
+        self._resync_id = f"resync-{self.reconnects}"
+        self._resync_pending = len(self.last_state)
+        msgs = [{k: v for k, v in m.items() if k not in _STAMP_KEYS} for m in self.last_state.values()]
+        frame = encode_frame([dict(m, ack=self._resync_id) for m in self.sched.stamp(msgs)])
+        await self.rov_ws.send(frame)
+        _log.info("🔁 Replayed %d stream(s) to the ROV", len(self.last_state))
+
+    def _remember(self, items):
+        for m in items:
+            if isinstance(m, dict):
+                key = (m.get("type"), m.get("action"))
+                if key in RESYNC_ACTIONS:
+                    self.last_state[key] = m
+
+    async def _update_upstream_subs(self):
+        """Ask the ROV for the union of what local clients subscribe to (only when it changes)."""
+        frame = encode_frame(union_request(self.subs.values()))
+        if frame == self._upstream_subs or self.rov_ws is None:
+            return
+        try:
+            await self.rov_ws.send(frame)
+            self._upstream_subs = frame
+        except Exception as e:
+            _rov_send_log.warning("⚠️ Failed to send subscriptions to ROV: %s", e)
 
     async def handle_local_client(self, websocket):
+        self.subs[websocket] = Subscriber()
         self.local_clients.add(websocket)
-        print(f"🖥️ Local client connected ({len(self.local_clients)} total)")
+        await self._update_upstream_subs()
+        _log.info("🖥️ Local client connected (%d total)", len(self.local_clients))
         try:
             # Drain messages from the local client and forward to the ROV
             async for message in websocket:
-                if self.rov_ws:
-                    try:
-                        await self.rov_ws.send(message)
-                    except Exception as e:
-                        print(f"⚠️ Failed to send to ROV: {e}")
+                self.m_from_local[0].inc()
+                self.m_from_local[1].inc(len(message))
+                await self.forward(message, websocket)
         except Exception as e:
-            print(f"⚠️ Local client error: {e}")
+            _log.warning("⚠️ Local client error: %s", e)
         finally:
             self.local_clients.discard(websocket)
-            print("🖥️ Local client disconnected")
+            self.subs.pop(websocket, None)
+            _log.info("🖥️ Local client disconnected")
+            await self._update_upstream_subs()
+
+    async def forward(self, message, websocket=None):
+        """Send one local frame to the ROV; continuous setpoints take the UDP path if enabled."""
+        try:
+            data = json.loads(message)
+        except json.JSONDecodeError:
+            await self._send_rov(message)   # not ours to judge; pass it on as before
+            return
+        items = data if isinstance(data, list) else [data]
+        if any(is_subscription(m) for m in items):
+            # Subscriptions are per local client; the ROV only ever sees the union
+            sub = self.subs.get(websocket)
+            for m in items:
+                if is_subscription(m) and sub is not None:
+                    sub.apply(m)
+            await self._update_upstream_subs()
+            items = [m for m in items if not is_subscription(m)]
+            if not items:
+                return
+            message = None
+        await self._forward_items(items, message)
+
+    async def submit(self, items):
+        """
+        In-process entry point (input_controllers running in this process): same path as a
+        frame from a local websocket client, minus the loopback hop and the JSON decode.
+        """
+        await self._forward_items(items, None)
+
+    async def _forward_items(self, items, message):
+        self.m_messages_from_local.inc(len(items))
+        self._remember(items)
+        if self.udp is not None:
+            fast = [m for m in items if is_continuous(m)]
+            if fast:
+                self.udp.send(fast)
+                items = [m for m in items if not is_continuous(m)]
+                message = None
+        if self.rov_ws is None:
+            # Link is down: don't write into a dead socket. Setpoints are already in
+            # last_state and get replayed on reconnect; anything else is lost.
+            if all(isinstance(m, dict) and (m.get("type"), m.get("action")) in RESYNC_ACTIONS for m in items):
+                self.coalesced_while_down += 1
+            else:
+                self.dropped_while_down += 1
+            return
+        if message is None:
+            message = encode_frame(items)
+            if message is None:
+                return
+        await self._send_rov(message)
+
+    async def _send_rov(self, message):
+        if self.rov_ws is None:
+            self.dropped_while_down += 1
+            return
+        try:
+            await self.rov_ws.send(message)
+            self.m_to_rov[0].inc()
+            self.m_to_rov[1].inc(len(message))
+        except Exception as e:
+            _rov_send_log.warning("⚠️ Failed to send to ROV: %s", e)
 
     async def receive_from_rov(self):
         while True:
             try:
                 async for message in self.rov_ws:
+                    self.m_from_rov[0].inc()
+                    self.m_from_rov[1].inc(len(message))
+                    if '"clock"' in message and self._handle_clock_reply(message):
+                        continue
+                    if self._resync_id and self._resync_id in message and self._handle_resync_ack(message):
+                        continue
                     # Fan-out to all currently connected local clients
-                    for client in list(self.local_clients):
-                        try:
-                            await client.send(message)
-                        except Exception as e:
-                            print(f"⚠️ Failed to send to client: {e}")
-                            self.local_clients.discard(client)
+                    await self.send_local(message)
             except websockets.ConnectionClosed:
-                print("🔌 ROV disconnected. Reconnecting...")
-                await self.connect_to_rov()
+                _log.warning("🔌 ROV disconnected. Reconnecting...")
             except Exception as e:
-                print(f"❌ Unexpected ROV error: {e}")
-                await asyncio.sleep(3)
+                _log.error("❌ Unexpected ROV error: %s", e)
+            self.rov_ws = None
+            await self.connect_to_rov()
+
+    def _handle_resync_ack(self, message):
+        try:
+            data = json.loads(message)
+        except json.JSONDecodeError:
+            return False
+        if not (isinstance(data, dict) and data.get("type") == "ack" and data.get("id") == self._resync_id):
+            return False
+        self._resync_pending -= 1
+        if not data.get("ok"):
+            self.resync_refused += 1
+            _log.warning("⚠️ ROV refused a replayed command: %s", data.get("reason"))
+        elif self._resync_t is not None:
+            self.resync_latency = time.monotonic() - self._resync_t
+            self._resync_t = None
+            _log.info("⏱️ Link restored -> first command executed in %.1f ms", self.resync_latency * 1000)
+        if self._resync_pending <= 0:
+            self._resync_id = None   # every replayed command answered, ok or not
+        return True
+
+    def _handle_clock_reply(self, message):
+        """Consume probe replies here; returns True if the message was one."""
+        t3 = self.clock.clock()
+        try:
+            data = json.loads(message)
+        except json.JSONDecodeError:
+            return False
+        if not (isinstance(data, dict) and data.get("type") == "clock" and data.get("event") == "probe"):
+            return False
+        self.link.on_reply(data.get("id"), t3, nbytes=len(message))
+        self.clock.on_reply(data, t3)
+        return True
+
+    async def send_local(self, msg, topic=None):
+        topic = topic or topic_of(msg)
+        now = time.monotonic()
+        for client in list(self.local_clients):
+            sub = self.subs.get(client)
+            if sub is not None and not sub.wants(topic, now):
+                continue
+            try:
+                await client.send(msg)
+                self.m_to_local[0].inc()
+                self.m_to_local[1].inc(len(msg))
+            except Exception as e:
+                _local_send_log.warning("⚠️ Failed to send to client: %s", e)
+                self.local_clients.discard(client)
+
+    async def _publish_clock(self):
+        """Hand the estimate to the ROV (for command ages) and to local clients."""
+        snap = self.clock.snapshot()
+        if not snap["synced"]:
+            return
+        if self.rov_ws:
+            try:
+                await self.rov_ws.send(json.dumps({
+                    "type": "clock", "action": "sync", "offset": snap["offset"],
+                    "uncertainty": snap["uncertainty"], "drift_ppm": snap["drift_ppm"]
+                }, separators=(',',':')))
+            except Exception:
+                pass
+        await self.send_local(json.dumps(dict(snap, type="clock", event="sync")))
+
+    async def probe_loop(self):
+        """Small probe stream to the ROV; each reply is both a link and a clock sample."""
+        loop = asyncio.get_running_loop()
+        next_publish = loop.time() + LINK_PUBLISH_INTERVAL
+        while True:
+            await asyncio.sleep(self.link.interval)
+            if self.rov_ws:
+                probe = self.clock.make_probe()
+                frame = json.dumps(probe, separators=(',',':'))
+                try:
+                    await self.rov_ws.send(frame)
+                    self.link.sent_probe(probe["id"], probe["t0"], nbytes=len(frame))
+                except Exception:
+                    pass   # link down; receive_from_rov handles reconnects
+            if loop.time() >= next_publish:
+                next_publish += LINK_PUBLISH_INTERVAL
+                self.link.expire()
+                snap = self.link.publish()   # in-process listeners (relay_instance.link)
+                await self.send_local(json.dumps(dict(snap, type="link", event="quality")))
+                await self._publish_clock()
 
     async def run(self):
         global relay_instance
         relay_instance = self
 
         await self.connect_to_rov()
+        if USE_UDP_CONTROL:
+            host = urlparse(REMOTE_ROV_WS).hostname
+            self.udp = await UdpControlChannel.open(host, ROV_UDP_PORT)
+            _log.info("📨 UDP control channel to %s:%d", host, ROV_UDP_PORT)
         asyncio.create_task(self.receive_from_rov())
+        asyncio.create_task(self.probe_loop())
+        if METRICS_PORT:
+            asyncio.create_task(metrics.monitor_loop_lag(self.m_loop_lag, self.m_loop_lag_max))
+            try:
+                await metrics.serve(metrics.REGISTRY, "127.0.0.1", METRICS_PORT)
+            except OSError as e:
+                # Observability only; a busy port (second relay, leftover process) must not stop control
+                _log.warning("⚠️ Metrics endpoint disabled: %s", e)
 
-        print(f"🧩 Relay listening on ws://localhost:{LOCAL_LISTEN_PORT}")
+        _log.info("🧩 Relay listening on ws://localhost:%d", LOCAL_LISTEN_PORT)
         # 🔕 Disable pings on the LOCAL hop (controller is send-only and doesn’t recv pings).
         server = await websockets.serve(
             handle_gui_or_module,
@@ -0,0 +1,92 @@
+# modules/outbound_scheduler.py
+# Owns the topside send-timing policies and gathers everything due on a tick into ONE frame.
+
+import json, time, uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+@dataclass(frozen=True)
+class Policy:
+    min_interval: float = 0.0          # min seconds between sends when the value changes
+    keepalive: Optional[float] = None  # resend an unchanged value after this many seconds
+
+class OutboundScheduler:
+    """
+    Continuous streams (servo, motion, ...) hold only their newest message and go out
+    according to their Policy. One-shot messages (bindings, raw gamepad events) are
+    queued in order and always go out on the next tick.
+
+      sched.update("motion", {...})   # newest setpoint for a stream
+      sched.push({...})               # one-shot
+      frame = sched.frame()           # None, one JSON object, or a JSON array (batch)
+
+    Every message that leaves is stamped with "src" (random id per scheduler), a
+    monotonically increasing "seq" and the origin "ts", so the ROV can refuse
+    commands that are out of order or too old.
+    """
+    def __init__(self, policies: Dict[str, Policy], clock=time.monotonic):
+        self.policies = dict(policies)
+        self.clock = clock
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        self._sent: Dict[str, Dict[str, Any]] = {}
+        self._sent_t: Dict[str, float] = {}
+        self._oneshots: List[Dict[str, Any]] = []
+        self.src = uuid.uuid4().hex[:8]
+        self._seq = 0
+
+    def update(self, stream: str, msg: Dict[str, Any]):
+        if stream not in self.policies:
+            raise KeyError(f"No policy for stream '{stream}'")
+        self._latest[stream] = msg
+
+    def push(self, msg: Dict[str, Any]):
+        self._oneshots.append(msg)
+
+    def reset(self, stream: Optional[str] = None):
+        """Forget what was sent, so the next update goes out as a change."""
+        for s in ([stream] if stream else list(self._sent)):
+            self._sent.pop(s, None)
+            self._sent_t.pop(s, None)
+
+    def stamp(self, msgs: List[Dict[str, Any]], now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Copies of msgs carrying src/seq/ts (originals are left untouched for change detection)."""
+        t = self.clock() if now is None else now
+        out = []
+        for msg in msgs:
+            self._seq += 1
+            out.append(dict(msg, src=self.src, seq=self._seq, ts=t))
+        return out
+
+    def _due(self, stream: str, now: float) -> bool:
+        msg = self._latest.get(stream)
+        if msg is None:
+            return False
+        pol = self.policies[stream]
+        last = self._sent.get(stream)
+        elapsed = now - self._sent_t.get(stream, float("-inf"))
+        if last is None or msg != last:
+            return elapsed >= pol.min_interval
+        return pol.keepalive is not None and elapsed >= pol.keepalive
+
+    def collect(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """All messages due at `now`: continuous streams in policy order, then one-shots FIFO."""
+        t = self.clock() if now is None else now
+        out = []
+        for stream in self.policies:
+            if self._due(stream, t):
+                msg = self._latest[stream]
+                out.append(msg)
+                self._sent[stream] = msg
+                self._sent_t[stream] = t
+        out.extend(self._oneshots)
+        self._oneshots.clear()
+        return self.stamp(out, t)
+
+    def frame(self, now: Optional[float] = None) -> Optional[str]:
+        return encode_frame(self.collect(now))
+
+def encode_frame(msgs: List[Dict[str, Any]]) -> Optional[str]:
+    """One message -> plain object (what older servers expect); several -> batch array."""
+    if not msgs:
+        return None
+    return json.dumps(msgs[0] if len(msgs) == 1 else msgs, separators=(',',':'))
@@ -0,0 +1,90 @@
+# modules/subscriptions.py
+# Topic subscriptions for the relay's local clients (same protocol as rov_control_server):
+#   {"type":"server","action":"subscribe","topics":["telemetry"],"max_hz":{"telemetry":2},"replace":true}
+#   {"type":"server","action":"unsubscribe","topics":["motor"]}
+# A topic is a message's "type"; "*" means every topic and is what a new client starts with.
+# The relay answers these itself and asks the ROV for the union of what its clients want.
+# Note that direct replies (acks, stats, ...) travel as topics too once a client drops "*".
+
+import re
+from typing import Dict, Iterable, List, Optional
+
+_TOPIC_RE = re.compile(r'"type"\s*:\s*"([^"]*)"')
+
+def topic_of(message: str) -> Optional[str]:
+    """Topic of an already-serialized message: its first "type" key."""
+    m = _TOPIC_RE.search(message)
+    return m.group(1) if m else None
+
+def is_subscription(msg) -> bool:
+    return (isinstance(msg, dict) and msg.get("type") == "server"
+            and msg.get("action") in ("subscribe", "unsubscribe"))
+
+class Subscriber:
+    __slots__ = ("rules", "excluded", "last")
+    def __init__(self):
+        self.rules: Dict[str, float] = {"*": 0.0}   # topic -> min seconds between messages (0 = all)
+        self.excluded = set()                        # topics taken out of "*"
+        self.last: Dict[str, float] = {}
+
+    def apply(self, msg):
+        topics = msg.get("topics", [])
+        topics = [topics] if isinstance(topics, str) else list(topics)
+        if msg.get("action") == "subscribe":
+            self.subscribe(topics, msg.get("max_hz"), bool(msg.get("replace")))
+        else:
+            self.unsubscribe(topics)
+
+    def subscribe(self, topics: Iterable[str], max_hz=None, replace=False):
+        if replace:
+            self.rules.clear()
+            self.excluded.clear()
+        for t in topics:
+            hz = max_hz.get(t) if isinstance(max_hz, dict) else max_hz
+            self.rules[t] = 1.0 / float(hz) if hz else 0.0
+            self.excluded.discard(t)
+
+    def unsubscribe(self, topics: Iterable[str]):
+        for t in topics:
+            self.rules.pop(t, None)
+            if t != "*" and "*" in self.rules:
+                self.excluded.add(t)
+
+    def wants(self, topic, now: float) -> bool:
+        if topic in self.excluded:
+            return False
+        interval = self.rules.get(topic, self.rules.get("*"))
+        if interval is None:
+            return False
+        if interval:
+            if now - self.last.get(topic, float("-inf")) < interval:
+                return False
+            self.last[topic] = now
+        return True
+
+def union_request(subscribers: Iterable[Subscriber]) -> List[dict]:
+    """
+    Upstream subscribe (replace) covering every subscriber at the fastest rate any of them
+    wants, plus an unsubscribe for topics that every "*" subscriber excluded.
+    """
+    subscribers = list(subscribers)
+    rules: Dict[str, float] = {}
+    excluded = None
+    for t in {t for sub in subscribers for t in sub.rules}:
+        # what each subscriber would take of t: its own rule, else its "*" rule
+        wanted = [sub.rules.get(t, None if t in sub.excluded else sub.rules.get("*")) for sub in subscribers]
+        wanted = [i for i in wanted if i is not None]
+        if wanted:
+            rules[t] = min(wanted)
+    for sub in subscribers:
+        if "*" in sub.rules:
+            excluded = set(sub.excluded) if excluded is None else excluded & sub.excluded
+    msg = {"type": "server", "action": "subscribe", "replace": True, "topics": sorted(rules)}
+    limited = {t: round(1.0 / i, 3) for t, i in rules.items() if i}
+    if limited:
+        msg["max_hz"] = limited
+    out = [msg]
+    if excluded and excluded - set(rules):
+        # only drop upstream what no client asked for by name
+        out.append({"type": "server", "action": "unsubscribe", "topics": sorted(excluded - set(rules))})
+    return out
@@ -0,0 +1,294 @@
+# modules/supervisor.py
+# Runs topside modules as child processes: heartbeats, restart with backoff, CPU/RSS per
+# child, and a pipe back to the main process (relay / command queue).
+
+import asyncio
+import importlib
+import multiprocessing as mp
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from modules import log
+
+try:
+    import psutil   # optional; without it CPU/RSS come from /proc (Linux) or are left empty
+except ImportError:
+    psutil = None
+
+HEARTBEAT_INTERVAL = 0.5    # child -> parent
+HEARTBEAT_TIMEOUT = 3.0     # parent restarts a child that is silent this long
+RESTART_MIN = 0.5           # first restart delay (seconds), doubles up to RESTART_MAX
+RESTART_MAX = 10.0
+STABLE_AFTER = 30.0         # a child up this long gets its backoff reset
+STOP_TIMEOUT = 3.0          # graceful stop before terminate()
+
+_log = log.get("supervisor")
+
+# ---------------- Child side ----------------
+
+class ChildChannel:
+    """
+    What a child gets instead of the relay. Quacks like NetworkRelay.submit(), so
+    input_controllers.run(..., relay=channel) works unchanged in a child process.
+    """
+    def __init__(self, conn):
+        self.conn = conn
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def send(self, kind: str, payload: Any = None):
+        with self._lock:
+            self.conn.send((kind, payload))
+
+    async def submit(self, msgs):
+        self.send("msgs", msgs)
+
+    def command(self, cmd: str):
+        """Put a command on the parent's TopsideController command queue."""
+        self.send("cmd", cmd)
+
+    def stop_requested(self) -> bool:
+        """Non-blocking check for the parent's stop message (poll from the child's main thread)."""
+        # A pipe message rather than a multiprocessing.Event: a child killed while
+        # waiting on an Event can leave the parent's Event.set() blocked forever.
+        try:
+            while not self._stop.is_set() and self.conn.poll():
+                if self.conn.recv()[0] == "stop":
+                    self._stop.set()
+        except (EOFError, OSError):
+            self._stop.set()   # parent is gone
+        return self._stop.is_set()
+
+    def start_heartbeat_thread(self):
+        """For children whose main thread is not an asyncio loop (e.g. tkinter)."""
+        def beat():
+            while not self._stop.wait(HEARTBEAT_INTERVAL):
+                try:
+                    self.send("hb", time.monotonic())
+                except (OSError, EOFError):
+                    return
+        threading.Thread(target=beat, daemon=True).start()
+
+def run_async_child(channel: ChildChannel, coro_factory: Callable[[ChildChannel], Awaitable]):
+    """
+    Run coro_factory(channel) until it ends or the parent asks to stop. Heartbeats come
+    from this loop, so a child whose event loop is stuck also stops beating.
+    """
+    async def main():
+        work = asyncio.create_task(coro_factory(channel))
+        next_hb = 0.0
+        while not work.done():
+            if channel.stop_requested():
+                work.cancel()
+                break
+            if time.monotonic() >= next_hb:
+                channel.send("hb", time.monotonic())
+                next_hb = time.monotonic() + HEARTBEAT_INTERVAL
+            await asyncio.wait({work}, timeout=0.1)
+        await asyncio.gather(work, return_exceptions=True)
+    asyncio.run(main())
+
+def _child_entry(target, conn, args):
+    if isinstance(target, str):
+        # "package.module:function" -> imported only in the child (keeps pygame etc. out of the parent)
+        mod_name, func_name = target.split(":")
+        target = getattr(importlib.import_module(mod_name), func_name)
+    channel = ChildChannel(conn)
+    try:
+        target(channel, *args)
+    except KeyboardInterrupt:
+        pass
+
+# ---------------- Parent side ----------------
+
+@dataclass
+class ModuleSpec:
+    name: str
+    target: Any                          # target(channel, *args), or "pkg.module:function"
+    args: Tuple = ()
+    restart: bool = True
+
+@dataclass
+class _Child:
+    spec: ModuleSpec
+    proc: Optional[mp.Process] = None
+    conn: Any = None
+    wanted: bool = False                 # False once stop() was asked for
+    started_at: float = 0.0
+    last_hb: float = 0.0
+    restarts: int = 0
+    backoff: float = RESTART_MIN
+    next_start: float = 0.0
+    usage: Dict[str, Any] = field(default_factory=dict)
+    _cpu_prev: Optional[Tuple[float, float]] = None
+
+class Supervisor:
+    """
+    sup = Supervisor(on_message)           # on_message(name, kind, payload) is async
+    sup.add(ModuleSpec("input_controllers", "modules.input_controllers:child_main", (ws_url,)))
+    await sup.start("input_controllers"); await sup.stop("input_controllers")
+    asyncio.create_task(sup.run())         # health checks + restarts + message pump
+    """
+    def __init__(self, on_message: Callable[[str, str, Any], Awaitable[None]]):
+        self.on_message = on_message
+        self.children: Dict[str, _Child] = {}
+        self._inbox: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ctx = mp.get_context("spawn")   # same behaviour on Windows and Linux
+
+    def add(self, spec: ModuleSpec):
+        self.children[spec.name] = _Child(spec)
+
+    def is_running(self, name: str) -> bool:
+        c = self.children.get(name)
+        return bool(c and c.proc and c.proc.is_alive())
+
+    async def start(self, name: str):
+        c = self.children[name]
+        c.wanted = True
+        if not self.is_running(name):
+            self._spawn(c)
+
+    async def stop(self, name: str):
+        c = self.children[name]
+        c.wanted = False
+        await self._kill(c)
+
+    async def stop_all(self):
+        for name in list(self.children):
+            await self.stop(name)
+
+    def _spawn(self, c: _Child):
+        self._loop = self._loop or asyncio.get_running_loop()
+        self._inbox = self._inbox or asyncio.Queue()
+        parent_conn, child_conn = self._ctx.Pipe()
+        c.proc = self._ctx.Process(target=_child_entry, name=f"topside-{c.spec.name}",
+                                   args=(c.spec.target, child_conn, c.spec.args),
+                                   daemon=True)
+        c.proc.start()
+        child_conn.close()
+        c.conn = parent_conn
+        c.started_at = c.last_hb = time.monotonic()
+        c._cpu_prev = None
+        threading.Thread(target=self._reader, args=(c.spec.name, parent_conn),
+                         daemon=True).start()
+        _log.info("🧒 Started %s (pid %d)", c.spec.name, c.proc.pid)
+
+    def _reader(self, name, conn):
+        # One thread per child: blocking recv() works the same on every platform
+        while True:
+            try:
+                item = conn.recv()
+            except (EOFError, OSError):
+                return
+            self._loop.call_soon_threadsafe(self._inbox.put_nowait, (name, item))
+
+    async def _kill(self, c: _Child):
+        if c.proc is None:
+            return
+        proc, c.proc = c.proc, None
+        try:
+            c.conn.send(("stop", None))
+        except (OSError, EOFError):
+            pass   # already dead
+        await asyncio.to_thread(proc.join, STOP_TIMEOUT)
+        if proc.is_alive():
+            proc.terminate()
+            await asyncio.to_thread(proc.join, 1.0)
+        try:
+            c.conn.close()
+        except Exception:
+            pass
+        _log.info("🛑 %s stopped (exit %s)", c.spec.name, proc.exitcode)
+
+    async def _pump(self):
+        while True:
+            name, (kind, payload) = await self._inbox.get()
+            c = self.children.get(name)
+            if kind == "hb":
+                if c:
+                    c.last_hb = time.monotonic()
+                continue
+            try:
+                await self.on_message(name, kind, payload)
+            except Exception as e:
+                _log.warning("⚠️ Message from %s failed: %s", name, e, exc_info=True)
+
+    async def _check(self):
+        now = time.monotonic()
+        for c in self.children.values():
+            if not c.wanted:
+                continue
+            if c.proc is None:
+                if now >= c.next_start:
+                    c.restarts += 1
+                    self._spawn(c)
+                continue
+            dead = not c.proc.is_alive()
+            silent = (now - c.last_hb) > HEARTBEAT_TIMEOUT
+            if dead and c.proc.exitcode == 0:
+                # Finished on its own (e.g. no joystick, window closed): not a crash
+                c.wanted = False
+                await self._kill(c)
+                continue
+            if dead or silent:
+                why = f"exited ({c.proc.exitcode})" if dead else f"no heartbeat for {now - c.last_hb:.1f}s"
+                await self._kill(c)
+                if not c.spec.restart:
+                    c.wanted = False
+                    _log.error("❌ %s %s; not restarting", c.spec.name, why)
+                    continue
+                if now - c.started_at > STABLE_AFTER:
+                    c.backoff = RESTART_MIN
+                c.next_start = now + c.backoff
+                _log.warning("⚠️ %s %s; restarting in %.1fs", c.spec.name, why, c.backoff)
+                c.backoff = min(RESTART_MAX, c.backoff * 2)
+            else:
+                c.usage = self._usage(c)
+
+    def _usage(self, c: _Child) -> Dict[str, Any]:
+        pid = c.proc.pid
+        cpu_s = rss = None
+        try:
+            if psutil is not None:
+                p = psutil.Process(pid)
+                t = p.cpu_times()
+                cpu_s, rss = t.user + t.system, p.memory_info().rss
+            elif os.path.exists(f"/proc/{pid}/stat"):
+                with open(f"/proc/{pid}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+                tick = os.sysconf("SC_CLK_TCK")
+                cpu_s = (int(fields[11]) + int(fields[12])) / tick
+                rss = int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+        except Exception:
+            pass
+        cpu_pct = None
+        now = time.monotonic()
+        if cpu_s is not None:
+            if c._cpu_prev is not None and now > c._cpu_prev[0]:
+                cpu_pct = 100.0 * (cpu_s - c._cpu_prev[1]) / (now - c._cpu_prev[0])
+            c._cpu_prev = (now, cpu_s)
+        return {"cpu_pct": cpu_pct, "rss_mb": None if rss is None else rss / 1e6}
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {name: {
+                    "running": self.is_running(name),
+                    "pid": c.proc.pid if c.proc else None,
+                    "restarts": c.restarts,
+                    "heartbeat_age": (now - c.last_hb) if c.proc else None,
+                    **c.usage,
+                } for name, c in self.children.items()}
+
+    async def run(self, interval: float = 1.0):
+        self._loop = asyncio.get_running_loop()
+        self._inbox = self._inbox or asyncio.Queue()
+        pump = asyncio.create_task(self._pump())
+        try:
+            while True:
+                await self._check()
+                await asyncio.sleep(interval)
+        finally:
+            pump.cancel()
@@ -0,0 +1,57 @@
+# modules/udp_channel.py
+# Optional UDP path for continuous setpoints (motor/servo), so a lost TCP segment on the
+# tether can't hold newer setpoints back. One-shots, stream control and telemetry stay
+# on the websocket.
+
+import asyncio, json, time, uuid
+from typing import Any, Dict, List
+
+# (type, action) pairs that may travel over UDP; must match the ROV modules' CONTINUOUS sets
+# (the ROV lists them under "continuous" in server.stats). Checked by testing/continuous_check.py.
+CONTINUOUS_ACTIONS = {
+    ("motor", "set"), ("motor", "set_speed"), ("motor", "drive"),
+    ("servo", "set_angle"),
+    ("thrusters", "set"),
+}
+
+def is_continuous(msg: Dict[str, Any]) -> bool:
+    return isinstance(msg, dict) and (msg.get("type"), msg.get("action")) in CONTINUOUS_ACTIONS
+
+class UdpControlChannel(asyncio.DatagramProtocol):
+    """
+    Sender side. Each datagram is
+      {"ch":<id>, "seq":<n>, "ts":<monotonic>, "msgs":[...]}
+    and the ROV keeps only datagrams newer than the last one it accepted.
+    """
+    def __init__(self):
+        self.ch = uuid.uuid4().hex[:8]
+        self.seq = 0
+        self.transport = None
+        self.sent = 0
+        self.errors = 0
+
+    @classmethod
+    async def open(cls, host: str, port: int) -> "UdpControlChannel":
+        loop = asyncio.get_running_loop()
+        _, proto = await loop.create_datagram_endpoint(cls, remote_addr=(host, port))
+        return proto
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def error_received(self, exc):
+        self.errors += 1   # e.g. ICMP port unreachable while the ROV restarts
+
+    def send(self, msgs: List[Dict[str, Any]]):
+        if self.transport is None or not msgs:
+            return
+        self.seq += 1
+        self.transport.sendto(json.dumps({
+            "ch": self.ch, "seq": self.seq, "ts": time.monotonic(), "msgs": msgs
+        }, separators=(',',':')).encode())
+        self.sent += 1
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
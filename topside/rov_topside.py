@@ -4,7 +4,9 @@ import subprocess
 import platform
 import asyncio
 import importlib
+import json
 from modules import network_handler, module_launcher, launch_gui
+from modules.supervisor import Supervisor, ModuleSpec
 
 # 🎛️ Module toggle config
 ENABLED_MODULES = {
@@ -14,15 +16,42 @@ ENABLED_MODULES = {
     "image_processor": False,
 }
 
+# Run input polling and the launcher window as supervised child processes, so their
+# CPU use or stalls can't add jitter to control forwarding in the relay's event loop.
+ISOLATE_MODULES = True
+SUPERVISOR_REPORT_INTERVAL = 5.0   # seconds between per-module CPU/RSS reports to local clients
+
 class TopsideController:
     def __init__(self):
         self.running_tasks = {}
         self.command_queue = asyncio.Queue()
         self.loop = None  # Will be set later in run()
+        self.relay = None
+        self.supervisor = Supervisor(self.on_child_message)
+        self.supervisor.add(ModuleSpec("input_controllers", "modules.input_controllers:child_main",
+                                       ("ws://localhost:9999",)))
+        self.supervisor.add(ModuleSpec("launcher", "modules.module_launcher:child_main"))
+
+    async def on_child_message(self, name, kind, payload):
+        """Pipe messages from supervised children: control frames and launcher commands."""
+        if kind == "msgs":
+            if self.relay:
+                await self.relay.submit(payload)
+        elif kind == "cmd":
+            await self.command_queue.put(payload)
+
+    async def report_modules(self):
+        while True:
+            await asyncio.sleep(SUPERVISOR_REPORT_INTERVAL)
+            if self.relay:
+                await self.relay.send_local(json.dumps({
+                    "type": "supervisor", "event": "stats", "modules": self.supervisor.stats()
+                }))
 
     async def start_relay(self):
         print("📡 Starting relay")
         relay = network_handler.NetworkRelay()
+        self.relay = relay
         task = asyncio.create_task(relay.run())
         self.running_tasks["relay"] = task
         await asyncio.sleep(0.2)
@@ -41,16 +70,33 @@ class TopsideController:
             subprocess.call(["pkill", "-f", "electron"])
 
     async def start_input_controllers(self):
+        if ISOLATE_MODULES:
+            if self.supervisor.is_running("input_controllers"):
+                print("🎮 Input_controllers already running")
+                return
+            print("🎮 Starting input_controllers module (child process)")
+            await self.supervisor.start("input_controllers")
+            return
+
         if "input_controllers" in self.running_tasks and not self.running_tasks["input_controllers"].done():
             print("🎮 Input_controllers already running")
             return
 
         print("🎮 Starting input_controllers module")
         controller = importlib.import_module("modules.input_controllers")
-        task = asyncio.create_task(controller.run("ws://localhost:9999"))
+        # Same process as the relay: hand frames to it directly instead of over localhost
+        task = asyncio.create_task(controller.run("ws://localhost:9999", relay=self.relay))
         self.running_tasks["input_controllers"] = task
 
     async def stop_input_controllers(self):
+        if ISOLATE_MODULES:
+            if self.supervisor.is_running("input_controllers"):
+                print("🛑 Stopping input_controllers")
+                await self.supervisor.stop("input_controllers")
+            else:
+                print("⚠️ Input_controllers not running")
+            return
+
         task = self.running_tasks.get("input_controllers")
         if task and not task.done():
             print("🛑 Stopping input_controllers")
@@ -88,11 +134,14 @@ class TopsideController:
                 await self.close_gui()
             elif cmd == "quit":
                 print("🛑 Quit requested from button panel")
+                await self.supervisor.stop_all()
                 break
 
     async def run(self):
         print("🚀 ROV Topside Booting")
         self.loop = asyncio.get_running_loop()  # ✅ Now safe to assign loop
+        asyncio.create_task(self.supervisor.run())
+        asyncio.create_task(self.report_modules())
 
         if ENABLED_MODULES["relay"]:
             await self.start_relay()
@@ -106,7 +155,10 @@ class TopsideController:
         if ENABLED_MODULES["image_processor"]:
             await self.start_image_processor()
 
-        module_launcher.launch_ui(self.command_queue, self.loop)
+        if ISOLATE_MODULES:
+            await self.supervisor.start("launcher")
+        else:
+            module_launcher.launch_ui(self.command_queue, self.loop)
         await self.handle_commands()
 
 if __name__ == "__main__":
@@ -0,0 +1,84 @@
+# bench_direct_path.py
+# Before/after numbers for input_controllers -> NetworkRelay:
+#   "websocket": frames go over ws://localhost:9999 and are decoded by handle_local_client
+#   "direct":    frames are handed to NetworkRelay.submit() in the same process
+# A stand-in ROV websocket server (same process) timestamps arrival, so latency is
+# hand-off -> bytes received at the ROV end. CPU is process time per message.
+#
+#   python topside/testing/bench_direct_path.py --n 2000
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+import websockets
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from modules import network_handler
+from modules.outbound_scheduler import encode_frame
+
+FAKE_ROV_PORT = 8799
+arrivals = {}   # seq -> monotonic arrival time at the fake ROV
+
+async def fake_rov(ws):
+    async for message in ws:
+        t = time.monotonic()
+        data = json.loads(message)
+        for m in (data if isinstance(data, list) else [data]):
+            if m.get("type") == "motor":
+                arrivals[m["seq"]] = t
+
+def frame_msgs(seq):
+    return [{"type": "motor", "action": "set", "throttle": seq % 100, "turn": 0,
+             "src": "bench", "seq": seq, "ts": time.monotonic()},
+            {"type": "servo", "action": "set_angle", "pan": 90, "tilt": 90,
+             "src": "bench", "seq": seq, "ts": time.monotonic()}]
+
+async def run_mode(mode, relay, n, interval):
+    arrivals.clear()
+    sent = {}
+    seq0 = 1_000_000 if mode == "direct" else 0
+    ws = await websockets.connect(f"ws://localhost:{network_handler.LOCAL_LISTEN_PORT}") if mode == "websocket" else None
+    cpu0 = time.process_time()
+    for i in range(n):
+        seq = seq0 + i
+        msgs = frame_msgs(seq)
+        sent[seq] = time.monotonic()
+        if ws is not None:
+            await ws.send(encode_frame(msgs))   # what _WsLink does
+        else:
+            await relay.submit(msgs)            # what _DirectLink does
+        await asyncio.sleep(interval)
+    await asyncio.sleep(0.3)
+    cpu = time.process_time() - cpu0
+    if ws is not None:
+        await ws.close()
+    lat = sorted((arrivals[s] - t) * 1e6 for s, t in sent.items() if s in arrivals)
+    return {
+        "mode": mode, "received": f"{len(lat)}/{n}",
+        "p50_us": round(statistics.median(lat), 1),
+        "p99_us": round(lat[int(len(lat) * 0.99) - 1], 1),
+        "cpu_us_per_msg": round(cpu * 1e6 / n, 1),
+    }
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=2000)
+    ap.add_argument("--interval", type=float, default=0.001, help="seconds between frames")
+    args = ap.parse_args()
+
+    network_handler.REMOTE_ROV_WS = f"ws://127.0.0.1:{FAKE_ROV_PORT}"
+    network_handler.LINK_PROBE_HZ = 1   # keep probe traffic out of the numbers
+    async with websockets.serve(fake_rov, "127.0.0.1", FAKE_ROV_PORT):
+        relay = network_handler.NetworkRelay()
+        relay_task = asyncio.create_task(relay.run())
+        await asyncio.sleep(0.5)
+        for mode in ("websocket", "direct"):
+            print(await run_mode(mode, relay, args.n, args.interval))
+        relay_task.cancel()
+
+asyncio.run(main())
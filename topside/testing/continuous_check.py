@@ -0,0 +1,73 @@
+# continuous_check.py
+# udp_channel.CONTINUOUS_ACTIONS is a hand-kept copy of the rovside modules' CONTINUOUS sets.
+# If they drift apart, either one-shot commands go out over lossy UDP, or the ROV silently
+# drops UDP items it doesn't treat as continuous. This compares the two:
+#
+#   python topside/testing/continuous_check.py                         # vs rovside/modules sources
+#   python topside/testing/continuous_check.py --url ws://raspberrypi.local:8765   # vs a running ROV
+#
+# The source check reads TYPE / CONTINUOUS with ast (no rovside imports, no SPI). The live
+# check asks for {"type":"server","action":"stats"} and reads its "continuous" list.
+# Exit code 1 on any difference.
+
+import argparse
+import ast
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from modules.udp_channel import CONTINUOUS_ACTIONS
+
+ROV_MODULES = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "rovside", "modules"))
+
+def from_sources(path=ROV_MODULES):
+    out = set()
+    for name in sorted(os.listdir(path)):
+        if not name.endswith(".py") or name.startswith("__"):
+            continue
+        with open(os.path.join(path, name), encoding="utf-8") as f:
+            tree = ast.parse(f.read(), name)
+        consts = {}
+        for node in tree.body:
+            if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+                try:
+                    consts[node.targets[0].id] = ast.literal_eval(node.value)
+                except (ValueError, TypeError, SyntaxError):   # not a literal
+                    pass
+        if "TYPE" in consts and "CONTINUOUS" in consts:
+            out |= {(consts["TYPE"], a) for a in consts["CONTINUOUS"]}
+    return out
+
+async def from_rov(url):
+    import websockets
+    async with websockets.connect(url, open_timeout=5) as ws:
+        await ws.send(json.dumps({"type": "server", "action": "stats"}))
+        while True:
+            data = json.loads(await asyncio.wait_for(ws.recv(), 5))
+            if data.get("type") == "server" and data.get("event") == "stats":
+                if "continuous" not in data:
+                    sys.exit("❌ this ROV doesn't report \"continuous\" in server.stats (older server)")
+                return {tuple(s.split(".", 1)) for s in data["continuous"]}
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare topside CONTINUOUS_ACTIONS with the ROV")
+    ap.add_argument("--url", help="ask a running ROV instead of reading rovside/modules")
+    args = ap.parse_args()
+
+    rov = asyncio.run(from_rov(args.url)) if args.url else from_sources()
+    where = args.url or "rovside/modules"
+    only_rov = sorted(rov - CONTINUOUS_ACTIONS)
+    only_topside = sorted(CONTINUOUS_ACTIONS - rov)
+    print(f"🧪 {len(CONTINUOUS_ACTIONS)} continuous actions on the topside, {len(rov)} on {where}")
+    for t, a in only_rov:
+        print(f"❌ {t}.{a}: continuous on the ROV, missing from udp_channel.CONTINUOUS_ACTIONS")
+    for t, a in only_topside:
+        print(f"❌ {t}.{a}: in CONTINUOUS_ACTIONS, but the ROV would drop it from UDP")
+    if only_rov or only_topside:
+        sys.exit(1)
+    print("✅ in sync")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# resync_check.py
+# End-to-end check that NetworkRelay's reconnect replay really runs on the ROV after an
+# outage longer than the ROV's MAX_COMMAND_AGE (0.5 s):
+#
+#   ROV server (dummy SPI) <- tether_emulator (cuts the link twice) <- NetworkRelay <- sender
+#
+#   python topside/testing/resync_check.py                 # two 1.5 s outages
+#   python topside/testing/resync_check.py --outage 3
+#
+# Outage 1: the pilot moves the throttle while the link is down and then stops sending, so
+#           only the replay can bring the new value to the ROV; its actuator state must show it.
+# Outage 2: nothing changes while down; the replay of what the ROV already has must still be
+#           acked ok (not refused as out_of_order / too_old).
+# A viewer connected straight to the ROV (not through the emulator) reads the actuator state
+# and the server's freshness counters. Exit code 1 on any failure.
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import websockets
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from modules import network_handler
+from modules.outbound_scheduler import OutboundScheduler
+from tether_emulator import Profile, TetherEmulator
+
+SERVER = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "rovside", "rov_control_server.py"))
+ROV_PORT = 8765
+EMU_PORT = 8865
+LOCAL_PORT = 9899        # relay's local listener; kept off 9999 so a real relay can keep running
+SETTLE = 1.5             # s before the first outage, and between the two
+RECOVER_TIMEOUT = 8.0    # s after the link comes back for the replay to be acked
+
+def motor(throttle):
+    return {"type": "motor", "action": "set", "throttle": throttle, "turn": 0}
+
+class Viewer:
+    """Straight to the ROV: newest motor actuator state + replies to server.stats."""
+    def __init__(self):
+        self.throttle = None
+        self.stats = None
+        self.ws = None
+
+    async def run(self):
+        async with websockets.connect(f"ws://127.0.0.1:{ROV_PORT}") as ws:
+            self.ws = ws
+            async for message in ws:
+                data = json.loads(message)
+                if data.get("type") == "actuators" and "motor" in data:
+                    self.throttle = data["motor"]["throttle"]
+                elif data.get("type") == "server" and data.get("event") == "stats":
+                    self.stats = data
+
+    async def freshness(self):
+        self.stats = None
+        await self.ws.send(json.dumps({"type": "server", "action": "stats"}))
+        for _ in range(50):
+            await asyncio.sleep(0.05)
+            if self.stats is not None:
+                return self.stats["freshness"]["streams"].get("motor.set", {})
+        return {}
+
+async def wait_for(cond, timeout):
+    t_end = time.monotonic() + timeout
+    while time.monotonic() < t_end:
+        if cond():
+            return True
+        await asyncio.sleep(0.05)
+    return False
+
+async def start_server():
+    env = dict(os.environ, ROV_SPI_BACKEND="dummy", ROV_LOG_LEVEL="WARNING")
+    proc = subprocess.Popen([sys.executable, SERVER], env=env, cwd=os.path.dirname(SERVER),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(50):
+        await asyncio.sleep(0.2)
+        try:
+            async with websockets.connect(f"ws://127.0.0.1:{ROV_PORT}"):
+                return proc
+        except OSError:
+            continue
+    proc.kill()
+    sys.exit("❌ server did not come up")
+
+async def run(args):
+    down1 = SETTLE
+    up1 = down1 + args.outage
+    down2 = up1 + RECOVER_TIMEOUT + SETTLE
+    up2 = down2 + args.outage
+    profile = Profile({"steps": [{"t": 0}, {"t": down1, "down": True}, {"t": up1, "down": False},
+                                 {"t": down2, "down": True}, {"t": up2, "down": False}]})
+
+    proc = await start_server()
+    emu = TetherEmulator(profile, tcp=[(EMU_PORT, "127.0.0.1", ROV_PORT)], keep_rows=False)
+    network_handler.REMOTE_ROV_WS = f"ws://127.0.0.1:{EMU_PORT}"
+    network_handler.LOCAL_LISTEN_PORT = LOCAL_PORT
+    network_handler.METRICS_PORT = None
+    relay = network_handler.NetworkRelay()
+    sched = OutboundScheduler({})   # stands in for input_controllers' scheduler
+    viewer = Viewer()
+    failures = []
+
+    def expect(ok, what):
+        print(f"   {'✅' if ok else '❌'} {what}")
+        if not ok:
+            failures.append(what)
+
+    try:
+        await emu.start()
+        t0 = time.monotonic()
+        tasks = [asyncio.create_task(relay.run()), asyncio.create_task(viewer.run())]
+        await asyncio.sleep(0.5)
+
+        async def at(t):
+            await asyncio.sleep(max(0.0, t0 + t - time.monotonic()))
+
+        # --- outage 1: setpoint changes while down ---
+        await relay.submit(sched.stamp([motor(20)]))
+        await at(down1 + 0.2)
+        await relay.submit(sched.stamp([motor(40)]))   # coalesced into last_state, never sent
+        print(f"🧪 outage 1: {args.outage:.1f}s, throttle 20 -> 40 while down")
+        await at(up1)
+        ok = await wait_for(lambda: relay.resync_latency is not None and relay._resync_id is None,
+                            RECOVER_TIMEOUT)
+        expect(relay.reconnects >= 1, f"relay reconnected ({relay.reconnects})")
+        expect(ok, f"replay acked ok (latency {relay.resync_latency})")
+        expect(await wait_for(lambda: viewer.throttle == 40, 1.0),
+               f"ROV applied the replayed throttle (actuators: {viewer.throttle})")
+
+        # --- outage 2: nothing changes while down ---
+        relay.resync_latency = None
+        reconnects = relay.reconnects
+        print(f"🧪 outage 2: {args.outage:.1f}s, no change while down")
+        await at(up2)
+        ok = await wait_for(lambda: relay.reconnects > reconnects and relay.resync_latency is not None
+                            and relay._resync_id is None, RECOVER_TIMEOUT)
+        expect(ok, f"replay of unchanged state acked ok (latency {relay.resync_latency})")
+
+        fresh = await viewer.freshness()
+        expect(relay.resync_refused == 0, f"no replayed command refused ({relay.resync_refused})")
+        expect(fresh.get("out_of_order", 0) == 0 and fresh.get("too_old", 0) == 0,
+               f"ROV freshness for motor.set: {fresh}")
+        print(f"   link: {json.dumps(emu.recorder.summary())}")
+        for t in tasks:
+            t.cancel()
+    finally:
+        await emu.stop()
+        proc.terminate()
+        proc.wait(timeout=5)
+
+    if failures:
+        sys.exit(1)
+    print("✅ state restored after every outage")
+
+def main():
+    ap = argparse.ArgumentParser(description="Relay reconnect replay, end to end")
+    ap.add_argument("--outage", type=float, default=1.5, help="seconds per link cut (> 0.5 to matter)")
+    args = ap.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+# tether_emulator.py
+# TCP + UDP proxy that makes localhost behave like a tether: latency, jitter, a bandwidth
+# cap, loss and scripted disconnects, changing over time from a profile. Everything it
+# passes is recorded, so a test or benchmark can assert on what the link actually did.
+# (Supersedes udp_loss_proxy.py for anything beyond a quick UDP loss check.)
+#
+#   ROV_UDP_PORT=8766 python rovside/rov_control_server.py         (ws 8765, udp 8766)
+#   python topside/testing/tether_emulator.py --profile flaky --record /tmp/tether.jsonl
+#   relay with REMOTE_ROV_WS = "ws://127.0.0.1:8865" (and ROV_UDP_PORT = 8867)
+#
+# Model, per direction ("up" = topside -> ROV, "down" = ROV -> topside), shared by TCP and UDP:
+#   - the wire is busy for len*8/bandwidth seconds per chunk (serialization, queues build up)
+#   - then latency + uniform(-jitter, jitter)
+#   - TCP is never reordered or lost: a "lost" segment costs TCP_RTO extra (retransmit);
+#     UDP datagrams are dropped and may overtake each other
+#   - while "down", open TCP connections are cut, new ones refused and UDP dropped
+#
+# In a test:
+#   emu = TetherEmulator(Profile.load("long_tether"), tcp=[(8865, "127.0.0.1", 8765)])
+#   await emu.start(); ...; await emu.stop(); emu.recorder.summary()
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+TCP_RTO = 0.2          # extra delay for a TCP segment that "was lost" and retransmitted
+READ_SIZE = 64 * 1024
+
+@dataclass
+class Conditions:
+    latency: float = 0.0         # one-way, seconds
+    jitter: float = 0.0          # +/- seconds, uniform
+    bandwidth_bps: float = 0.0   # per direction; 0 = unlimited
+    loss: float = 0.0            # 0..1
+    down: bool = False           # link cut
+
+# Profile: {"loop": <bool>, "steps": [{"t": <s>, <Conditions fields>...}, ...]}
+# Each step changes only the fields it names; the rest carry over from the previous step.
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "clean": {"steps": [{"t": 0}]},
+    "long_tether": {"steps": [{"t": 0, "latency": 0.015, "jitter": 0.003, "bandwidth_bps": 2_000_000}]},
+    "degraded": {"steps": [{"t": 0, "latency": 0.04, "jitter": 0.02, "bandwidth_bps": 256_000, "loss": 0.05}]},
+    "flaky": {"loop": True, "steps": [
+        {"t": 0,  "latency": 0.02, "jitter": 0.005, "bandwidth_bps": 1_000_000, "loss": 0.0},
+        {"t": 20, "latency": 0.08, "jitter": 0.04, "loss": 0.1},
+        {"t": 30, "down": True},
+        {"t": 33, "down": False, "latency": 0.02, "jitter": 0.005, "loss": 0.0},
+        {"t": 45},
+    ]},
+}
+
+class Profile:
+    def __init__(self, spec: Dict[str, Any]):
+        self.loop = bool(spec.get("loop"))
+        names = {f.name for f in fields(Conditions)}
+        self.steps: List[Tuple[float, Conditions]] = []
+        cond = Conditions()
+        for step in sorted(spec["steps"], key=lambda s: s["t"]):
+            cond = replace(cond, **{k: v for k, v in step.items() if k in names})
+            self.steps.append((float(step["t"]), cond))
+        self.period = self.steps[-1][0]
+
+    @classmethod
+    def load(cls, name_or_path: str) -> "Profile":
+        if name_or_path in PROFILES:
+            return cls(PROFILES[name_or_path])
+        with open(name_or_path) as f:
+            return cls(json.load(f))
+
+    def at(self, t: float) -> Conditions:
+        if self.loop and self.period > 0:
+            t %= self.period
+        current = self.steps[0][1]
+        for start, cond in self.steps:
+            if t < start:
+                break
+            current = cond
+        return current
+
+class Recorder:
+    """
+    One row per chunk/datagram/connection event, kept in `rows` (keep_rows) and/or written
+    as JSONL. summary() is kept up to date incrementally, so long runs stay cheap.
+    """
+    def __init__(self, path: Optional[str] = None, keep_rows: bool = True, delay_window: int = 10000):
+        self.rows: List[Dict[str, Any]] = []
+        self.keep_rows = keep_rows
+        self._file = open(path, "w") if path else None
+        self._agg: Dict[str, Dict[str, Any]] = {}
+        self._delays: Dict[str, deque] = {}
+        self._window = delay_window
+        self.t0 = time.monotonic()
+
+    def add(self, proto, direction, nbytes, fate, delay=None):
+        row = {"t": round(time.monotonic() - self.t0, 6), "proto": proto, "dir": direction,
+               "bytes": nbytes, "fate": fate}
+        if delay is not None:
+            row["delay"] = round(delay, 6)
+        key = f"{proto}_{direction}"
+        agg = self._agg.setdefault(key, {"bytes": 0, "fates": {}})
+        agg["fates"][fate] = agg["fates"].get(fate, 0) + 1
+        if delay is not None:
+            agg["bytes"] += nbytes
+            self._delays.setdefault(key, deque(maxlen=self._window)).append(delay)
+        if self.keep_rows:
+            self.rows.append(row)
+        if self._file:
+            self._file.write(json.dumps(row) + "\n")
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def summary(self) -> Dict[str, Any]:
+        """Per proto/direction: bytes passed, count per fate, delay p50/p99 (recent window)."""
+        out: Dict[str, Any] = {}
+        for key, agg in self._agg.items():
+            d = sorted(self._delays.get(key, ()))
+            out[key] = {"bytes": agg["bytes"], "fates": dict(agg["fates"]),
+                        "delay_p50": round(d[len(d) // 2], 6) if d else None,
+                        "delay_p99": round(d[min(len(d) - 1, int(len(d) * 0.99))], 6) if d else None}
+        return out
+
+class TetherEmulator:
+    def __init__(self, profile: Profile, tcp=(), udp=(), record: Optional[str] = None,
+                 keep_rows: bool = True, seed=None):
+        self.profile = profile
+        self.tcp_routes = list(tcp)     # [(listen_port, target_host, target_port)]
+        self.udp_routes = list(udp)
+        self.recorder = Recorder(record, keep_rows=keep_rows)
+        self.rng = random.Random(seed)
+        self._wire_free = {"up": 0.0, "down": 0.0}
+        self._conns = set()             # open (client_writer, server_writer) pairs
+        self._servers = []
+        self._transports = []
+        self._t0 = 0.0
+        self._was_down = False
+
+    def conditions(self) -> Conditions:
+        return self.profile.at(time.monotonic() - self._t0)
+
+    def schedule(self, direction: str, nbytes: int, reorder: bool) -> Tuple[Optional[float], str]:
+        """Delivery time (loop clock) for a chunk entering the wire now, or None if dropped."""
+        c = self.conditions()
+        now = asyncio.get_running_loop().time()
+        if c.down:
+            return None, "down"
+        lost = c.loss and self.rng.random() < c.loss
+        if lost and reorder:
+            return None, "dropped"   # UDP: gone
+        start = max(self._wire_free[direction], now)
+        self._wire_free[direction] = start + (nbytes * 8 / c.bandwidth_bps if c.bandwidth_bps else 0.0)
+        delay = max(0.0, c.latency + self.rng.uniform(-c.jitter, c.jitter))
+        return self._wire_free[direction] + delay + (TCP_RTO if lost else 0.0), "retransmit" if lost else "passed"
+
+    # ---------------- TCP ----------------
+
+    async def _pump(self, reader, writer, direction):
+        """One direction of one connection: read, schedule, deliver in order."""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        last = 0.0
+
+        async def deliver():
+            while True:
+                at, data = await queue.get()
+                if data is None:
+                    break
+                await asyncio.sleep(max(0.0, at - loop.time()))
+                writer.write(data)
+                await writer.drain()
+
+        sender = asyncio.create_task(deliver())
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    break
+                at, fate = self.schedule(direction, len(data), reorder=False)
+                if at is None:
+                    self.recorder.add("tcp", direction, len(data), fate)
+                    break   # link went down mid-connection
+                at = max(at, last)   # a byte stream never overtakes itself
+                last = at
+                self.recorder.add("tcp", direction, len(data), fate, at - loop.time())
+                queue.put_nowait((at, data))
+            queue.put_nowait((last, None))
+            await sender
+        except ConnectionError:
+            sender.cancel()
+        except asyncio.CancelledError:
+            sender.cancel()
+            raise
+        finally:
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+    def _tcp_handler(self, host, port):
+        async def handle(c_reader, c_writer):
+            if self.conditions().down:
+                self.recorder.add("tcp", "up", 0, "refused")
+                c_writer.close()
+                return
+            try:
+                s_reader, s_writer = await asyncio.open_connection(host, port)
+            except OSError:
+                self.recorder.add("tcp", "up", 0, "target_unreachable")
+                c_writer.close()
+                return
+            pair = (c_writer, s_writer)
+            self._conns.add(pair)
+            self.recorder.add("tcp", "up", 0, "connect")
+            try:
+                await asyncio.gather(self._pump(c_reader, s_writer, "up"),
+                                     self._pump(s_reader, c_writer, "down"))
+            except asyncio.CancelledError:
+                pass   # emulator shutting down; asyncio.streams would log the cancellation
+            finally:
+                self._conns.discard(pair)
+                self.recorder.add("tcp", "up", 0, "close")
+        return handle
+
+    # ---------------- UDP ----------------
+
+    def _udp_protocol(self, target):
+        emu = self
+
+        class Forward(asyncio.DatagramProtocol):
+            def __init__(self):
+                self.client = None
+                self.out = None
+
+            def connection_made(self, transport):
+                self.transport = transport
+
+            def datagram_received(self, data, addr):
+                self.client = addr
+                emu._udp_send(self.out, data, target, "up")
+
+        class Back(asyncio.DatagramProtocol):
+            def __init__(self, front):
+                self.front = front
+
+            def datagram_received(self, data, addr):
+                if self.front.client is not None:
+                    emu._udp_send(self.front.transport, data, self.front.client, "down")
+
+        return Forward, Back
+
+    def _udp_send(self, transport, data, addr, direction):
+        loop = asyncio.get_running_loop()
+        at, fate = self.schedule(direction, len(data), reorder=True)
+        if at is None:
+            self.recorder.add("udp", direction, len(data), fate)
+            return
+        self.recorder.add("udp", direction, len(data), fate, at - loop.time())
+        loop.call_at(at, transport.sendto, data, addr)
+
+    # ---------------- Lifecycle ----------------
+
+    async def _watch(self):
+        while True:
+            down = self.conditions().down
+            if down and not self._was_down:
+                for c_writer, s_writer in list(self._conns):
+                    c_writer.close()
+                    s_writer.close()
+                self.recorder.add("tcp", "up", 0, "cut")
+            self._was_down = down
+            await asyncio.sleep(0.05)
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self._t0 = time.monotonic()
+        for listen, host, port in self.tcp_routes:
+            self._servers.append(await asyncio.start_server(self._tcp_handler(host, port), "127.0.0.1", listen))
+        for listen, host, port in self.udp_routes:
+            Forward, Back = self._udp_protocol((host, port))
+            front_t, front = await loop.create_datagram_endpoint(Forward, local_addr=("127.0.0.1", listen))
+            back_t, _ = await loop.create_datagram_endpoint(lambda: Back(front), remote_addr=None,
+                                                           local_addr=("127.0.0.1", 0))
+            front.out = back_t
+            self._transports += [front_t, back_t]
+        self._servers.append(asyncio.create_task(self._watch()))
+
+    async def stop(self):
+        for s in self._servers:
+            if isinstance(s, asyncio.Task):
+                s.cancel()
+            else:
+                s.close()
+        for c_writer, s_writer in list(self._conns):
+            c_writer.close()
+            s_writer.close()
+        for t in self._transports:
+            t.close()
+        self.recorder.close()
+
+def _route(spec: str):
+    listen, host, port = spec.split(":")
+    return int(listen), host, int(port)
+
+async def main():
+    ap = argparse.ArgumentParser(description="Tether link emulator")
+    ap.add_argument("--tcp", action="append", default=None, help="listen:host:port (default 8865:127.0.0.1:8765)")
+    ap.add_argument("--udp", action="append", default=None, help="listen:host:port (default 8867:127.0.0.1:8766)")
+    ap.add_argument("--profile", default="long_tether", help=f"{', '.join(PROFILES)} or a JSON file")
+    ap.add_argument("--record", help="write one JSON line per chunk/datagram here")
+    ap.add_argument("--seed", type=int)
+    args = ap.parse_args()
+
+    emu = TetherEmulator(Profile.load(args.profile),
+                         tcp=[_route(s) for s in (args.tcp or ["8865:127.0.0.1:8765"])],
+                         udp=[_route(s) for s in (args.udp or ["8867:127.0.0.1:8766"])],
+                         record=args.record, keep_rows=False, seed=args.seed)
+    await emu.start()
+    print(f"🧪 Tether emulator up, profile={args.profile}  tcp={emu.tcp_routes} udp={emu.udp_routes}")
+    last = None
+    try:
+        while True:
+            await asyncio.sleep(2)
+            c = emu.conditions()
+            if c != last:
+                print(f"   now: {c}")
+                last = c
+            print(f"   {json.dumps(emu.recorder.summary())}")
+    finally:
+        await emu.stop()
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,59 @@
+# udp_loss_proxy.py
+# Local UDP proxy that drops, delays and reorders datagrams, for trying the UDP control
+# channel on one machine:
+#
+#   ROV_UDP_PORT=8766 python rovside/rov_control_server.py    (listens on UDP 8766)
+#   python topside/testing/udp_loss_proxy.py --listen 8767 --target 127.0.0.1:8766 --loss 0.2
+#   relay with USE_UDP_CONTROL = True, REMOTE_ROV_WS = "ws://127.0.0.1:8765", ROV_UDP_PORT = 8767
+#
+# Then ask the ROV for {"type":"server","action":"stats"} and compare its "udp" counters
+# (lost / stale) with what the proxy reports here.
+
+import argparse
+import asyncio
+import random
+
+class LossyForwarder(asyncio.DatagramProtocol):
+    def __init__(self, target, loss, delay, jitter):
+        self.target = target
+        self.loss, self.delay, self.jitter = loss, delay, jitter
+        self.out = None
+        self.passed = self.dropped = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if random.random() < self.loss:
+            self.dropped += 1
+            return
+        # Independent random delay per datagram -> jitter larger than the send interval reorders
+        d = max(0.0, self.delay + random.uniform(-self.jitter, self.jitter))
+        asyncio.get_running_loop().call_later(d, self._send, data)
+
+    def _send(self, data):
+        self.out.sendto(data, self.target)
+        self.passed += 1
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--listen", type=int, default=8767)
+    ap.add_argument("--target", default="127.0.0.1:8766")
+    ap.add_argument("--loss", type=float, default=0.1, help="drop probability 0..1")
+    ap.add_argument("--delay", type=float, default=0.02, help="base delay in seconds")
+    ap.add_argument("--jitter", type=float, default=0.02, help="+/- seconds")
+    args = ap.parse_args()
+
+    host, port = args.target.rsplit(":", 1)
+    loop = asyncio.get_running_loop()
+    fwd = LossyForwarder((host, int(port)), args.loss, args.delay, args.jitter)
+    await loop.create_datagram_endpoint(lambda: fwd, local_addr=("127.0.0.1", args.listen))
+    fwd.out, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol, remote_addr=None,
+                                                     local_addr=("0.0.0.0", 0))
+    print(f"🧪 UDP proxy :{args.listen} -> {args.target}  loss={args.loss} delay={args.delay}±{args.jitter}s")
+
+    while True:
+        await asyncio.sleep(2)
+        print(f"   passed={fwd.passed} dropped={fwd.dropped}")
+
+asyncio.run(main())